@@ -1,9 +1,12 @@
+from src.utils import profiling
+profiling.start_from_env()  # sebelum import berat agar waktu import per modul ikut terukur
 import streamlit as st
+import os
+import uuid
 from src.core.blackboard import Blackboard
-from src.agents.intent_agent import IntentAgent
-from src.agents.doctor_agent import DoctorAgent
-from src.agents.sommelier_agent import SommelierAgent
-from src.agents.brewer_agent import BrewerAgent
+from src.core.session_manager import SessionManager
+from src.core import bootstrap
+from src.utils import metrics
 from src.utils.logger import setup_logger
 
 # Setup Logger untuk Orchestrator
@@ -23,113 +26,141 @@ def load_agents():
     Memuat semua agen ke memori.
     Menggunakan cache agar model PyTorch tidak di-load berulang kali.
     """
-    logger.info("Initializing Agents...")
-    intent_agent = IntentAgent()
-    doctor_agent = DoctorAgent()
-    sommelier_agent = SommelierAgent()
-    brewer_agent = BrewerAgent()
-    return intent_agent, doctor_agent, sommelier_agent, brewer_agent
+    return bootstrap.load_agents()
+
+@st.cache_resource
+def load_session_manager():
+    """Umur sesi (TTL/LRU/spill) untuk backend memory/sqlite; st.session_state diurus Streamlit."""
+    kind = os.environ.get("BLACKBOARD_BACKEND", "streamlit").lower()
+    return SessionManager(kind) if kind in ('memory', 'sqlite') else None
+
+@st.cache_resource
+def start_metrics_exporter():
+    """Endpoint Prometheus di METRICS_PORT (sekali per proses Streamlit, bukan per rerun)."""
+    return metrics.start_exporter_from_env()
 
 # Load agents
-intent_agent, doctor_agent, sommelier_agent, brewer_agent = load_agents()
+orchestrator = load_agents()
+start_metrics_exporter()
+session_manager = load_session_manager()
+
+# Initialize Blackboard
+# Backend dipilih lewat BLACKBOARD_BACKEND (streamlit | memory | sqlite).
+# Session id disimpan di st.session_state agar backend memory/sqlite tahu sesi mana.
+if 'barista_session_id' not in st.session_state:
+    st.session_state['barista_session_id'] = uuid.uuid4().hex
+
+def current_board():
+    """Blackboard sesi ini (dipanggil ulang di setiap fragment, bukan ditangkap dari run penuh)."""
+    if session_manager:
+        return session_manager.board(st.session_state['barista_session_id'])
+    return Blackboard(session_id=st.session_state['barista_session_id'])
 
-# Initialize Blackboard (Session State wrapper)
-# Blackboard otomatis menangani persistensi state via st.session_state
-board = Blackboard()
+if session_manager:
+    session_manager.sweep()
+board = current_board()
 
 # --- SIDEBAR: THE BLACKBOARD MONITOR (Traceability) ---
-with st.sidebar:
-    st.header("🧠 Blackboard Monitor")
-    st.caption("Intip apa yang dipikirkan sistem secara real-time.")
-    
-    # 1. Intent Status
-    current_intent = board.get_intent()
-    st.info(f"**Current Intent:**\n`{current_intent if current_intent else 'Scanning...'}`")
-    
-    # 2. Doctor Internal State
-    doc_state = board.get_doctor_state()
-    st.write(f"**Doctor State:** `{doc_state}`")
-    
-    # 3. Collected Evidence (Fakta yang dikumpulkan)
-    evidence = board.get_evidence()
-    if evidence:
-        st.write("**Collected Facts (Evidence):**")
-        st.json(evidence)
-    else:
-        st.caption("*No facts collected yet.*")
-        
-    st.divider()
-    
-    # 4. Context Objects (Frame Data)
-    st.write("**Context Frames:**")
-    bean = board.get_context_bean()
-    recipe = st.session_state.get(board.KEY_CONTEXT_RECIPE) # Akses manual jika getter belum ada di code snippet sebelumnya
-    
-    if bean:
-        st.success(f"**Bean:** {bean.name}")
-    if recipe:
-        st.success(f"**Recipe:** {recipe.brew_method}")
-
-    # Tombol Reset untuk Debugging
-    if st.button("🔄 Reset Memory"):
-        board.clear_short_term_memory()
-        st.rerun()
+# Dibungkus fragment: interaksi di sidebar hanya me-rerun bagian ini, bukan seluruh chat.
+def reset_memory():
+    current_board().clear_short_term_memory()
 
-# --- MAIN UI: CHATBOT INTERFACE ---
+@st.fragment(key="monitor")
+def render_blackboard_monitor():
+    board = current_board()
+    with st.sidebar:
+        st.header("🧠 Blackboard Monitor")
+        st.caption("Intip apa yang dipikirkan sistem secara real-time.")
+        
+        # 1. Intent Status
+        current_intent = board.get_intent()
+        st.info(f"**Current Intent:**\n`{current_intent if current_intent else 'Scanning...'}`")
+        
+        # 2. Doctor Internal State
+        doc_state = board.get_doctor_state()
+        st.write(f"**Doctor State:** `{doc_state}`")
+        
+        # 3. Collected Evidence (Fakta yang dikumpulkan) - tertutup secara default
+        evidence = board.get_evidence()
+        if evidence:
+            with st.expander(f"**Collected Facts (Evidence):** {len(evidence)}", expanded=False):
+                st.json(evidence)
+        else:
+            st.caption("*No facts collected yet.*")
+            
+        st.divider()
+        
+        # 4. Context Objects (Frame Data)
+        st.write("**Context Frames:**")
+        bean = board.get_context_bean()
+        recipe = board.get_context_recipe()
+        
+        if bean:
+            st.success(f"**Bean:** {bean.name}")
+        if recipe:
+            st.success(f"**Recipe:** {recipe.brew_method}")
 
-st.title("☕ BaristaBox V2")
-st.caption("Expert System with Blackboard Architecture & Case-Based Reasoning")
+        # Tombol Reset untuk Debugging (callback jalan sebelum fragment ini dirender ulang)
+        st.button("🔄 Reset Memory", on_click=reset_memory)
 
-# 1. Tampilkan History Chat
-for msg in board.get_chat_history():
+def render_message(msg):
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
 
-# 2. Handle Input User
-if prompt := st.chat_input("Apa keluhan atau keinginan Anda hari ini?"):
-    
+# --- MAIN UI: CHATBOT INTERFACE ---
+
+def submit_prompt():
+    """Callback chat input: turn diproses di fragment chat, lalu monitor ikut dirender ulang."""
+    st.session_state['pending_prompt'] = st.session_state['chat_prompt']
+    st.rerun(["chat", "monitor"])
+
+@st.fragment(key="chat")
+def render_chat_turns():
+    """
+    Transkrip sejak run penuh terakhir + turn baru. Rerun fragment hanya menggambar
+    pesan dengan seq > rendered_seq; riwayat lengkap hanya dirender saat run penuh.
+    """
+    board = current_board()
+    for msg in board.get_messages_since(st.session_state['rendered_seq']):
+        render_message(msg)
+
+    prompt = st.session_state.pop('pending_prompt', None)
+    if not prompt:
+        return
+
     # A. Masukkan pesan user ke Blackboard
-    with st.chat_message("user"):
-        st.markdown(prompt)
+    render_message({"role": "user", "content": prompt})
     board.add_user_message(prompt)
+    seen_seq = board.last_message_seq()
 
     # B. THE AGENT CYCLE (Siklus Kerja Agen)
-    with st.chat_message("assistant"):
-        with st.spinner("The Committee is thinking..."):
-            
-            # --- STEP 1: INTENT AGENT (WITH SMART LOCKING) ---
-            
-            # Cek status Dokter
-            doctor_state = board.get_doctor_state()
-            is_doctor_busy = doctor_state != 'INIT' and doctor_state != 'DONE'
-            
-            # Cek status Brewer (BARU)
-            brewer_state = board.get_brewer_state()
-            is_brewer_busy = brewer_state != 'INIT'
-            
-            # Hanya jalankan Intent Classifier jika SEMUA agen sedang menganggur
-            if not is_doctor_busy and not is_brewer_busy:
-                intent_agent.process() 
-            
-            # --- STEP 2: SPECIALIST AGENTS ---
-            
-            # Sommelier (Rekomendasi)
-            sommelier_agent.process()
-            
-            # Brewer (Resep) - Sekarang dia akan jalan jika state='WAIT_METHOD' meskipun intent berubah
-            brewer_agent.process()
-            
-            # Doctor (Diagnosis)
-            doctor_agent.process()
-            
-            # --- STEP 3: UPDATE UI ---
-            # Karena agen menulis langsung ke history blackboard, 
-            # kita perlu mengambil pesan terakhir bot untuk ditampilkan di sesi ini
-            history = board.get_chat_history()
-            if history and history[-1]["role"] == "assistant":
-                # Tampilkan pesan terakhir yang baru saja di-generate
-                # (Streamlit agak tricky di sini, biasanya kita rerun agar loop history di atas yang merender)
-                st.rerun()
-            else:
-                # Fallback jika tidak ada agen yang merespons
-                st.warning("Sistem bingung. Tidak ada agen yang mengambil tugas ini.")
\ No newline at end of file
+    with st.spinner("The Committee is thinking..."):
+        # Orchestrator menjalankan siklus dengan Deadline per turn (TURN_BUDGET_SECONDS)
+        orchestrator.run_cycle(board)
+
+    # C. UPDATE UI: render HANYA pesan baru dari turn ini
+    new_messages = board.get_messages_since(seen_seq)
+    for msg in new_messages:
+        render_message(msg)
+    if not new_messages:
+        # Fallback jika tidak ada agen yang merespons
+        st.warning("Sistem bingung. Tidak ada agen yang mengambil tugas ini.")
+
+st.title("☕ BaristaBox V2")
+st.caption("Expert System with Blackboard Architecture & Case-Based Reasoning")
+
+# 1. Tampilkan History Chat (hanya run penuh / cold load; jendela ring buffer, pesan lama sebagai ringkasan)
+summary = board.get_history_summary()
+if summary:
+    with st.expander("Earlier conversation", expanded=False):
+        st.caption(summary)
+for msg in board.get_chat_history():
+    render_message(msg)
+st.session_state['rendered_seq'] = board.last_message_seq()
+
+# 2. Turn baru: fragment chat (append inkremental) + input user
+render_chat_turns()
+st.chat_input("Apa keluhan atau keinginan Anda hari ini?", key="chat_prompt", on_submit=submit_prompt)
+
+# Sidebar dirender terakhir agar menampilkan state setelah siklus agen turn ini
+render_blackboard_monitor()
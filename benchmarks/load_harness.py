@@ -0,0 +1,271 @@
+"""
+Load & replay harness untuk siklus agen lengkap (Intent -> Sommelier -> Brewer -> Doctor).
+
+Menjalankan N sesi simulasi secara konkuren (satu thread per sesi, turn dalam satu sesi
+berurutan seperti user sungguhan) terhadap satu Orchestrator bersama, dengan LLM palsu
+(LocalBackend) yang latensinya bisa diatur. Laporan: latensi per turn p50/p95/p99,
+throughput, dan waktu per agen.
+
+Contoh:
+  python -m benchmarks.load_harness --sessions 16 --iterations 3 \
+      --llm-latency lognormal:0.05,0.5 --out benchmarks/results/load.json
+
+  # Replay percakapan produksi yang tercatat (SQLite backend / export JSONL)
+  python -m benchmarks.load_harness --replay-sqlite blackboard_sessions.db
+  python -m benchmarks.load_harness --replay-jsonl exported_sessions.jsonl
+
+  # Bandingkan dengan rilis sebelumnya
+  python -m benchmarks.load_harness --baseline benchmarks/results/load_v1.json
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.report import (
+    latency_summary, environment, write_report, load_report, compare_metrics, print_comparison,
+)
+
+DEFAULT_CONVERSATIONS = os.path.join(os.path.dirname(__file__), 'conversations')
+
+
+# --- SUMBER PERCAKAPAN ---
+
+def load_conversation_files(paths):
+    """File/direktori JSON berisi {"name": ..., "turns": ["...", ...]}."""
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, '*.json'))) if os.path.isdir(path) else [path])
+    conversations = []
+    for file_path in files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        conversations.append({'name': data.get('name', os.path.basename(file_path)), 'turns': list(data['turns'])})
+    return conversations
+
+
+def _user_turns(messages):
+    return [m['content'] for m in messages if m.get('role') == 'user']
+
+
+def load_replay_jsonl(path):
+    """
+    Percakapan tercatat, satu per baris: format skrip {"name", "turns"} atau
+    snapshot sesi API (GET /sessions/{id}) yang berisi "messages".
+    """
+    conversations = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for i, line in enumerate(f):
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            turns = data.get('turns') or _user_turns(data.get('messages', []))
+            if turns:
+                conversations.append({'name': data.get('name') or data.get('session_id') or f'replay_{i}', 'turns': turns})
+    return conversations
+
+
+def load_replay_sqlite(path):
+    """Ambil pesan user dari setiap sesi di database SQLiteStateBackend."""
+    from src.core.blackboard import Blackboard
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT session_id, value FROM blackboard_state WHERE key = ?", (Blackboard.KEY_MESSAGES,)
+        ).fetchall()
+    finally:
+        conn.close()
+    conversations = []
+    for session_id, value in rows:
+        turns = _user_turns(pickle.loads(value))
+        if turns:
+            conversations.append({'name': f'sqlite:{session_id}', 'turns': turns})
+    return conversations
+
+
+# --- EKSEKUSI ---
+
+def build_orchestrator(llm_latency, error_rate, seed, turn_budget):
+    """Muat agen sekali (seperti server) dan pasang LocalBackend dengan latensi terkontrol."""
+    from src.core import bootstrap
+    from src.core.llm_service import LLMService
+    from src.core.llm_backends import LocalBackend, LatencyModel
+
+    orchestrator = bootstrap.load_agents()
+    if turn_budget is not None:
+        orchestrator.turn_budget = turn_budget
+    try:
+        llm_latency = float(llm_latency)
+    except ValueError:
+        pass
+    latency = LatencyModel.from_spec(llm_latency)
+    latency._rng.seed(seed)
+    LLMService().use_backend(LocalBackend(latency=latency, error_rate=error_rate, seed=seed))
+    return orchestrator
+
+
+def run_session(orchestrator, store, session_id, conversations, think_time):
+    """Satu user simulasi: jalankan percakapan-percakapannya secara berurutan."""
+    from src.core.blackboard import Blackboard
+    from src.core.state_backends import InMemoryStateBackend
+
+    records = []
+    for conversation in conversations:
+        # Setiap percakapan = sesi baru (state bersih)
+        sid = f"{session_id}-{conversation['name']}-{len(records)}"
+        board = Blackboard(InMemoryStateBackend(sid, store))
+        for turn_index, text in enumerate(conversation['turns']):
+            seen = board.last_message_seq()
+            started = time.perf_counter()
+            board.add_user_message(text)
+            deadline = orchestrator.run_cycle(board)
+            elapsed = time.perf_counter() - started
+            records.append({
+                'conversation': conversation['name'],
+                'turn': turn_index,
+                'latency': elapsed,
+                'agents': dict(deadline.step_timings),
+                'shed': list(deadline.shed_steps),
+                'responded': any(m['role'] == 'assistant' for m in board.get_messages_since(seen + 1)),
+            })
+            if think_time:
+                time.sleep(think_time)
+        store.drop(sid)
+    return records
+
+
+def run_load(orchestrator, conversations, sessions, iterations, think_time=0.0):
+    from src.core.state_backends import MemorySessionStore
+
+    store = MemorySessionStore()
+    # Sesi i memulai dari percakapan ke-i agar beban tercampur
+    plans = []
+    for i in range(sessions):
+        rotated = conversations[i % len(conversations):] + conversations[:i % len(conversations)]
+        plans.append(rotated * iterations)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="sim-session") as pool:
+        futures = [pool.submit(run_session, orchestrator, store, f"s{i}", plan, think_time) for i, plan in enumerate(plans)]
+        records = [record for future in futures for record in future.result()]
+    wall = time.perf_counter() - started
+    return records, wall
+
+
+def summarize(records, wall, meta):
+    agents = {}
+    for record in records:
+        for name, seconds in record['agents'].items():
+            agents.setdefault(name, []).append(seconds)
+    agent_total = sum(sum(v) for v in agents.values()) or 1.0
+
+    by_conversation = {}
+    for record in records:
+        by_conversation.setdefault(record['conversation'], []).append(record['latency'])
+
+    shed = {}
+    for record in records:
+        for step in record['shed']:
+            shed[step] = shed.get(step, 0) + 1
+
+    return {
+        'meta': dict(meta, wall_seconds=round(wall, 3), turns=len(records), **environment()),
+        'turn_latency_ms': latency_summary([r['latency'] for r in records]),
+        'throughput_turns_per_sec': round(len(records) / wall, 3) if wall else 0.0,
+        'agents': {
+            name: dict(latency_summary(values), total_ms=round(sum(values) * 1000.0, 3),
+                       share=round(sum(values) / agent_total, 4))
+            for name, values in sorted(agents.items())
+        },
+        'conversations': {name: latency_summary(values) for name, values in sorted(by_conversation.items())},
+        'shed_steps': shed,
+        'unanswered_turns': sum(1 for r in records if not r['responded']),
+    }
+
+
+def flat_metrics(report):
+    """Metrik yang dibandingkan antar rilis."""
+    metrics = {f"turn_latency_ms.{k}": report['turn_latency_ms'][k] for k in ('p50', 'p95', 'p99')}
+    metrics['throughput_turns_per_sec'] = report['throughput_turns_per_sec']
+    for name, stats in report['agents'].items():
+        metrics[f"agents.{name}.p95"] = stats['p95']
+    return metrics
+
+
+def print_report(report):
+    lat = report['turn_latency_ms']
+    meta = report['meta']
+    print(f"\n=== Load harness: {meta['sessions']} sesi, {meta['turns']} turn, {meta['wall_seconds']}s ===")
+    print(f"Turn latency (ms): p50={lat['p50']}  p95={lat['p95']}  p99={lat['p99']}  max={lat['max']}")
+    print(f"Throughput: {report['throughput_turns_per_sec']} turn/s   unanswered: {report['unanswered_turns']}")
+    print(f"\n{'agent':<12} {'calls':>6} {'p50 ms':>10} {'p95 ms':>10} {'total ms':>12} {'share':>7}")
+    for name, stats in report['agents'].items():
+        print(f"{name:<12} {stats['count']:>6} {stats['p50']:>10.2f} {stats['p95']:>10.2f} "
+              f"{stats['total_ms']:>12.1f} {stats['share']:>7.1%}")
+    if report['shed_steps']:
+        print(f"\nShed: {report['shed_steps']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load/replay harness untuk siklus agen BaristaBox.")
+    parser.add_argument('--conversations', nargs='*', default=[DEFAULT_CONVERSATIONS],
+                        help="File/direktori percakapan skrip (default: benchmarks/conversations).")
+    parser.add_argument('--replay-jsonl', help="Replay percakapan tercatat (JSONL).")
+    parser.add_argument('--replay-sqlite', help="Replay sesi dari database SQLiteStateBackend.")
+    parser.add_argument('--sessions', type=int, default=8, help="Jumlah sesi konkuren.")
+    parser.add_argument('--iterations', type=int, default=1, help="Pengulangan set percakapan per sesi.")
+    parser.add_argument('--think-time', type=float, default=0.0, help="Jeda antar turn per sesi (detik).")
+    parser.add_argument('--llm-latency', default='lognormal:0.05,0.5',
+                        help="Latensi LLM palsu: detik atau 'dist:a,b' (fixed|uniform|normal|lognormal).")
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--turn-budget', type=float, default=None, help="Override TURN_BUDGET_SECONDS.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="Tulis laporan JSON ke path ini.")
+    parser.add_argument('--baseline', help="Laporan JSON rilis sebelumnya untuk dibandingkan.")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Ambang regresi relatif (default 10%%).")
+    parser.add_argument('--verbose', action='store_true', help="Tampilkan log agen.")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        # Log agen (dan peringatan ScriptRunContext Streamlit dari bootstrap) menenggelamkan laporan
+        logging.disable(logging.WARNING)
+
+    if args.replay_jsonl:
+        conversations = load_replay_jsonl(args.replay_jsonl)
+    elif args.replay_sqlite:
+        conversations = load_replay_sqlite(args.replay_sqlite)
+    else:
+        conversations = load_conversation_files(args.conversations)
+    if not conversations:
+        print("Tidak ada percakapan untuk dijalankan.")
+        return 1
+
+    orchestrator = build_orchestrator(args.llm_latency, args.llm_error_rate, args.seed, args.turn_budget)
+    records, wall = run_load(orchestrator, conversations, args.sessions, args.iterations, args.think_time)
+    report = summarize(records, wall, {
+        'sessions': args.sessions, 'iterations': args.iterations, 'conversations': len(conversations),
+        'llm_latency': args.llm_latency, 'llm_error_rate': args.llm_error_rate,
+        'turn_budget': orchestrator.turn_budget,
+    })
+    print_report(report)
+    if args.out:
+        write_report(report, args.out)
+        print(f"\nLaporan ditulis ke {args.out}")
+
+    if args.baseline:
+        rows = compare_metrics(flat_metrics(report), flat_metrics(load_report(args.baseline)), args.threshold,
+                               higher_is_better={'throughput_turns_per_sec'})
+        return 1 if print_comparison(rows, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
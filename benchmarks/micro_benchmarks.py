@@ -0,0 +1,208 @@
+"""
+Micro-benchmark CBREngine dan KnowledgeLoader atas katalog sintetis 10^2 .. 10^6 record.
+
+Setiap ukuran katalog dibuat oleh benchmarks.synthetic_catalog (deterministik per seed),
+lalu tiap fungsi diukur beberapa kali (median & min, milidetik per operasi penuh atas katalog).
+
+Contoh:
+  python -m benchmarks.micro_benchmarks --sizes 100,1000,10000 --out benchmarks/results/micro.json
+  python -m benchmarks.micro_benchmarks --baseline benchmarks/results/micro_v1.json --threshold 0.15
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.report import environment, write_report, load_report, compare_metrics, print_comparison
+from benchmarks.synthetic_catalog import CatalogProfile, write_catalog
+
+DEFAULT_SIZES = '100,1000,10000,100000,1000000'
+
+# Query representatif (bentuk sama dengan output extract_weighted_preferences / parser Brewer)
+TAG_PREFERENCES = [
+    {'fruity': 1.0, 'sweet': 0.6},
+    {'chocolat': 0.9, 'nutty': 0.7, 'bold': 0.5},
+    {'floral': 0.8, 'bright': 0.8, 'tea': 0.4, 'clean': 0.3},
+]
+BEAN_TARGETS = [
+    {'origin': 'Unknown', 'roast_level': 1, 'processing': 'Washed'},
+    {'origin': 'Unknown', 'roast_level': 5, 'processing': 'Natural'},
+    {'origin': 'Indonesia', 'roast_level': 3, 'processing': 'Wet-Hulled'},
+]
+NEIGHBOR_WEIGHTS = {'origin': 0.3, 'roast_level': 0.4, 'processing': 0.3}
+# Batasan keras tipikal Sommelier (diparse FacetIndex, lalu hanya kandidat yang di-score)
+HARD_QUERIES = [
+    "dark roast only, something chocolatey",
+    "no naturals, light roast from Ethiopia",
+    "only washed from Indonesia",
+]
+
+
+def time_operation(fn, repeat, max_seconds):
+    """Jalankan fn hingga `repeat` kali (minimal sekali, berhenti jika total > max_seconds)."""
+    timings = []
+    total = 0.0
+    while len(timings) < repeat and (not timings or total < max_seconds):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed)
+        total += elapsed
+    return timings
+
+
+def build_cases(beans_path, recipes_path, kb_path, size, seed):
+    """{nama benchmark: (fungsi tanpa argumen, jumlah item per operasi)} untuk satu katalog."""
+    from src.core.cbr_engine import CBREngine
+    from src.core.fuzzy_engine import default_engine
+    from src.knowledge.facet_index import FacetIndex
+    from src.knowledge.loader import KnowledgeLoader
+    from src.knowledge.store import KnowledgeStore
+    from src.knowledge.tag_postings import TagPostings
+    from src.knowledge.tag_vocabulary import TagVocabulary
+
+    beans, _ = KnowledgeLoader(beans_path, recipes_path).load_knowledge()
+    cbr = CBREngine()
+    rng = random.Random(seed)
+    temperatures = [rng.uniform(85.0, 100.0) for _ in range(size)]
+
+    def weighted_tag_similarity():
+        for prefs in TAG_PREFERENCES:
+            for bean in beans:
+                cbr.calculate_weighted_tag_similarity(prefs, bean.expert_tags)
+
+    def similar_bean():
+        for target in BEAN_TARGETS:
+            cbr.find_similar_bean(target, beans)
+
+    def nearest_neighbors():
+        for target in BEAN_TARGETS:
+            cbr.find_nearest_neighbors(target, beans, NEIGHBOR_WEIGHTS, top_k=3)
+
+    vocabulary = TagVocabulary(beans)
+
+    def vocabulary_tag_similarity():
+        for prefs in TAG_PREFERENCES:
+            query = vocabulary.compile(prefs)
+            for tag_ids in vocabulary.bean_tags:
+                query.score(tag_ids)
+
+    postings = TagPostings(vocabulary)
+
+    def tag_top_k():
+        for prefs in TAG_PREFERENCES:
+            postings.top_k(vocabulary.compile(prefs), 3)
+
+    facets = FacetIndex(beans)
+    hard_queries = [facets.parse(text) for text in HARD_QUERIES]
+
+    def filtered_tag_similarity():
+        for query, prefs in zip(hard_queries, TAG_PREFERENCES):
+            for bean in facets.select(facets.candidates(query), beans):
+                cbr.calculate_weighted_tag_similarity(prefs, bean.expert_tags)
+
+    def fuzzy_temperature():
+        for temp in temperatures:
+            CBREngine.fuzzy_check_temperature(temp)
+
+    fuzzy = default_engine()
+    brews = {
+        'temperature': temperatures,
+        'brew_time': [rng.uniform(90.0, 300.0) for _ in range(size)],
+        'grind_size': [rng.uniform(300.0, 1100.0) for _ in range(size)],
+        'ratio': [rng.uniform(12.0, 20.0) for _ in range(size)],
+        'dose': [rng.uniform(8.0, 25.0) for _ in range(size)],
+    }
+
+    return {
+        'load_knowledge': (lambda: KnowledgeLoader(beans_path, recipes_path).load_knowledge(), size),
+        'knowledge_store_load': (lambda: KnowledgeStore.load(beans_path, recipes_path, kb_path), size),
+        'calculate_weighted_tag_similarity': (weighted_tag_similarity, size * len(TAG_PREFERENCES)),
+        'tag_vocabulary_build': (lambda: TagVocabulary(beans), size),
+        'vocabulary_tag_similarity': (vocabulary_tag_similarity, size * len(TAG_PREFERENCES)),
+        'tag_postings_build': (lambda: TagPostings(vocabulary), size),
+        'tag_top_k': (tag_top_k, size * len(TAG_PREFERENCES)),
+        'facet_index_build': (lambda: FacetIndex(beans), size),
+        'filtered_tag_similarity': (filtered_tag_similarity, size * len(HARD_QUERIES)),
+        'find_similar_bean': (similar_bean, size * len(BEAN_TARGETS)),
+        'find_nearest_neighbors': (nearest_neighbors, size * len(BEAN_TARGETS)),
+        'fuzzy_check_temperature': (fuzzy_temperature, size),
+        'fuzzy_batch_temperature': (lambda: fuzzy.fuzzify_batch('temperature', temperatures), size),
+        'fuzzy_batch_inference': (lambda: fuzzy.infer_batch(brews), size),
+    }
+
+
+def run_size(size, seed, repeat, max_seconds, only, profile, workdir):
+    directory = os.path.join(workdir, f"n{size}")
+    paths = write_catalog(directory, size, seed, profile)
+    results = {}
+    for name, (fn, items) in build_cases(*paths, size, seed).items():
+        if only and name not in only:
+            continue
+        timings = time_operation(fn, repeat, max_seconds)
+        median = statistics.median(timings)
+        results[name] = {
+            'runs': len(timings),
+            'median_ms': round(median * 1000.0, 4),
+            'min_ms': round(min(timings) * 1000.0, 4),
+            'per_item_us': round(median * 1e6 / items, 4) if items else 0.0,
+        }
+        print(f"{size:>9} {name:<36} {results[name]['median_ms']:>12.3f} ms "
+              f"{results[name]['per_item_us']:>10.3f} us/item  ({len(timings)} run)")
+    return {'catalog_bytes': sum(os.path.getsize(p) for p in paths), 'benchmarks': results}
+
+
+def flat_metrics(report):
+    # min lebih stabil dari median untuk operasi singkat (noise scheduler hanya menambah waktu)
+    return {
+        f"{name}[n={size}].min_ms": stats['min_ms']
+        for size, entry in report['sizes'].items()
+        for name, stats in entry['benchmarks'].items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark CBREngine & KnowledgeLoader.")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f"Ukuran katalog, dipisah koma (default {DEFAULT_SIZES}).")
+    parser.add_argument('--only', default='', help="Hanya benchmark ini (dipisah koma).")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=10.0, help="Batas waktu pengulangan per benchmark.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help="Direktori katalog sintetis (default: direktori sementara).")
+    parser.add_argument('--out', help="Tulis hasil JSON ke path ini.")
+    parser.add_argument('--baseline', help="Hasil JSON sebelumnya untuk dibandingkan.")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Ambang regresi relatif (default 10%%).")
+    args = parser.parse_args(argv)
+
+    # KnowledgeLoader log setiap load; jangan ikut terukur / memenuhi output
+    logging.disable(logging.WARNING)
+
+    sizes = [int(float(s)) for s in args.sizes.split(',') if s]
+    only = {s for s in args.only.split(',') if s}
+    profile = CatalogProfile()
+
+    report = {'meta': dict(environment(), seed=args.seed, repeat=args.repeat), 'sizes': {}}
+    print(f"{'size':>9} {'benchmark':<36} {'median':>15} {'per item':>16}")
+    with tempfile.TemporaryDirectory(prefix="baristabox-bench-") as tmp:
+        for size in sizes:
+            report['sizes'][str(size)] = run_size(size, args.seed, args.repeat, args.max_seconds, only,
+                                                  profile, args.workdir or tmp)
+
+    if args.out:
+        write_report(report, args.out)
+        print(f"\nHasil ditulis ke {args.out}")
+
+    if args.baseline:
+        rows = compare_metrics(flat_metrics(report), flat_metrics(load_report(args.baseline)), args.threshold)
+        return 1 if print_comparison(rows, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
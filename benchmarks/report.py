@@ -0,0 +1,75 @@
+import json
+import math
+import os
+import platform
+import time
+
+
+def percentile(values, pct):
+    """Persentil nearest-rank (pct 0-100) dari list angka; 0.0 untuk list kosong."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(seconds):
+    """Ringkasan latensi dalam milidetik."""
+    ms = [s * 1000.0 for s in seconds]
+    return {
+        'count': len(ms),
+        'mean': round(sum(ms) / len(ms), 3) if ms else 0.0,
+        'p50': round(percentile(ms, 50), 3),
+        'p95': round(percentile(ms, 95), 3),
+        'p99': round(percentile(ms, 99), 3),
+        'max': round(max(ms), 3) if ms else 0.0,
+    }
+
+
+def environment():
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def write_report(report, path):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load_report(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_metrics(current, baseline, threshold, higher_is_better=()):
+    """
+    Bandingkan metrik {nama: nilai} terhadap baseline.
+    Return list baris (nama, baseline, sekarang, perubahan relatif, regresi?).
+    Regresi = lebih buruk dari baseline melebihi `threshold` (mis. 0.10 = 10%).
+    """
+    rows = []
+    for name in sorted(set(current) & set(baseline)):
+        base, cur = baseline[name], current[name]
+        if not base:
+            continue
+        change = (cur - base) / base
+        worse = -change if name in higher_is_better else change
+        rows.append((name, base, cur, change, worse > threshold))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f"\n{'metric':<48} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, base, cur, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{name:<48} {base:>12.3f} {cur:>12.3f} {change:>+8.1%}{flag}")
+    regressions = sum(1 for row in rows if row[4])
+    print(f"\n{regressions} regresi (ambang {threshold:.0%}).")
+    return regressions
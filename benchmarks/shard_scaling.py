@@ -0,0 +1,109 @@
+"""
+Throughput scoring CBR in-process vs sharded (src.core.sharded_cbr) atas katalog sintetis.
+
+Untuk setiap jumlah shard, katalog dibagi ke worker (shared memory), lalu query tag
+similarity dan nearest neighbour dijalankan berulang; hasil setiap query dicek sama
+dengan jalur in-process sebelum diukur.
+
+Contoh:
+  python -m benchmarks.shard_scaling --size 1000000 --shards 1,2,4,8
+  python -m benchmarks.shard_scaling --size 200000 --shards 2,4 --out benchmarks/results/shards.json
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.micro_benchmarks import TAG_PREFERENCES, BEAN_TARGETS, NEIGHBOR_WEIGHTS
+from benchmarks.report import environment, write_report
+from benchmarks.synthetic_catalog import write_catalog
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return {'median_ms': round(statistics.median(timings) * 1000.0, 3), 'min_ms': round(min(timings) * 1000.0, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scoring CBR sharded vs in-process.")
+    parser.add_argument('--size', type=int, default=200000)
+    parser.add_argument('--shards', default='1,2,4', help="Jumlah shard yang diuji, dipisah koma.")
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="Tulis hasil JSON ke path ini.")
+    args = parser.parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    from src.core.cbr_engine import CBREngine
+    from src.core.sharded_cbr import ShardedCatalog
+    from src.knowledge.loader import KnowledgeLoader
+    from src.knowledge.tag_postings import TagPostings
+    from src.knowledge.tag_vocabulary import TagVocabulary
+
+    with tempfile.TemporaryDirectory(prefix="baristabox-shards-") as tmp:
+        beans_path, recipes_path, _ = write_catalog(tmp, args.size, args.seed)
+        beans, _ = KnowledgeLoader(beans_path, recipes_path).load_knowledge()
+    vocabulary = TagVocabulary(beans)
+    postings = TagPostings(vocabulary)
+    cbr = CBREngine()
+    k = args.top_k
+
+    def in_process_tags():
+        return [postings.scan(vocabulary.compile(prefs), k) for prefs in TAG_PREFERENCES]
+
+    def in_process_neighbors():
+        return [cbr.find_nearest_neighbors(target, beans, NEIGHBOR_WEIGHTS, k) for target in BEAN_TARGETS]
+
+    report = {'meta': dict(environment(), size=args.size, top_k=k), 'results': {
+        'in_process': {'tags': measure(in_process_tags, args.repeat),
+                       'neighbors': measure(in_process_neighbors, args.repeat)},
+    }}
+    expected_tags = [[(score, beans[i]) for score, i in top] for top in in_process_tags()]
+    expected_neighbors = in_process_neighbors()
+
+    for count in [int(s) for s in args.shards.split(',') if s]:
+        started = time.perf_counter()
+        catalog = ShardedCatalog(beans, shards=count, vocabulary=vocabulary)
+        try:
+            def sharded_tags():
+                return [catalog.top_tag_matches(prefs, k) for prefs in TAG_PREFERENCES]
+
+            def sharded_neighbors():
+                return [catalog.find_nearest_neighbors(target, NEIGHBOR_WEIGHTS, k) for target in BEAN_TARGETS]
+
+            # Query pertama juga menunggu worker selesai start
+            assert sharded_tags() == expected_tags, "Hasil tag sharded berbeda dari in-process"
+            assert sharded_neighbors() == expected_neighbors, "Hasil nearest neighbour sharded berbeda"
+            setup_ms = round((time.perf_counter() - started) * 1000.0, 3)
+            report['results'][f'shards={count}'] = {
+                'setup_ms': setup_ms,
+                'tags': measure(sharded_tags, args.repeat),
+                'neighbors': measure(sharded_neighbors, args.repeat),
+            }
+        finally:
+            catalog.close()
+
+    print(f"{args.size} bean, {len(TAG_PREFERENCES)} query tag + {len(BEAN_TARGETS)} query NN, top-{k}")
+    print(f"{'mode':<14} {'tags ms':>10} {'nn ms':>10} {'setup ms':>10}")
+    for mode, entry in report['results'].items():
+        print(f"{mode:<14} {entry['tags']['median_ms']:>10.1f} {entry['neighbors']['median_ms']:>10.1f} "
+              f"{entry.get('setup_ms', 0.0):>10.1f}")
+
+    if args.out:
+        write_report(report, args.out)
+        print(f"\nHasil ditulis ke {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+"""
+Profil cold start di proses Python baru: waktu import per modul/paket, wall & CPU time serta
+RSS per fase inisialisasi (lihat src.utils.profiling), lalu opsional dibandingkan ke baseline.
+
+Contoh:
+  python -m benchmarks.startup_profile --out benchmarks/results/startup.json
+  python -m benchmarks.startup_profile --repeat 3 --baseline benchmarks/results/startup_v1.json
+  python -m benchmarks.startup_profile --diff startup_v1.json startup_v2.json --threshold 0.2
+
+Report yang sama juga ditulis oleh app/server dengan STARTUP_PROFILE=<path.json>.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.report import write_report, load_report, compare_metrics, print_comparison
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Paket yang biasanya mendominasi boot; selalu muncul di tabel walau kecil
+KEY_PACKAGES = ('streamlit', 'torch', 'transformers', 'sklearn', 'src')
+
+
+def profile_boot(path, with_streamlit=True):
+    """Dijalankan di proses anak: import + load_agents di bawah profiler, report ke `path`."""
+    import logging
+    from src.utils import profiling
+
+    profiler = profiling.start(path)
+    logging.disable(logging.WARNING)
+    if with_streamlit:
+        with profiler.phase('import.streamlit'):
+            import streamlit  # noqa: F401
+    with profiler.phase('import.bootstrap'):
+        from src.core import bootstrap
+    # load_agents menutup profiler dan menulis report
+    bootstrap.load_agents()
+
+
+def run_child(with_streamlit=True):
+    """Satu cold start di interpreter baru (cache import/halaman Python tidak terbawa)."""
+    with tempfile.TemporaryDirectory(prefix="baristabox-startup-") as tmp:
+        path = os.path.join(tmp, 'profile.json')
+        command = [sys.executable, '-m', 'benchmarks.startup_profile', '--child', path]
+        if not with_streamlit:
+            command.append('--no-streamlit')
+        env = dict(os.environ, WARMUP_ENABLED=os.environ.get("WARMUP_ENABLED", "1"))
+        env.pop("STARTUP_PROFILE", None)
+        subprocess.run(command, cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+        return load_report(path)
+
+
+def best_of(reports):
+    """Gabungkan beberapa run: ambil nilai minimum per metrik (paling sedikit noise)."""
+    best = {}
+    for report in reports:
+        for name, value in flat_metrics(report).items():
+            best[name] = min(value, best.get(name, value))
+    return best
+
+
+def flat_metrics(report):
+    """{nama: nilai} untuk perbandingan: ms untuk waktu, MB untuk RSS."""
+    metrics = {
+        'total.wall_ms': report['total']['wall_s'] * 1000.0,
+        'total.cpu_ms': report['total']['cpu_s'] * 1000.0,
+        'total.import_ms': report['imports']['total_s'] * 1000.0,
+    }
+    if report['total'].get('rss_mb') is not None:
+        metrics['total.rss_mb'] = report['total']['rss_mb']
+    for name, phase in report['phases'].items():
+        metrics[f'phase.{name}.wall_ms'] = phase['wall_s'] * 1000.0
+        metrics[f'phase.{name}.cpu_ms'] = phase['cpu_s'] * 1000.0
+        if phase.get('rss_mb') is not None:
+            metrics[f'phase.{name}.rss_mb'] = phase['rss_mb']
+    for package, seconds in report['imports']['packages'].items():
+        metrics[f'import.{package}.ms'] = seconds * 1000.0
+    return metrics
+
+
+def print_report(report, top=15):
+    total = report['total']
+    print(f"Cold start {total['wall_s'] * 1000:.0f} ms wall, {total['cpu_s'] * 1000:.0f} ms CPU, "
+          f"RSS {total['rss_mb']} MB, {report['imports']['count']} modul di-import.")
+    print(f"\n{'phase':<24} {'start ms':>9} {'wall ms':>9} {'cpu ms':>9} {'rss MB':>9}")
+    for name, phase in report['phases'].items():
+        print(f"{name:<24} {phase['start_s'] * 1000:>9.1f} {phase['wall_s'] * 1000:>9.1f} "
+              f"{phase['cpu_s'] * 1000:>9.1f} {phase['rss_mb'] if phase['rss_mb'] is not None else '-':>9}")
+
+    packages = report['imports']['packages']
+    shown = list(packages)[:top] + [p for p in KEY_PACKAGES if p in packages and p not in list(packages)[:top]]
+    print(f"\n{'package (self time)':<36} {'ms':>9}")
+    for name in shown:
+        print(f"{name:<36} {packages[name] * 1000:>9.1f}")
+
+    print(f"\n{'module (cumulative)':<48} {'self ms':>9} {'cum ms':>9}")
+    for entry in report['imports']['modules'][:top]:
+        print(f"{entry['module']:<48} {entry['self_s'] * 1000:>9.1f} {entry['cumulative_s'] * 1000:>9.1f}")
+
+
+def compare(current, baseline, threshold, min_ms):
+    # Metrik sangat kecil didominasi noise penjadwal/disk; hanya bandingkan yang >= min_ms
+    baseline = {name: value for name, value in baseline.items() if name.endswith('_mb') or value >= min_ms}
+    rows = compare_metrics(current, baseline, threshold)
+    return print_comparison(rows, threshold)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profil startup BaristaBox (import, fase init, RSS).")
+    parser.add_argument('--repeat', type=int, default=1, help="Jumlah cold start (nilai minimum dipakai untuk diff).")
+    parser.add_argument('--no-streamlit', action='store_true', help="Jangan ukur import streamlit (mode headless).")
+    parser.add_argument('--out', help="Tulis report JSON (run pertama + best-of metrik) ke path ini.")
+    parser.add_argument('--baseline', help="Report sebelumnya untuk dibandingkan.")
+    parser.add_argument('--diff', nargs=2, metavar=('BASELINE', 'CURRENT'), help="Bandingkan dua report tanpa profiling.")
+    parser.add_argument('--threshold', type=float, default=0.20, help="Ambang regresi relatif (default 20%%).")
+    parser.add_argument('--min-ms', type=float, default=5.0, help="Abaikan metrik waktu baseline di bawah ini (default 5 ms).")
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        profile_boot(args.child, with_streamlit=not args.no_streamlit)
+        return 0
+
+    if args.diff:
+        baseline, current = (load_report(path) for path in args.diff)
+        return 1 if compare(_metrics_of(current), _metrics_of(baseline), args.threshold, args.min_ms) else 0
+
+    reports = [run_child(with_streamlit=not args.no_streamlit) for _ in range(max(1, args.repeat))]
+    report = dict(reports[0], best=best_of(reports), runs=len(reports))
+    print_report(report, top=args.top)
+
+    if args.out:
+        write_report(report, args.out)
+        print(f"\nHasil ditulis ke {args.out}")
+
+    if args.baseline:
+        return 1 if compare(report['best'], _metrics_of(load_report(args.baseline)), args.threshold, args.min_ms) else 0
+    return 0
+
+
+def _metrics_of(report):
+    # Report CLI menyimpan best-of beberapa run; report dari STARTUP_PROFILE hanya satu run
+    return report.get('best') or flat_metrics(report)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
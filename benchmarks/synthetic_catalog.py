@@ -0,0 +1,182 @@
+"""
+Generator katalog sintetis (beans, resep, troubleshooting KB) untuk benchmark.
+
+Distribusi origin, tag, roast level, processing, metode seduh, dsb. diambil dari dataset
+asli di datasets/ (frekuensi empiris), ditambah ekor panjang (origin/tag baru dengan
+distribusi Zipf) supaya kosakata tumbuh bersama ukuran katalog seperti data sungguhan.
+Deterministik untuk seed yang sama.
+
+Contoh:
+  python -m benchmarks.synthetic_catalog --size 100000 --out /tmp/catalog_1e5
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+from collections import Counter
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.knowledge.store import BEANS_PATH, RECIPES_PATH, TROUBLESHOOTING_PATH
+
+# Peluang satu slot tag / origin diambil dari ekor panjang (bukan kosakata asli)
+TAIL_TAG_RATE = 0.05
+TAIL_ORIGIN_RATE = 0.02
+
+
+def _distribution(values):
+    counts = Counter(values)
+    return list(counts.keys()), list(counts.values())
+
+
+def _zipf_cdf(size, exponent=1.1):
+    weights = [1.0 / (rank ** exponent) for rank in range(1, size + 1)]
+    return list(itertools.accumulate(weights))
+
+
+class CatalogProfile:
+    """Distribusi empiris dari dataset asli."""
+
+    def __init__(self, beans_path=BEANS_PATH, recipes_path=RECIPES_PATH, kb_path=TROUBLESHOOTING_PATH):
+        with open(beans_path, 'r', encoding='utf-8') as f:
+            beans = json.load(f)
+        with open(recipes_path, 'r', encoding='utf-8') as f:
+            recipes = json.load(f)
+        with open(kb_path, 'r', encoding='utf-8') as f:
+            self.kb = json.load(f)
+
+        self.origin = _distribution(b['origin'] for b in beans)
+        self.type = _distribution(b.get('type', 'Arabica') for b in beans)
+        self.roast_level = _distribution(b['roast_level'] for b in beans)
+        self.processing = _distribution(b['processing'] for b in beans)
+        self.tag = _distribution(t for b in beans for t in b['expert_tags'])
+        self.tags_per_bean = _distribution(len(b['expert_tags']) for b in beans)
+        self.tasting_notes = [b['tasting_notes'] for b in beans]
+
+        recipes_per_bean = Counter(r['bean_id'] for r in recipes)
+        self.recipes_per_bean = _distribution(recipes_per_bean[b['id']] for b in beans)
+        self.recipe_template = _distribution(
+            (r['brew_method'], r['grind_size'], r['coffee_grams'], r['water_grams'], r['water_temp_c'])
+            for r in recipes
+        )
+        self.technique_notes = [r['technique_notes'] for r in recipes]
+        self.causes = [cause for problem in self.kb.values() for cause in problem['causes'].values()]
+        self.causes_per_problem = _distribution(len(problem['causes']) for problem in self.kb.values())
+
+
+class CatalogGenerator:
+    def __init__(self, profile=None, seed=0):
+        self.profile = profile or CatalogProfile()
+        self.rng = random.Random(seed)
+
+    def _pick(self, distribution, k=1):
+        values, weights = distribution
+        return self.rng.choices(values, weights=weights, k=k)
+
+    def _tail(self, prefix, cdf):
+        rank = self.rng.choices(range(1, len(cdf) + 1), cum_weights=cdf)[0]
+        return f"{prefix} {rank}"
+
+    def beans(self, n):
+        p = self.profile
+        # Ekor panjang tumbuh ~ sqrt(n): katalog besar punya lebih banyak tag/origin langka
+        tag_cdf = _zipf_cdf(max(10, int(n ** 0.5)))
+        origin_cdf = _zipf_cdf(max(5, int(n ** 0.5) // 4))
+
+        origins = self._pick(p.origin, n)
+        types = self._pick(p.type, n)
+        roasts = self._pick(p.roast_level, n)
+        processes = self._pick(p.processing, n)
+        tag_counts = self._pick(p.tags_per_bean, n)
+
+        beans = []
+        for i in range(n):
+            origin = origins[i]
+            if self.rng.random() < TAIL_ORIGIN_RATE:
+                origin = self._tail("Origin", origin_cdf)
+            tags = []
+            for tag in self._pick(p.tag, tag_counts[i]):
+                if self.rng.random() < TAIL_TAG_RATE:
+                    tag = self._tail("Note", tag_cdf)
+                if tag not in tags:
+                    tags.append(tag)
+            beans.append({
+                'id': f"sb_{i:07d}",
+                'name': f"{origin} Lot {i}",
+                'origin': origin,
+                'type': types[i],
+                'roast_level': roasts[i],
+                'processing': processes[i],
+                'tasting_notes': self.rng.choice(p.tasting_notes),
+                'expert_tags': tags,
+            })
+        return beans
+
+    def recipes(self, beans):
+        p = self.profile
+        counts = self._pick(p.recipes_per_bean, len(beans))
+        recipes = []
+        for bean, count in zip(beans, counts):
+            for method, grind, coffee, water, temp in self._pick(p.recipe_template, count):
+                recipes.append({
+                    'recipe_id': f"sr_{len(recipes):07d}",
+                    'bean_id': bean['id'],
+                    'brew_method': method,
+                    'grind_size': grind,
+                    'coffee_grams': coffee,
+                    'water_grams': water,
+                    'water_temp_c': temp,
+                    'technique_notes': self.rng.choice(p.technique_notes),
+                })
+        return recipes
+
+    def troubleshooting(self, n_causes):
+        """KB dengan ~n_causes penyebab total; problem asli dipertahankan di depan."""
+        p = self.profile
+        kb = {}
+        total = 0
+        real = list(p.kb.items())
+        index = 0
+        while total < n_causes:
+            name, template = real[index % len(real)]
+            key = name if index < len(real) else f"{name}_{index}"
+            count = min(self._pick(p.causes_per_problem)[0], n_causes - total)
+            causes = {f"cause_{j}": dict(self.rng.choice(p.causes)) for j in range(count)}
+            kb[key] = {'description': template['description'], 'causes': causes}
+            total += count
+            index += 1
+        return kb
+
+    def catalog(self, n):
+        beans = self.beans(n)
+        return beans, self.recipes(beans), self.troubleshooting(n)
+
+
+def write_catalog(directory, n, seed=0, profile=None):
+    """Tulis katalog ukuran n ke `directory`. Return (beans_path, recipes_path, kb_path)."""
+    os.makedirs(directory, exist_ok=True)
+    beans, recipes, kb = CatalogGenerator(profile, seed).catalog(n)
+    paths = tuple(os.path.join(directory, name) for name in
+                  ('coffee_beans.json', 'brew_recipes.json', 'troubleshooting_knowledge_base.json'))
+    for path, data in zip(paths, (beans, recipes, kb)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate katalog sintetis BaristaBox.")
+    parser.add_argument('--size', type=int, required=True, help="Jumlah bean (dan ~penyebab KB).")
+    parser.add_argument('--out', required=True, help="Direktori output.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for path in write_catalog(args.out, args.size, args.seed):
+        print(f"{path} ({os.path.getsize(path)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,22 @@
+"""
+Entry point headless (tanpa Streamlit): API JSON + Server-Sent Events.
+
+Jalankan:
+    uvicorn server:app --host 0.0.0.0 --port 8000
+atau:
+    python server.py
+
+Profil cold start: STARTUP_PROFILE=startup_profile.json python server.py
+"""
+import os
+from src.utils import profiling
+profiling.start_from_env()  # sebelum import berat agar waktu import per modul ikut terukur
+from src.api.asgi_app import BaristaBoxAPI
+from src.core import bootstrap
+
+# Agen dimuat saat lifespan startup agar proses worker siap sebelum menerima trafik
+app = BaristaBoxAPI(orchestrator_factory=bootstrap.load_agents)
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.environ.get("API_HOST", "127.0.0.1"), port=int(os.environ.get("API_PORT", 8000)))
@@ -1,16 +1,66 @@
 from src.core.blackboard import Blackboard
+from src.core.deadline import Deadline
 from src.core.llm_service import LLMService
 from src.utils.logger import setup_logger
 
 class BaseAgent:
+    # --- SUBSCRIPTION (dibaca oleh AgentScheduler) ---
+    # Key Blackboard yang memicu agen ini. None = bereaksi pada setiap perubahan.
+    WATCHES = None
+    # Nama agen yang harus dievaluasi lebih dulu dalam satu pass.
+    DEPENDS_ON = ()
+
     def __init__(self, name):
         self.name = name
         self.logger = setup_logger(f"Agent-{name}")
-        self.blackboard = Blackboard() # Mengakses shared memory
+        self.blackboard = Blackboard() # Mengakses shared memory (backend dari BLACKBOARD_BACKEND)
         self.llm = LLMService()        # Mengakses kemampuan bahasa
 
+    @property
+    def blackboard(self):
+        """
+        Blackboard sesi yang diikat Orchestrator untuk turn ini (agen dipakai bersama
+        oleh banyak sesi), atau Blackboard default milik agen jika tidak ada ikatan.
+        """
+        return Blackboard.bound() or self._blackboard
+
+    @blackboard.setter
+    def blackboard(self, board):
+        self._blackboard = board
+
+    @property
+    def deadline(self):
+        """Deadline turn yang sedang berjalan (None jika agen dipanggil di luar Orchestrator)."""
+        return Deadline.current()
+
+    def _has_budget(self, step, cost_seconds):
+        """
+        Cek Deadline turn sebelum langkah lokal yang mahal (forward pass model, scan CBR),
+        sama seperti jalur LLM: jika sisa anggaran kurang, langkah dicatat sebagai shed
+        dan pemanggil memakai jalur murahnya.
+        """
+        deadline = self.deadline
+        if deadline is not None and not deadline.allows(cost_seconds):
+            deadline.shed(step)
+            return False
+        return True
+
     def process(self):
         """
         Logika utama agen. Harus di-override oleh anak kelas.
         """
-        raise NotImplementedError("Setiap agen harus punya method process() sendiri.")
\ No newline at end of file
+        raise NotImplementedError("Setiap agen harus punya method process() sendiri.")
+
+    def warm_up(self):
+        """
+        Dipanggil sekali saat startup (src.core.warmup) sebelum replika menerima trafik.
+        Override untuk memicu inisialisasi malas (forward pass pertama, indeks, cache).
+        """
+        return None
+
+    def should_activate(self, board):
+        """
+        Predikat aktivasi yang murah (tanpa model/LLM). Dipanggil scheduler sebelum
+        process(); override untuk membatasi kapan agen perlu bangun.
+        """
+        return True
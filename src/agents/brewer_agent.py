@@ -1,17 +1,43 @@
 from src.agents.base_agent import BaseAgent
-from src.knowledge.loader import KnowledgeLoader
+from src.knowledge.store import KnowledgeStore
+from src.knowledge.sop_store import SOPStore, build_sop_prompt, is_synthetic, SOP_CONTEXT
 from src.core.cbr_engine import CBREngine
+from src.core import sharded_cbr
+from src.core.blackboard import Blackboard
+from src.core.state_machine import StateMachine, TurnContext
 import random
 
 class BrewerAgent(BaseAgent):
-    def __init__(self):
+    WATCHES = (Blackboard.KEY_LAST_INPUT, Blackboard.KEY_INTENT, Blackboard.KEY_CONTEXT_BEAN, Blackboard.KEY_BREWER_STATE)
+    DEPENDS_ON = ('Intent', 'Sommelier')  # Sommelier bisa menyerahkan bean ke Brewer di turn yang sama
+
+    def __init__(self, knowledge=None, sop_store=None):
         super().__init__("Brewer")
-        # Load Knowledge Base
-        self.loader = KnowledgeLoader('datasets/coffee_beans.json', 'datasets/brew_recipes.json')
-        self.beans, self.recipes = self.loader.load_knowledge()
+        # Knowledge Base bersama (dimuat sekali per proses)
+        self.knowledge = knowledge or KnowledgeStore.default()
+        self.beans, self.recipes = self.knowledge.beans, self.knowledge.recipes
         
-        # Inisialisasi mesin CBR untuk pencarian kemiripan
-        self.cbr = CBREngine()
+        # Inisialisasi mesin CBR untuk pencarian kemiripan (sharded jika CBR_SHARDS >= 2)
+        self.cbr = CBREngine(shards=sharded_cbr.for_store(self.knowledge))
+
+        # SOP resep hasil pra-komputasi (lihat: python -m src.knowledge.sop_store)
+        self.sop_store = sop_store or SOPStore()
+
+        # Lookup pra-komputasi: resep per bean (urutan dataset dipertahankan)
+        self.recipes_by_bean = {}
+        for recipe in self.recipes:
+            self.recipes_by_bean.setdefault(recipe.bean_id, []).append(recipe)
+
+        # Semua state Brewer menunggu input user; INIT juga titik istirahat setelah resep disajikan
+        self.fsm = StateMachine("Brewer", {
+            'INIT': (self._on_init, ('WAIT_METHOD_SELECTION', 'CBR_GATHER_ATTRS')),
+            'WAIT_METHOD_SELECTION': (self._on_method_selection, ('INIT',)),
+            'CBR_GATHER_ATTRS': (self._on_gather_attrs, ('INIT',)),
+        }, wait_states=('INIT', 'WAIT_METHOD_SELECTION', 'CBR_GATHER_ATTRS'))
+
+    def should_activate(self, board):
+        # Sedang menunggu jawaban (locking) atau baru saja diminta resep
+        return board.get_brewer_state() != 'INIT' or board.get_intent() == 'master_brewer'
 
     def process(self):
         # 1. Cek State & Intent
@@ -24,154 +50,163 @@ class BrewerAgent(BaseAgent):
                 return
 
         user_input = self.blackboard.get_last_user_input().lower()
-        self.logger.info(f"Brewer processing in state: {state}")
+        self.logger.info("Brewer processing in state: %s", state)
 
         # --- STATE MACHINE ---
+        final_state = self.fsm.run(state, TurnContext(self.blackboard, user_input))
+        if final_state != state:
+            self.blackboard.set_brewer_state(final_state)
 
-        if state == 'INIT':
-            # Tahap 1: Identifikasi Bean dari Input
-            found_bean = None
-            
-            # Cek string match di input user
-            for bean in self.beans:
-                if bean.name.lower() in user_input:
-                    found_bean = bean
-                    break
-            
-            # Jika tidak ada di input, cek apakah sudah ada context sebelumnya
-            if not found_bean:
-                found_bean = self.blackboard.get_context_bean()
-
-            if found_bean:
-                # KASUS A: Bean Dikenal (Ada di Database)
-                self.blackboard.set_context_bean(found_bean)
-                
-                # Cari resep yang tersedia untuk bean ini
-                available_recipes = [r for r in self.recipes if r.bean_id == found_bean.id]
-                
-                if not available_recipes:
-                    self.blackboard.add_bot_message(f"Database confirmed: I know **{found_bean.name}**, but I have 0 recipes recorded for it yet.")
-                    return
-
-                # Cek apakah user sudah menyebutkan metode?
-                found_method = self._extract_method(user_input)
-                
-                if found_method:
-                    # User minta metode spesifik (misal: "V60 recipe for Ethiopia")
-                    target_recipe = next((r for r in available_recipes if r.brew_method.lower() == found_method), None)
-                    if target_recipe:
-                        self._present_recipe(target_recipe, found_bean)
-                    else:
-                        available_methods = ", ".join([r.brew_method for r in available_recipes])
-                        self.blackboard.add_bot_message(
-                            f"**{found_bean.name}** found. No recipe for {found_method.title()}.\n"
-                            f"Available recipes: **{available_methods}**. Pick one?"
-                        )
-                        self.blackboard.set_brewer_state('WAIT_METHOD_SELECTION')
-                else:
-                    # User TIDAK minta metode spesifik.
-                    # LOGIKA PROAKTIF:
-                    available_methods = [r.brew_method for r in available_recipes]
-                    
-                    if len(available_methods) == 1:
-                        # Cuma ada 1 resep? Langsung kasih! Jangan banyak tanya.
-                        self.blackboard.add_bot_message(f"Found **{found_bean.name}**. Only one expert recipe available. Here it is:")
-                        self._present_recipe(available_recipes[0], found_bean)
-                    else:
-                        # Ada banyak? Tawarkan.
-                        options_str = ", ".join(available_methods)
-                        self.blackboard.add_bot_message(
-                            f"**{found_bean.name}** identified. I have recipes for: **{options_str}**.\n\n"
-                            "Which one do you want? (Or say 'Recommend' if unsure)."
-                        )
-                        self.blackboard.set_brewer_state('WAIT_METHOD_SELECTION')
-
-            else:
-                # KASUS B: Bean Tidak Dikenal -> Masuk ke Mode CBR
-                self.blackboard.add_bot_message(
-                    "Unknown coffee bean detected. Initializing **Case-Based Reasoning** protocol.\n\n"
-                    "To generate an adapted recipe, I need attributes:\n"
-                    "**What is the Roast Level (Light/Medium/Dark) and Process (Washed/Natural)?**"
-                )
-                self.blackboard.set_brewer_state('CBR_GATHER_ATTRS')
+    # --- STATE HANDLERS (return state berikutnya, atau None untuk tetap) ---
 
-        elif state == 'WAIT_METHOD_SELECTION':
-            # Menunggu user memilih metode dari daftar yang kita tawarkan
+    def _on_init(self, turn):
+        user_input = turn.user_input
+        # Tahap 1: Identifikasi Bean dari Input
+        found_bean = None
+        
+        # Cek string match di input user
+        for bean in self.beans:
+            if bean.name.lower() in user_input:
+                found_bean = bean
+                break
+        
+        # Jika tidak ada di input, cek apakah sudah ada context sebelumnya
+        if not found_bean:
             found_bean = self.blackboard.get_context_bean()
-            available_recipes = [r for r in self.recipes if r.bean_id == found_bean.id]
+
+        if found_bean:
+            # KASUS A: Bean Dikenal (Ada di Database)
+            self.blackboard.set_context_bean(found_bean)
             
+            # Cari resep yang tersedia untuk bean ini
+            available_recipes = self.recipes_by_bean.get(found_bean.id, [])
+            
+            if not available_recipes:
+                self.blackboard.add_bot_message(f"Database confirmed: I know **{found_bean.name}**, but I have 0 recipes recorded for it yet.")
+                return None
+
+            # Cek apakah user sudah menyebutkan metode?
             found_method = self._extract_method(user_input)
             
             if found_method:
+                # User minta metode spesifik (misal: "V60 recipe for Ethiopia")
                 target_recipe = next((r for r in available_recipes if r.brew_method.lower() == found_method), None)
                 if target_recipe:
                     self._present_recipe(target_recipe, found_bean)
-                    self.blackboard.set_brewer_state('INIT')
-                    return
-
-            # HANDLING "I DON'T KNOW" (Smart Fallback)
-            # Cek certainty/keyword
-            if "know" in user_input.lower() or "recommend" in user_input.lower() or "sure" in user_input.lower():
-                # Pilihkan metode terbaik (Prioritas: V60 -> French Press)
-                priority_order = ['v60', 'french press', 'aeropress', 'chemex']
-                chosen_recipe = None
-                
-                for method in priority_order:
-                    chosen_recipe = next((r for r in available_recipes if r.brew_method.lower() == method), None)
-                    if chosen_recipe: break
-                
-                if not chosen_recipe:
-                    chosen_recipe = available_recipes[0] # Fallback terakhir
-
-                self.blackboard.add_bot_message(f"Auto-selection: **{chosen_recipe.brew_method}** (Best match for this bean).")
-                self._present_recipe(chosen_recipe, found_bean)
-                self.blackboard.set_brewer_state('INIT')
+                else:
+                    available_methods = ", ".join([r.brew_method for r in available_recipes])
+                    self.blackboard.add_bot_message(
+                        f"**{found_bean.name}** found. No recipe for {found_method.title()}.\n"
+                        f"Available recipes: **{available_methods}**. Pick one?"
+                    )
+                    return 'WAIT_METHOD_SELECTION'
             else:
-                self.blackboard.add_bot_message("Invalid selection. Please choose from the available list or ask for a recommendation.")
+                # User TIDAK minta metode spesifik.
+                # LOGIKA PROAKTIF:
+                available_methods = [r.brew_method for r in available_recipes]
+                
+                if len(available_methods) == 1:
+                    # Cuma ada 1 resep? Langsung kasih! Jangan banyak tanya.
+                    self.blackboard.add_bot_message(f"Found **{found_bean.name}**. Only one expert recipe available. Here it is:")
+                    self._present_recipe(available_recipes[0], found_bean)
+                else:
+                    # Ada banyak? Tawarkan.
+                    options_str = ", ".join(available_methods)
+                    self.blackboard.add_bot_message(
+                        f"**{found_bean.name}** identified. I have recipes for: **{options_str}**.\n\n"
+                        "Which one do you want? (Or say 'Recommend' if unsure)."
+                    )
+                    return 'WAIT_METHOD_SELECTION'
+
+        else:
+            # KASUS B: Bean Tidak Dikenal -> Masuk ke Mode CBR
+            self.blackboard.add_bot_message(
+                "Unknown coffee bean detected. Initializing **Case-Based Reasoning** protocol.\n\n"
+                "To generate an adapted recipe, I need attributes:\n"
+                "**What is the Roast Level (Light/Medium/Dark) and Process (Washed/Natural)?**"
+            )
+            return 'CBR_GATHER_ATTRS'
+        return None
 
-        elif state == 'CBR_GATHER_ATTRS':
-            # Logika CBR: Mencari Bean Mirip (Nearest Neighbor)
-            
-            # 1. Parsing Heuristik Sederhana (Mengubah teks user jadi fitur)
-            roast_level = 3 # Default Medium
-            if "light" in user_input: roast_level = 1
-            if "dark" in user_input: roast_level = 5
+    def _on_method_selection(self, turn):
+        user_input = turn.user_input
+        # Menunggu user memilih metode dari daftar yang kita tawarkan
+        found_bean = self.blackboard.get_context_bean()
+        available_recipes = self.recipes_by_bean.get(found_bean.id, [])
+        
+        found_method = self._extract_method(user_input)
+        
+        if found_method:
+            target_recipe = next((r for r in available_recipes if r.brew_method.lower() == found_method), None)
+            if target_recipe:
+                self._present_recipe(target_recipe, found_bean)
+                return 'INIT'
+
+        # HANDLING "I DON'T KNOW" (Smart Fallback)
+        # Cek certainty/keyword
+        if "know" in user_input.lower() or "recommend" in user_input.lower() or "sure" in user_input.lower():
+            # Pilihkan metode terbaik (Prioritas: V60 -> French Press)
+            priority_order = ['v60', 'french press', 'aeropress', 'chemex']
+            chosen_recipe = None
             
-            process = "Washed" # Default
-            if "natural" in user_input: process = "Natural"
-            if "honey" in user_input: process = "Honey"
-            if "wet" in user_input: process = "Wet-Hulled"
-
-            # 2. Cari Nearest Neighbor
-            target_features = {
-                'origin': 'Unknown', 
-                'roast_level': roast_level,
-                'processing': process
-            }
+            for method in priority_order:
+                chosen_recipe = next((r for r in available_recipes if r.brew_method.lower() == method), None)
+                if chosen_recipe: break
             
-            similar_bean, score = self.cbr.find_similar_bean(target_features, self.beans)
+            if not chosen_recipe:
+                chosen_recipe = available_recipes[0] # Fallback terakhir
+
+            self.blackboard.add_bot_message(f"Auto-selection: **{chosen_recipe.brew_method}** (Best match for this bean).")
+            self._present_recipe(chosen_recipe, found_bean)
+            return 'INIT'
+
+        self.blackboard.add_bot_message("Invalid selection. Please choose from the available list or ask for a recommendation.")
+        return None
+
+    def _on_gather_attrs(self, turn):
+        user_input = turn.user_input
+        # Logika CBR: Mencari Bean Mirip (Nearest Neighbor)
+        
+        # 1. Parsing Heuristik Sederhana (Mengubah teks user jadi fitur)
+        roast_level = 3 # Default Medium
+        if "light" in user_input: roast_level = 1
+        if "dark" in user_input: roast_level = 5
+        
+        process = "Washed" # Default
+        if "natural" in user_input: process = "Natural"
+        if "honey" in user_input: process = "Honey"
+        if "wet" in user_input: process = "Wet-Hulled"
+
+        # 2. Cari Nearest Neighbor
+        target_features = {
+            'origin': 'Unknown', 
+            'roast_level': roast_level,
+            'processing': process
+        }
+        
+        similar_bean, score = self.cbr.find_similar_bean(target_features, self.beans)
+        
+        if similar_bean:
+            # 3. Adaptasi Resep (Reuse)
+            # Cari resep dari bean mirip itu
+            proxy_recipes = self.recipes_by_bean.get(similar_bean.id, [])
             
-            if similar_bean:
-                # 3. Adaptasi Resep (Reuse)
-                # Cari resep dari bean mirip itu
-                proxy_recipes = [r for r in self.recipes if r.bean_id == similar_bean.id]
+            if proxy_recipes:
+                chosen_recipe = proxy_recipes[0] # Ambil yang pertama
                 
-                if proxy_recipes:
-                    chosen_recipe = proxy_recipes[0] # Ambil yang pertama
-                    
-                    self.blackboard.add_bot_message(
-                        f"**CBR Analysis Result:**\n"
-                        f"- Input Profile: Roast Lv {roast_level}, {process}\n"
-                        f"- Nearest Neighbor Found: **{similar_bean.name}** (Similarity: {int(score*100)}%)\n"
-                        f"- Adaptation: Using recipe for {similar_bean.name} as reference.\n"
-                    )
-                    self._present_recipe(chosen_recipe, similar_bean)
-                else:
-                    self.blackboard.add_bot_message("Found a similar bean profile, but it has no recipes stored.")
+                self.blackboard.add_bot_message(
+                    f"**CBR Analysis Result:**\n"
+                    f"- Input Profile: Roast Lv {roast_level}, {process}\n"
+                    f"- Nearest Neighbor Found: **{similar_bean.name}** (Similarity: {int(score*100)}%)\n"
+                    f"- Adaptation: Using recipe for {similar_bean.name} as reference.\n"
+                )
+                self._present_recipe(chosen_recipe, similar_bean)
             else:
-                self.blackboard.add_bot_message("Database insufficient. No similar beans found for analogy.")
-            
-            self.blackboard.set_brewer_state('INIT')
+                self.blackboard.add_bot_message("Found a similar bean profile, but it has no recipes stored.")
+        else:
+            self.blackboard.add_bot_message("Database insufficient. No similar beans found for analogy.")
+        
+        return 'INIT'
 
     def _extract_method(self, text):
         """Helper sederhana untuk ekstrak metode."""
@@ -184,33 +219,26 @@ class BrewerAgent(BaseAgent):
     def _present_recipe(self, recipe, bean):
         """
         Menampilkan resep dengan format STRICT & TECHNICAL (No Yapping).
+        SOP diambil dari SOPStore (pra-komputasi); LLM hanya dipanggil jika resep berubah.
         """
         self.blackboard.set_context_recipe(recipe)
-        
-        # Susun data mentah
-        core_data = (
-            f"TARGET BEAN: {bean.name}\n"
-            f"METHOD: {recipe.brew_method}\n"
-            f"RATIO: {recipe.coffee_grams}g Coffee to {recipe.water_grams}ml Water\n"
-            f"TEMP: {recipe.water_temp_c}°C\n"
-            f"GRIND: {recipe.grind_size}\n"
-            f"TECHNIQUE: {recipe.technique_notes}\n"
-        )
 
-        # Prompt Anti-Hallucination & Anti-Fluff
-        prompt = f"""
-        TASK: Convert the RAW DATA below into a Technical Brewing Standard Operating Procedure (SOP).
-        
-        CONSTRAINTS:
-        1. NO conversational filler (e.g., "Here is your recipe", "Enjoy").
-        2. NO introductory or concluding paragraphs. Start directly with the parameters.
-        3. Use a Table or Bullet points for parameters.
-        4. Steps must be numbered, imperative, and extremely concise (under 10 words per step if possible).
-        5. DO NOT invent information not present in the RAW DATA.
-        
-        RAW DATA:
-        {core_data}
-        """
-        
-        response = self.llm.generate_response(prompt, context="You are a Technical Manual Generator.")
-        self.blackboard.add_bot_message(response)
\ No newline at end of file
+        response = self.sop_store.get(recipe, bean.name)
+        if response is not None:
+            self.logger.info("SOP cache hit: %s", recipe.recipe_id)
+            self.blackboard.add_bot_message(response)
+            return
+
+        fallback = recipe.to_sop_text(bean.name)
+        response = self.llm.generate_response(
+            build_sop_prompt(recipe, bean.name),
+            context=SOP_CONTEXT,
+            fallback=fallback,
+            step="brewer.sop",
+        )
+        if response != fallback:
+            # Simpan hasil LLM agar request berikutnya instan.
+            # Output backend deterministik (LocalBackend) hanya disimpan di memori.
+            persist = not is_synthetic(self.llm)
+            self.sop_store.put(recipe, bean.name, response, persist=persist)
+        self.blackboard.add_bot_message(response)
@@ -1,266 +1,316 @@
 from src.agents.base_agent import BaseAgent
-from src.knowledge.loader import KnowledgeLoader
-from src.core.cbr_engine import CBREngine
-import json
+from src.knowledge.store import KnowledgeStore
+from src.core.fuzzy_engine import default_engine
+from src.core.blackboard import Blackboard
+from src.core.state_machine import StateMachine, TurnContext
+from src.core.question_planner import QuestionPlanner
 import re
 
+TIME_PATTERN = re.compile(r'(\d+:\d+)')
+
 class DoctorAgent(BaseAgent):
-    def __init__(self):
+    WATCHES = (Blackboard.KEY_LAST_INPUT, Blackboard.KEY_INTENT, Blackboard.KEY_DOCTOR_STATE)
+    DEPENDS_ON = ('Intent',)
+
+    def __init__(self, knowledge=None, planner=None):
         super().__init__("Doctor")
         
-        # Load Knowledge Base
-        self.loader = KnowledgeLoader('datasets/coffee_beans.json', 'datasets/brew_recipes.json')
-        self.beans, self.recipes = self.loader.load_knowledge()
-        
-        with open('datasets/troubleshooting_knowledge_base.json', 'r') as f:
-            self.kb_rules = json.load(f)
+        # Knowledge Base bersama (dimuat sekali per proses, juga dipakai Blackboard untuk resolve id)
+        self.knowledge = knowledge or KnowledgeStore.default()
+        self.beans, self.recipes = self.knowledge.beans, self.knowledge.recipes
+        self.kb_rules = self.knowledge.kb_rules
+
+        # Urutan pertanyaan & berhenti dini berbasis statistik hasil diagnosis
+        self.planner = planner or QuestionPlanner()
+
+        # Inferensi fuzzy (membership + rule base) untuk jawaban numerik
+        self.fuzzy = default_engine()
+        self.fuzzy_causes = self.fuzzy.conclusions_for('temperature')
+
+        # Lookup pra-komputasi untuk handler state
+        self.bean_names = [(bean.name.lower(), bean) for bean in self.beans]
+        self.recipes_by_bean = {}
+        for recipe in self.recipes:
+            self.recipes_by_bean.setdefault(recipe.bean_id, []).append(recipe)
+
+        # Tabel transisi dikompilasi sekali: STATE -> (handler, state tujuan yang sah)
+        self.fsm = StateMachine("Doctor", {
+            'INIT': (self._on_init, ('ASK_BEAN',)),
+            'ASK_BEAN': (self._on_ask_bean, ('WAIT_BEAN_RESPONSE',)),
+            'WAIT_BEAN_RESPONSE': (self._on_bean_response, ('WAIT_METHOD_RESPONSE',)),
+            'WAIT_METHOD_RESPONSE': (self._on_method_response, ('DIAGNOSING',)),
+            'DIAGNOSING': (self._on_diagnosing, ('WAIT_DIAGNOSIS_RESPONSE', 'SYNTHESIZE_RESULTS')),
+            'WAIT_DIAGNOSIS_RESPONSE': (self._on_diagnosis_response, ('DIAGNOSING',)),
+            'SYNTHESIZE_RESULTS': (self._on_synthesize, ('DONE',)),
+        },
+            wait_states=('WAIT_BEAN_RESPONSE', 'WAIT_METHOD_RESPONSE', 'WAIT_DIAGNOSIS_RESPONSE'),
+            terminal_states=('DONE',),
+        )
 
     def _find_ideal_recipe(self, bean_name, brew_method):
         """Helper: Mencari resep ideal berdasarkan input user."""
         if not bean_name or not brew_method:
             return None
             
-        # Cari Bean ID
-        found_bean_id = None
-        for bean in self.beans:
-            if bean.name.lower() in bean_name.lower():
-                found_bean_id = bean.id
-                # Update Context Bean di Blackboard
-                self.blackboard.set_context_bean(bean)
-                break
-        
-        if not found_bean_id:
+        # Cari Bean (nama lowercase sudah dihitung sekali di __init__)
+        bean_name = bean_name.lower()
+        found_bean = next((bean for name, bean in self.bean_names if name in bean_name), None)
+        if not found_bean:
             return None
+        # Update Context Bean di Blackboard
+        self.blackboard.set_context_bean(found_bean)
 
-        # Cari Resep
-        for recipe in self.recipes:
-            if recipe.bean_id == found_bean_id and recipe.brew_method.lower() in brew_method.lower():
+        # Cari Resep (hanya resep milik bean ini)
+        brew_method = brew_method.lower()
+        for recipe in self.recipes_by_bean.get(found_bean.id, []):
+            if recipe.brew_method.lower() in brew_method:
                 # Update Context Recipe di Blackboard
                 self.blackboard.set_context_recipe(recipe)
                 return recipe
         return None
 
+    def should_activate(self, board):
+        return board.get_intent() == 'doctor'
+
     def process(self):
         current_intent = self.blackboard.get_intent()
         if current_intent != 'doctor':
             return 
 
         state = self.blackboard.get_doctor_state()
-        user_input = self.blackboard.get_last_user_input()
+        self.logger.info("Processing in State: %s", state)
+
+        # --- STATE MACHINE (iteratif, berhenti di state yang menunggu jawaban user) ---
+        turn = TurnContext(self.blackboard, self.blackboard.get_last_user_input())
+        final_state = self.fsm.run(state, turn)
+        if final_state != state:
+            self.blackboard.set_doctor_state(final_state)
+
+    # --- STATE HANDLERS (return state berikutnya, atau None untuk tetap) ---
+
+    def _on_init(self, turn):
+        evidence = self.blackboard.get_evidence()
+        initial_problem = evidence.get('initial_problem_classification')
+        
+        if not initial_problem:
+            self.blackboard.add_bot_message("I detected a brewing issue, but could you describe the taste in more detail?")
+            return None
+
+        if initial_problem not in self.kb_rules:
+            self.blackboard.add_bot_message("I'm sorry, I don't have specific data for this problem yet.")
+            return None
+
+        causes = self.kb_rules[initial_problem]['causes']
+        queue = self.planner.plan(initial_problem, causes)
+        self.blackboard.set_diagnosis_queue(queue, problem_key=initial_problem)
+        # Diagnosis baru menanyakan ulang penyebab ini: jawaban dari diagnosis sebelumnya tidak berlaku
+        self.blackboard.discard_evidence(
+            [f"{prefix}{cause}" for cause in causes for prefix in ('confirmed_cause_', 'rejected_cause_')]
+        )
+        
+        # Simpan problem key untuk dipakai di sintesis
+        self.blackboard.update_evidence('current_problem_key', initial_problem)
+        return 'ASK_BEAN'
+
+    def _problem_causes(self, evidence):
+        """Penyebab di KB untuk problem diagnosis saat ini (evidence sesi juga memuat problem lain)."""
+        return self.kb_rules.get(evidence.get('current_problem_key'), {}).get('causes', {})
+
+    def _on_ask_bean(self, turn):
+        self.blackboard.add_bot_message("To diagnose this accurately, I need context. Which **coffee bean** are you using?")
+        return 'WAIT_BEAN_RESPONSE'
+
+    def _on_bean_response(self, turn):
+        self.blackboard.update_evidence('user_bean_name', turn.user_input)
+        self.blackboard.add_bot_message(f"Okay, {turn.user_input}. What **brew method** are you using? (If you aren't sure, just say 'I don't know').")
+        return 'WAIT_METHOD_RESPONSE'
+
+    def _on_method_response(self, turn):
+        user_input = turn.user_input
+        # Handle "I don't know"
+        tipe_jawaban, _ = self.llm.interpret_certainty(user_input, "User is stating their brew method")
+        
+        final_method = user_input
+        if tipe_jawaban == 'UNSURE' or "know" in user_input.lower():
+            final_method = "V60 (Assumed)"
+            self.blackboard.add_bot_message("No problem! Let's assume you are doing a standard **Pour Over (like V60)** for now, as that's very common.")
+        
+        self.blackboard.update_evidence('user_brew_method', final_method)
+        
+        # Cari Resep Ideal & Update Context di Blackboard
+        bean_name = self.blackboard.get_evidence().get('user_bean_name')
+        self._find_ideal_recipe(bean_name, final_method)
+        return 'DIAGNOSING'
+
+    def _on_diagnosing(self, turn):
+        # Reset current item dari iterasi sebelumnya
+        self.blackboard.set_current_diagnosis_item(None)
+
+        # BERHENTI DINI: bukti yang terkumpul sudah cukup yakin (kombinasi CF MYCIN)
+        evidence = self.blackboard.get_evidence()
+        if self.planner.should_stop(evidence, self._problem_causes(evidence)):
+            skipped = len(self.blackboard.get_diagnosis_queue())
+            if skipped:
+                self.logger.info("Confidence threshold reached, skipping %d remaining question(s).", skipped)
+                self.blackboard.set_diagnosis_queue([])
+            return 'SYNTHESIZE_RESULTS'
         
-        self.logger.info(f"Processing in State: {state}")
+        # Ambil item berikutnya dari antrian
+        current_item = self.blackboard.pop_diagnosis_queue()
+        
+        # JIKA ANTRIAN HABIS -> Masuk tahap KESIMPULAN
+        if not current_item:
+            return 'SYNTHESIZE_RESULTS'
+
+        # JIKA ADA PERTANYAAN -> Tanyakan
+        cause_key, cause_data = current_item
+        question = self._contextual_question(cause_key, cause_data['question'], self.blackboard.get_context_recipe())
+        self.blackboard.add_bot_message(question)
+        return 'WAIT_DIAGNOSIS_RESPONSE'
+
+    def _contextual_question(self, cause_key, question, ideal_recipe):
+        """Logika Pertanyaan Kontekstual Berbasis Resep."""
+        if not ideal_recipe:
+            return question
+
+        if cause_key == 'grind_coarse' or cause_key == 'grind_fine':
+            return f"For this bean, the ideal grind is **{ideal_recipe.grind_size}**. \n\nDoes your grind look **significantly coarser/chunkier** than that?"
+        if 'brew_time' in cause_key:
+            time_target = "2:30 - 3:00"
+            match = TIME_PATTERN.search(ideal_recipe.technique_notes)
+            if match:
+                time_target = match.group(1)
+            
+            if 'short' in cause_key:
+                return f"The target brew time should be around **{time_target}**. \n\nDid your water drain **much faster** than that?"
+            return f"The target brew time should be around **{time_target}**. \n\nDid your brew take **much longer** than that?"
+        if 'water_temp' in cause_key:
+            temp_target = ideal_recipe.water_temp_c
+            if 'low' in cause_key:
+                return f"Recommended temp is **{temp_target}°C**. \n\nDo you think your water might have been **too cool** (e.g. waited too long after boiling)?"
+            return f"Recommended temp is **{temp_target}°C**. \n\nDid you use boiling water straight away?"
+        return question
 
-        # --- STATE MACHINE ---
+    def _on_diagnosis_response(self, turn):
+        user_input = turn.user_input
+        current_item = self.blackboard.get_current_diagnosis_item()
+        cause_key, cause_data = current_item
+        question_context = cause_data['question']
 
-        if state == 'INIT':
-            evidence = self.blackboard.get_evidence()
-            initial_problem = evidence.get('initial_problem_classification')
+        # --- 1. FUZZY LOGIC CHECK (Cek Angka) ---
+        tipe_jawaban = None
+        cf = 0.0
+        
+        # Hanya jalankan Fuzzy jika penyebab bisa disimpulkan dari suhu (rule base FuzzyEngine)
+        if cause_key in self.fuzzy_causes:
+            user_temp = self.llm.extract_numerical_value(user_input, "temperature")
             
-            if not initial_problem:
-                self.blackboard.add_bot_message("I detected a brewing issue, but could you describe the taste in more detail?")
-                return
-
-            if initial_problem in self.kb_rules:
-                causes = self.kb_rules[initial_problem]['causes']
-                queue = list(causes.items()) 
-                self.blackboard.set_diagnosis_queue(queue)
+            if user_temp:
+                # Jalankan Kalkulasi Fuzzy
+                fuzzy_result = self.fuzzy.fuzzify('temperature', user_temp)
+                labels = self.fuzzy.variables['temperature']['labels']
                 
-                # Simpan problem key untuk dipakai di sintesis
-                self.blackboard.update_evidence('current_problem_key', initial_problem)
+                # Tampilkan kalkulasi "di balik layar" ke Blackboard
+                msg = f"🌡️ **Fuzzy Logic Analysis (Temp: {user_temp}°C):**\n"
+                for term, degree in fuzzy_result.items():
+                    msg += f"- {labels[term]} Membership: {degree:.2f}\n"
+                self.blackboard.add_bot_message(msg)
                 
-                self.blackboard.set_doctor_state('ASK_BEAN')
-                self.process() 
-            else:
-                self.blackboard.add_bot_message("I'm sorry, I don't have specific data for this problem yet.")
-
-        elif state == 'ASK_BEAN':
-            self.blackboard.add_bot_message("To diagnose this accurately, I need context. Which **coffee bean** are you using?")
-            self.blackboard.set_doctor_state('WAIT_BEAN_RESPONSE')
-
-        elif state == 'WAIT_BEAN_RESPONSE':
-            self.blackboard.update_evidence('user_bean_name', user_input)
-            self.blackboard.add_bot_message(f"Okay, {user_input}. What **brew method** are you using? (If you aren't sure, just say 'I don't know').")
-            self.blackboard.set_doctor_state('WAIT_METHOD_RESPONSE')
-
-        elif state == 'WAIT_METHOD_RESPONSE':
-            # Handle "I don't know"
-            tipe_jawaban, _ = self.llm.interpret_certainty(user_input, "User is stating their brew method")
-            
-            final_method = user_input
-            if tipe_jawaban == 'UNSURE' or "know" in user_input.lower():
-                final_method = "V60 (Assumed)"
-                self.blackboard.add_bot_message("No problem! Let's assume you are doing a standard **Pour Over (like V60)** for now, as that's very common.")
-            
-            self.blackboard.update_evidence('user_brew_method', final_method)
-            
-            # Cari Resep Ideal & Update Context di Blackboard
-            evidence = self.blackboard.get_evidence()
-            bean_name = evidence.get('user_bean_name')
-            self._find_ideal_recipe(bean_name, final_method)
-            
-            self.blackboard.set_doctor_state('DIAGNOSING')
-            self.process() 
+                # Tentukan Jawaban berdasarkan CF hasil rule base (aturan suhu: CF = membership)
+                fuzzy_cf = self.fuzzy.infer({'temperature': user_temp}).get(cause_key, 0.0)
+                if fuzzy_cf > 0.5:
+                    tipe_jawaban = 'YES'
+                    cf = fuzzy_cf
+                else:
+                    tipe_jawaban = 'NO'
+                    cf = 1.0 # Sangat yakin bukan penyebab ini
 
-        elif state == 'DIAGNOSING':
-            # Reset current item dari iterasi sebelumnya
-            self.blackboard.set_current_diagnosis_item(None)
-            
-            # Ambil item berikutnya dari antrian
-            current_item = self.blackboard.pop_diagnosis_queue()
-            
-            # JIKA ANTRIAN HABIS -> Masuk tahap KESIMPULAN
-            if not current_item:
-                self.blackboard.set_doctor_state('SYNTHESIZE_RESULTS')
-                self.process() 
-                return
+        # --- 2. STANDARD LLM CHECK (Jika Fuzzy tidak jalan/tidak ada angka) ---
+        if tipe_jawaban is None:
+            tipe_jawaban, cf = self.llm.interpret_certainty(user_input, question_context)
+        
+        self.logger.info("User Answer Analysis: %s (CF=%s)", tipe_jawaban, cf)
 
-            # JIKA ADA PERTANYAAN -> Tanyakan
-            cause_key, cause_data = current_item
-            question = cause_data['question']
+        # --- 3. SIMPAN BUKTI ---
+        if tipe_jawaban == 'YES' and cf > 0.5:
+            self.blackboard.update_evidence(f"confirmed_cause_{cause_key}", cf)
+        else:
+            self.blackboard.update_evidence(f"rejected_cause_{cause_key}", 1.0)
+        
+        # --- 4. LOOPING (Pindah ke Pertanyaan Berikutnya) ---
+        return 'DIAGNOSING'
 
-            # Logika Pertanyaan Kontekstual Berbasis Resep
-            ideal_recipe = self.blackboard.get_context_recipe()
+    def _on_synthesize(self, turn):
+        # Ambil bukti yang terkumpul untuk penyebab problem ini saja
+        evidence = self.blackboard.get_evidence()
+        problem_key = evidence.get('current_problem_key')
+        causes = self._problem_causes(evidence)
+        confirmed_causes = [f'confirmed_cause_{c}' for c in causes if f'confirmed_cause_{c}' in evidence]
 
-            if ideal_recipe:
-                if cause_key == 'grind_coarse' or cause_key == 'grind_fine':
-                    question = f"For this bean, the ideal grind is **{ideal_recipe.grind_size}**. \n\nDoes your grind look **significantly coarser/chunkier** than that?"
-                elif 'brew_time' in cause_key:
-                    time_target = "2:30 - 3:00"
-                    match = re.search(r'(\d+:\d+)', ideal_recipe.technique_notes)
-                    if match:
-                        time_target = match.group(1)
-                    
-                    if 'short' in cause_key:
-                        question = f"The target brew time should be around **{time_target}**. \n\nDid your water drain **much faster** than that?"
-                    else:
-                        question = f"The target brew time should be around **{time_target}**. \n\nDid your brew take **much longer** than that?"
-                elif 'water_temp' in cause_key:
-                    temp_target = ideal_recipe.water_temp_c
-                    if 'low' in cause_key:
-                        question = f"Recommended temp is **{temp_target}°C**. \n\nDo you think your water might have been **too cool** (e.g. waited too long after boiling)?"
-                    else:
-                        question = f"Recommended temp is **{temp_target}°C**. \n\nDid you use boiling water straight away?"
-
-            self.blackboard.add_bot_message(question)
-            self.blackboard.set_doctor_state('WAIT_DIAGNOSIS_RESPONSE')
-
-        elif state == 'WAIT_DIAGNOSIS_RESPONSE':
-            current_item = self.blackboard.get_current_diagnosis_item()
-            cause_key, cause_data = current_item
-            question_context = cause_data['question']
-
-            # --- 1. FUZZY LOGIC CHECK (Cek Angka) ---
-            tipe_jawaban = None
-            cf = 0.0
+        # Catat hasil untuk prior QuestionPlanner berikutnya
+        if problem_key:
+            asked = [c for c in causes if f'confirmed_cause_{c}' in evidence or f'rejected_cause_{c}' in evidence]
+            confirmed = [k.replace('confirmed_cause_', '') for k in confirmed_causes]
+            self.planner.record_outcome(problem_key, asked, confirmed)
+        
+        if not confirmed_causes:
+            self.blackboard.add_bot_message("Diagnosis complete. I've checked the most common factors, but none were confirmed. This suggests the issue might be related to the coffee bean quality itself (stale/roast defect) rather than your technique.")
+        
+        elif len(confirmed_causes) == 1:
+            # KASUS TUNGGAL
+            cause_key = confirmed_causes[0].replace('confirmed_cause_', '')
             
-            # Hanya jalankan Fuzzy jika pertanyaan tentang suhu
-            if 'water_temp' in cause_key:
-                user_temp = self.llm.extract_numerical_value(user_input, "temperature")
+            solution_text = "Adjust parameters."
+            if problem_key and problem_key in self.kb_rules:
+                if cause_key in self.kb_rules[problem_key]['causes']:
+                    solution_text = self.kb_rules[problem_key]['causes'][cause_key]['solution']
+
+            # Format Output
+            context_str = "Role: Technical Coffee Technician. Tone: Direct, Concise."
+            ideal_recipe = self.blackboard.get_context_recipe()
+            if ideal_recipe:
+                context_str += f" Reference Recipe: Grind {ideal_recipe.grind_size}, Temp {ideal_recipe.water_temp_c}C."
+
+            final_response = self.llm.generate_response(
+                prompt=f"""
+                SINGLE ROOT CAUSE FOUND: {cause_key}.
+                STANDARD FIX: "{solution_text}"
                 
-                if user_temp:
-                    # Jalankan Kalkulasi Fuzzy
-                    fuzzy_result = CBREngine.fuzzy_check_temperature(user_temp)
-                    
-                    # Tampilkan kalkulasi "di balik layar" ke Blackboard
-                    msg = f"🌡️ **Fuzzy Logic Analysis (Temp: {user_temp}°C):**\n"
-                    msg += f"- Low/Cold Membership: {fuzzy_result['LOW']:.2f}\n"
-                    msg += f"- Ideal Membership: {fuzzy_result['IDEAL']:.2f}\n"
-                    msg += f"- High/Hot Membership: {fuzzy_result['HIGH']:.2f}\n"
-                    self.blackboard.add_bot_message(msg)
-                    
-                    # Tentukan Jawaban berdasarkan Fuzzy Score
-                    if 'low' in cause_key:
-                        if fuzzy_result['LOW'] > 0.5:
-                            tipe_jawaban = 'YES'
-                            cf = fuzzy_result['LOW']
-                        else:
-                            tipe_jawaban = 'NO'
-                            cf = 1.0 # Sangat yakin bukan low
-                            
-                    elif 'high' in cause_key:
-                        if fuzzy_result['HIGH'] > 0.5:
-                            tipe_jawaban = 'YES'
-                            cf = fuzzy_result['HIGH']
-                        else:
-                            tipe_jawaban = 'NO'
-                            cf = 1.0
-
-            # --- 2. STANDARD LLM CHECK (Jika Fuzzy tidak jalan/tidak ada angka) ---
-            if tipe_jawaban is None:
-                tipe_jawaban, cf = self.llm.interpret_certainty(user_input, question_context)
+                TASK: Provide specific instructions to fix this. Bullet points. Under 50 words.
+                """,
+                context=context_str,
+                fallback=f"- {solution_text}",
+                step="doctor.synthesis"
+            )
+            self.blackboard.add_bot_message(f"**DIAGNOSIS COMPLETE**\n\nIdentified Issue: **{cause_key.replace('_', ' ').title()}**\n\n{final_response}")
+        
+        else:
+            # KASUS MULTI-FAKTOR
+            cause_keys = [k.replace('confirmed_cause_', '') for k in confirmed_causes]
             
-            self.logger.info(f"User Answer Analysis: {tipe_jawaban} (CF={cf})")
+            solutions_context = ""
+            if problem_key and problem_key in self.kb_rules:
+                for ck in cause_keys:
+                    if ck in self.kb_rules[problem_key]['causes']:
+                        sol = self.kb_rules[problem_key]['causes'][ck]['solution']
+                        solutions_context += f"- {ck}: {sol}\n"
 
-            # --- 3. SIMPAN BUKTI ---
-            if tipe_jawaban == 'YES' and cf > 0.5:
-                self.blackboard.update_evidence(f"confirmed_cause_{cause_key}", cf)
-            else:
-                self.blackboard.update_evidence(f"rejected_cause_{cause_key}", 1.0)
-            
-            # --- 4. LOOPING (Pindah ke Pertanyaan Berikutnya) ---
-            self.blackboard.set_doctor_state('DIAGNOSING')
-            self.process() 
-
-        elif state == 'SYNTHESIZE_RESULTS':
-            # Ambil semua bukti yang terkumpul
-            evidence = self.blackboard.get_evidence()
-            confirmed_causes = [k for k, v in evidence.items() if k.startswith('confirmed_cause_')]
-            problem_key = evidence.get('current_problem_key')
-            
-            if not confirmed_causes:
-                self.blackboard.add_bot_message("Diagnosis complete. I've checked the most common factors, but none were confirmed. This suggests the issue might be related to the coffee bean quality itself (stale/roast defect) rather than your technique.")
-            
-            elif len(confirmed_causes) == 1:
-                # KASUS TUNGGAL
-                cause_key = confirmed_causes[0].replace('confirmed_cause_', '')
+            final_response = self.llm.generate_response(
+                prompt=f"""
+                COMPLEX DIAGNOSIS. Multiple issues detected: {', '.join(cause_keys)}.
                 
-                solution_text = "Adjust parameters."
-                if problem_key and problem_key in self.kb_rules:
-                    if cause_key in self.kb_rules[problem_key]['causes']:
-                        solution_text = self.kb_rules[problem_key]['causes'][cause_key]['solution']
-
-                # Format Output
-                context_str = "Role: Technical Coffee Technician. Tone: Direct, Concise."
-                ideal_recipe = self.blackboard.get_context_recipe()
-                if ideal_recipe:
-                    context_str += f" Reference Recipe: Grind {ideal_recipe.grind_size}, Temp {ideal_recipe.water_temp_c}C."
-
-                final_response = self.llm.generate_response(
-                    prompt=f"""
-                    SINGLE ROOT CAUSE FOUND: {cause_key}.
-                    STANDARD FIX: "{solution_text}"
-                    
-                    TASK: Provide specific instructions to fix this. Bullet points. Under 50 words.
-                    """,
-                    context=context_str
-                )
-                self.blackboard.add_bot_message(f"**DIAGNOSIS COMPLETE**\n\nIdentified Issue: **{cause_key.replace('_', ' ').title()}**\n\n{final_response}")
-            
-            else:
-                # KASUS MULTI-FAKTOR
-                cause_keys = [k.replace('confirmed_cause_', '') for k in confirmed_causes]
+                Reference Solutions:
+                {solutions_context}
                 
-                solutions_context = ""
-                if problem_key and problem_key in self.kb_rules:
-                    for ck in cause_keys:
-                        if ck in self.kb_rules[problem_key]['causes']:
-                            sol = self.kb_rules[problem_key]['causes'][ck]['solution']
-                            solutions_context += f"- {ck}: {sol}\n"
-
-                final_response = self.llm.generate_response(
-                    prompt=f"""
-                    COMPLEX DIAGNOSIS. Multiple issues detected: {', '.join(cause_keys)}.
-                    
-                    Reference Solutions:
-                    {solutions_context}
-                    
-                    TASK: Create a prioritized recovery plan.
-                    1. List the detected issues.
-                    2. Identify which ONE to fix FIRST (the most critical one).
-                    3. Provide concise actions. No fluff.
-                    """,
-                    context="Role: Senior Head Barista. Tone: Analytical & Directive."
-                )
-                self.blackboard.add_bot_message(f"**COMPLEX DIAGNOSIS: MULTIPLE FACTORS DETECTED**\n\n{final_response}")
-            
-            self.blackboard.set_doctor_state('DONE')
\ No newline at end of file
+                TASK: Create a prioritized recovery plan.
+                1. List the detected issues.
+                2. Identify which ONE to fix FIRST (the most critical one).
+                3. Provide concise actions. No fluff.
+                """,
+                context="Role: Senior Head Barista. Tone: Analytical & Directive.",
+                fallback=f"Detected issues (fix in this order):\n{solutions_context}",
+                step="doctor.synthesis"
+            )
+            self.blackboard.add_bot_message(f"**COMPLEX DIAGNOSIS: MULTIPLE FACTORS DETECTED**\n\n{final_response}")
+        
+        return 'DONE'
@@ -2,22 +2,53 @@ import torch
 import pickle
 import os
 import json
+import time
 from transformers import DistilBertTokenizer, DistilBertForSequenceClassification
 from src.agents.base_agent import BaseAgent
+from src.core.blackboard import Blackboard
+from src.utils import metrics, tracing
+
+INFERENCE_SECONDS = metrics.histogram(
+    "baristabox_intent_inference_seconds", "Durasi tokenisasi + forward pass DistilBERT.", ("model",),
+)
+
+# Folder model hasil training (tokenizer, bobot, label_encoder.pkl)
+INTENT_MODEL_PATH = os.path.join("models", "main_intent_classifier_pytorch")
+PROBLEM_MODEL_PATH = os.path.join("models", "doctor_problem_classifier_pytorch")
+
+# Estimasi biaya (detik) satu forward pass problem classifier; di bawah sisa ini langkahnya di-shed
+PROBLEM_MIN_BUDGET = float(os.environ.get("INTENT_PROBLEM_MIN_BUDGET", 0.25))
+
+# Panjang sekuens (token) yang dipakai warm-up: pesan pendek hingga batas truncation _predict
+WARMUP_SEQUENCE_LENGTHS = (8, 16, 32, 64)
+WARMUP_SAMPLES = (
+    "recommend me a fruity coffee",
+    "my espresso tastes sour and weak, what should I change?",
+)
 
 class IntentAgent(BaseAgent):
-    def __init__(self):
+    WATCHES = (Blackboard.KEY_LAST_INPUT,)
+
+    def __init__(self, intent_classifier=None, problem_classifier=None, bean_names=None):
+        """
+        `intent_classifier` / `problem_classifier`: tuple (tokenizer, model, label_encoder)
+        hasil load_classifier() yang sudah dimuat di luar (mis. paralel oleh bootstrap).
+        `bean_names`: daftar nama bean (huruf kecil). Yang tidak diberikan dimuat di sini.
+        """
         super().__init__("Intent")
         
         # Konfigurasi Path Model
         self.base_model_path = "models" 
-        self.intent_path = os.path.join(self.base_model_path, "main_intent_classifier_pytorch")
-        self.problem_path = os.path.join(self.base_model_path, "doctor_problem_classifier_pytorch")
+        self.intent_path = INTENT_MODEL_PATH
+        self.problem_path = PROBLEM_MODEL_PATH
         
         self.models_loaded = False
-        self._load_models()
+        self._load_models(intent_classifier, problem_classifier)
 
         # --- Load Daftar Nama Bean untuk Rule-Based Matching ---
+        if bean_names is not None:
+            self.known_bean_names = list(bean_names)
+            return
         # Load JSON mentah saja agar cepat (tidak perlu Frame object yang berat)
         try:
             with open('datasets/coffee_beans.json', 'r', encoding='utf-8') as f:
@@ -28,29 +59,71 @@ class IntentAgent(BaseAgent):
             self.logger.error(f"Gagal memuat nama bean: {e}")
             self.known_bean_names = []
 
-    def _load_models(self):
+    @staticmethod
+    def load_classifier(path):
+        """Muat satu classifier dari folder model: (tokenizer, model, label_encoder). Raise jika gagal."""
+        tokenizer = DistilBertTokenizer.from_pretrained(path)
+        model = DistilBertForSequenceClassification.from_pretrained(path)
+        with open(os.path.join(path, 'label_encoder.pkl'), 'rb') as f:
+            label_encoder = pickle.load(f)
+        return tokenizer, model, label_encoder
+
+    def _load_models(self, intent_classifier=None, problem_classifier=None):
         try:
             self.logger.info("Memuat model klasifikasi...")
-            self.intent_tokenizer = DistilBertTokenizer.from_pretrained(self.intent_path)
-            self.intent_model = DistilBertForSequenceClassification.from_pretrained(self.intent_path)
-            with open(os.path.join(self.intent_path, 'label_encoder.pkl'), 'rb') as f:
-                self.intent_le = pickle.load(f)
-
-            self.doc_tokenizer = DistilBertTokenizer.from_pretrained(self.problem_path)
-            self.doc_model = DistilBertForSequenceClassification.from_pretrained(self.problem_path)
-            with open(os.path.join(self.problem_path, 'label_encoder.pkl'), 'rb') as f:
-                self.doc_le = pickle.load(f)
+            if intent_classifier is None:
+                intent_classifier = self.load_classifier(self.intent_path)
+            if problem_classifier is None:
+                problem_classifier = self.load_classifier(self.problem_path)
+            self.intent_tokenizer, self.intent_model, self.intent_le = intent_classifier
+            self.doc_tokenizer, self.doc_model, self.doc_le = problem_classifier
             self.models_loaded = True
         except Exception as e:
             self.logger.error(f"Gagal memuat model: {e}")
             self.models_loaded = False
 
     def _predict(self, text, model, tokenizer, label_encoder):
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=64)
-        with torch.no_grad():
-            logits = model(**inputs).logits
-        predicted_id = torch.argmax(logits, dim=1).item()
-        return label_encoder.inverse_transform([predicted_id])[0]
+        model_name = os.path.basename(str(getattr(model, 'name_or_path', '')))
+        started = time.perf_counter()
+        with tracing.span("model.forward", model=model_name) as span:
+            inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=64)
+            with torch.no_grad():
+                logits = model(**inputs).logits
+            predicted_id = torch.argmax(logits, dim=1).item()
+            label = label_encoder.inverse_transform([predicted_id])[0]
+            span.set_attributes(input_tokens=int(inputs['input_ids'].shape[1]), label=str(label))
+        INFERENCE_SECONDS.observe(time.perf_counter() - started, model=model_name)
+        return label
+
+    def warm_up(self):
+        """
+        Tokenizer priming + forward pass dummy di setiap panjang sekuens tipikal untuk
+        kedua classifier, supaya turn pertama tidak menanggung biaya inisialisasi malas.
+        Sengaja tidak lewat _predict agar histogram inferensi hanya berisi trafik nyata.
+        """
+        if not self.models_loaded:
+            self.logger.warning("Warm-up model dilewati: model klasifikasi tidak termuat.")
+            return
+        for model, tokenizer in ((self.intent_model, self.intent_tokenizer), (self.doc_model, self.doc_tokenizer)):
+            model.eval()
+            for sample in WARMUP_SAMPLES:
+                tokenizer(sample, return_tensors="pt", truncation=True, padding=True, max_length=64)
+            for length in WARMUP_SEQUENCE_LENGTHS:
+                inputs = tokenizer(WARMUP_SAMPLES[-1], return_tensors="pt", truncation=True,
+                                   padding='max_length', max_length=length)
+                with torch.no_grad():
+                    model(**inputs)
+        self.logger.info("Warm-up model selesai (panjang sekuens %s).", WARMUP_SEQUENCE_LENGTHS)
+
+    def should_activate(self, board):
+        """
+        Smart locking: klasifikasi intent hanya jika SEMUA agen spesialis menganggur.
+        Saat Doctor/Brewer menunggu jawaban, input user adalah jawaban, bukan intent baru.
+        """
+        doctor_state = board.get_doctor_state()
+        is_doctor_busy = doctor_state != 'INIT' and doctor_state != 'DONE'
+        is_brewer_busy = board.get_brewer_state() != 'INIT'
+        return not is_doctor_busy and not is_brewer_busy
 
     def process(self):
         """
@@ -75,7 +148,7 @@ class IntentAgent(BaseAgent):
             has_problem_keyword = any(k in user_input_lower for k in problem_keywords)
 
             if not has_problem_keyword:
-                self.logger.info(f"Rule-Based Override: Bean detected ('{user_input}'), routing to Master Brewer.")
+                self.logger.info("Rule-Based Override: Bean detected ('%.200s'), routing to Master Brewer.", user_input)
                 self.blackboard.set_intent('master_brewer')
                 return
 
@@ -83,11 +156,12 @@ class IntentAgent(BaseAgent):
         if not self.models_loaded: return
 
         intent = self._predict(user_input, self.intent_model, self.intent_tokenizer, self.intent_le)
-        self.logger.info(f"Model Prediction: {intent}")
+        self.logger.info("Model Prediction: %s", intent)
         
         self.blackboard.set_intent(intent)
 
-        if intent == 'doctor':
+        # Tanpa klasifikasi awal, Doctor meminta user menjelaskan rasa (jalur murah)
+        if intent == 'doctor' and self._has_budget("intent.classify_problem", PROBLEM_MIN_BUDGET):
             problem = self._predict(user_input, self.doc_model, self.doc_tokenizer, self.doc_le)
             self.blackboard.update_evidence("initial_problem_classification", problem)
             self.blackboard.update_evidence(f"problem_{problem}", 1.0)
\ No newline at end of file
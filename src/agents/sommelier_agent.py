@@ -1,21 +1,49 @@
 from src.agents.base_agent import BaseAgent
-from src.knowledge.loader import KnowledgeLoader
+from src.knowledge.store import KnowledgeStore
 from src.core.cbr_engine import CBREngine
+from src.core.blackboard import Blackboard
 import json
 
 class SommelierAgent(BaseAgent):
-    def __init__(self):
+    WATCHES = (Blackboard.KEY_LAST_INPUT, Blackboard.KEY_INTENT)
+    DEPENDS_ON = ('Intent',)
+
+    def __init__(self, knowledge=None):
         super().__init__("Sommelier")
-        self.loader = KnowledgeLoader('datasets/coffee_beans.json', 'datasets/brew_recipes.json')
-        self.beans, _ = self.loader.load_knowledge()
+        self.knowledge = knowledge or KnowledgeStore.default()
+        self.beans = self.knowledge.beans
+        self.facets = self.knowledge.facets
+        self.tags = self.knowledge.tags
+        self.postings = self.knowledge.postings
         self.cbr = CBREngine()
 
+    def warm_up(self):
+        # Satu top-k atas seluruh katalog: mengisi cache resolve kosakata tag & posting
+        self.postings.top_k(self.tags.compile({'fruity': 1.0}), 3)
+
+    def should_activate(self, board):
+        return board.get_intent() == 'sommelier'
+
     def process(self):
         if self.blackboard.get_intent() != 'sommelier': return
 
         user_input = self.blackboard.get_last_user_input()
         self.logger.info("Sommelier performing Weighted CBR Analysis...")
 
+        # 0. Batasan keras ("dark roast only", "no naturals") -> bitmap AND/OR sebelum scoring
+        constraints = self.facets.parse(user_input)
+        mask = None
+        if constraints:
+            mask = self.facets.candidates(constraints)
+            candidates = self.facets.count(mask)
+            self.logger.info("Hard filters %s: %d/%d beans", constraints.describe(), candidates, len(self.beans))
+            if not candidates:
+                self.blackboard.add_bot_message(
+                    f"No beans in our catalog match those constraints (`{constraints.describe()}`). "
+                    "Could you relax one of them?"
+                )
+                return
+
         # 1. Ekstraksi Bobot (LLM)
         user_prefs = self.llm.extract_weighted_preferences(user_input)
         
@@ -23,26 +51,25 @@ class SommelierAgent(BaseAgent):
             self.blackboard.add_bot_message("Could you describe the flavor you want? (e.g., 'Fruity and sweet, not bitter')")
             return
 
-        # 2. Kalkulasi CBR (Python)
-        scored_beans = []
-        for bean in self.beans:
-            score = self.cbr.calculate_weighted_tag_similarity(user_prefs, bean.expert_tags)
-            scored_beans.append((score, bean))
+        # 2. Kalkulasi CBR: preferensi dipetakan ke tag id sekali, lalu top-k lewat posting tag
+        #    (WAND; hasil sama dengan scoring + sort seluruh kandidat)
+        query = self.tags.compile(user_prefs)
+        if query.unmapped:
+            self.logger.info("Unmapped preference terms: %s", query.unmapped)
+        top_beans = [(score, self.beans[i]) for score, i in self.postings.top_k(query, 3, mask)]
 
-        # Sort
-        scored_beans.sort(key=lambda x: x[0], reverse=True)
-        
         # 3. Tampilkan "Invisible Math" (Transparansi untuk Dosen)
-        top_beans = scored_beans[:3]
-        
         # Debugging visual untuk user
         debug_msg = "🧮 **CBR Calculation Trace:**\n"
-        debug_msg += f"**User Constraints (Weights):** `{json.dumps(user_prefs)}`\n\n"
+        debug_msg += f"**User Constraints (Weights):** `{json.dumps(user_prefs)}`\n"
+        if constraints:
+            debug_msg += f"**Hard Filters:** `{constraints.describe()}` ({candidates}/{len(self.beans)} beans)\n"
+        debug_msg += "\n"
         debug_msg += "**Scoring Results:**\n"
         
         for score, bean in top_beans:
             # Cari tag yang cocok untuk highlight
-            matches = [t for t in bean.expert_tags if any(req in t.lower() for req in user_prefs)]
+            matches = [t for t in bean.expert_tags if query.matches(self.tags.ids[t.lower()])]
             debug_msg += f"- **{bean.name}**: {score:.1f}% Match (Matches: {', '.join(matches)})\n"
             
         self.blackboard.add_bot_message(debug_msg)
@@ -53,7 +80,9 @@ class SommelierAgent(BaseAgent):
         
         narrative = self.llm.generate_response(
             prompt=f"Recommend {winner.name} based on user prefs {user_prefs}. Keep it professional.",
-            context="Sommelier"
+            context="Sommelier",
+            fallback=f"**{winner.name}** ({winner.origin}). {winner.tasting_notes}",
+            step="sommelier.narrative"
         )
         self.blackboard.add_bot_message(f"🏆 **Top Recommendation:**\n\n{narrative}")
         
@@ -0,0 +1,309 @@
+import asyncio
+import json
+import os
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from src.core import warmup
+from src.core.session_manager import SessionManager
+from src.knowledge.store import KnowledgeStore
+from src.utils import metrics
+from src.utils.logger import setup_logger
+
+logger = setup_logger("API")
+
+SESSION_PATH = re.compile(r"^/sessions/([A-Za-z0-9_-]+)(/messages|/events)?$")
+
+
+class SessionChannel:
+    """Status runtime satu sesi: kunci turn (satu turn per sesi) dan subscriber SSE."""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.subscribers = set()
+
+    def publish(self, event):
+        for queue in list(self.subscribers):
+            queue.put_nowait(event)
+
+
+class BaristaBoxAPI:
+    """
+    Service ASGI headless untuk siklus Intent -> Sommelier -> Brewer -> Doctor.
+
+    Endpoint:
+      GET  /healthz                  -> status proses (liveness)
+      GET  /readyz                   -> 200 jika agen dimuat & warm-up selesai, selain itu 503
+      GET  /memory                   -> footprint memori per sesi & total (SessionManager)
+      GET  /metrics                  -> metrik format teks Prometheus
+      GET  /admin/unmapped-tags      -> kata preferensi yang tidak cocok dengan tag katalog (+ saran)
+      POST /sessions                 -> buat sesi baru {"session_id"}
+      GET  /sessions/{id}            -> snapshot Blackboard sesi
+      POST /sessions/{id}/messages   -> {"text": "..."} jalankan satu turn, balas pesan bot baru
+      GET  /sessions/{id}/events     -> Server-Sent Events untuk setiap pesan bot
+
+    Siklus agen (sinkron, CPU/IO-bound) dijalankan di thread pool sehingga event loop
+    tetap melayani banyak sesi sekaligus. Umur sesi (TTL, batas LRU, spill ke disk)
+    diatur SessionManager; sweep berjalan tiap SESSION_SWEEP_SECONDS.
+    """
+
+    def __init__(self, orchestrator=None, orchestrator_factory=None, backend_kind=None, max_workers=None,
+                 session_manager=None):
+        self.orchestrator = orchestrator
+        self.orchestrator_factory = orchestrator_factory
+        kind = backend_kind or os.environ.get("BLACKBOARD_BACKEND", "memory")
+        # Streamlit session_state tidak tersedia di mode headless
+        self.backend_kind = kind if kind in ('memory', 'sqlite') else 'memory'
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.environ.get("API_WORKERS", 8)),
+            thread_name_prefix="agent-cycle",
+        )
+        self.sessions = session_manager or SessionManager(self.backend_kind)
+        self.channels = {}
+        self.keepalive_seconds = 15.0
+        self.sweep_seconds = float(os.environ.get("SESSION_SWEEP_SECONDS", 60))
+        self._sweeper = None
+
+    # --- SESSION HELPERS ---
+
+    def _board(self, session_id):
+        return self.sessions.board(session_id)
+
+    def _channel(self, session_id):
+        channel = self.channels.get(session_id)
+        if channel is None:
+            channel = self.channels[session_id] = SessionChannel()
+        return channel
+
+    async def _session_exists(self, session_id):
+        if self.backend_kind == 'sqlite':
+            # Query database: jangan blok event loop
+            return await self._run_blocking(self.sessions.exists, session_id)
+        return self.sessions.exists(session_id)
+
+    async def _run_blocking(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def startup(self):
+        if self.orchestrator is None and self.orchestrator_factory is not None:
+            logger.info("Memuat agen untuk service headless...")
+            self.orchestrator = await self._run_blocking(self.orchestrator_factory)
+        if self._sweeper is None:
+            self._sweeper = asyncio.ensure_future(self._sweep_loop())
+        # Port terpisah (METRICS_PORT) untuk scraper yang tidak boleh menyentuh port API
+        metrics.start_exporter_from_env()
+
+    async def _sweep_loop(self):
+        """Evict sesi idle secara berkala; channel tanpa subscriber ikut dibersihkan."""
+        while True:
+            await asyncio.sleep(self.sweep_seconds)
+            try:
+                expired = await self._run_blocking(self.sessions.sweep)
+            except Exception as e:
+                logger.error(f"Sweep sesi gagal: {e}")
+                continue
+            for session_id in expired:
+                channel = self.channels.get(session_id)
+                if channel is not None and not channel.subscribers and not channel.lock.locked():
+                    del self.channels[session_id]
+
+    # --- ASGI ENTRY ---
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        method, path = scope['method'], scope['path']
+        started = False
+
+        async def send(message, _send=send):
+            # Catat apakah header sudah terkirim: setelah itu error tidak boleh memulai respons kedua
+            nonlocal started
+            if message['type'] == 'http.response.start':
+                started = True
+            await _send(message)
+
+        try:
+            if path == '/healthz' and method == 'GET':
+                await self._send_json(send, 200, {'status': 'ok', 'ready': self.orchestrator is not None})
+                return
+            if path == '/readyz' and method == 'GET':
+                ready = self.orchestrator is not None and warmup.is_ready()
+                await self._send_json(send, 200 if ready else 503, {'ready': ready})
+                return
+            if path == '/memory' and method == 'GET':
+                await self._send_json(send, 200, await self._run_blocking(self.sessions.memory_report))
+                return
+            if path == '/admin/unmapped-tags' and method == 'GET':
+                await self._send_json(send, 200, {'terms': await self._run_blocking(self._unmapped_tags)})
+                return
+            if path == '/metrics' and method == 'GET':
+                await self._send_body(send, 200, metrics.REGISTRY.render().encode('utf-8'), metrics.CONTENT_TYPE)
+                return
+            if path == '/sessions' and method == 'POST':
+                await self._create_session(send)
+                return
+
+            match = SESSION_PATH.match(path)
+            if not match:
+                await self._send_json(send, 404, {'error': 'not found'})
+                return
+            session_id, action = match.group(1), match.group(2)
+            if not await self._session_exists(session_id):
+                await self._send_json(send, 404, {'error': 'unknown session'})
+                return
+
+            if action is None and method == 'GET':
+                await self._get_session(send, session_id)
+            elif action == '/messages' and method == 'POST':
+                await self._post_message(receive, send, session_id)
+            elif action == '/events' and method == 'GET':
+                await self._stream_events(receive, send, session_id)
+            else:
+                await self._send_json(send, 405, {'error': 'method not allowed'})
+        except Exception as e:
+            logger.error(f"Request {method} {path} gagal: {e}")
+            if started:
+                # Respons (mis. stream SSE) sudah berjalan; server ASGI menutup koneksinya
+                return
+            await self._send_json(send, 500, {'error': 'internal error'})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup()
+                    await send({'type': 'lifespan.startup.complete'})
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._sweeper is not None:
+                    self._sweeper.cancel()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    # --- HANDLERS ---
+
+    async def _create_session(self, send):
+        session_id = uuid.uuid4().hex
+        self._channel(session_id)
+        await self._run_blocking(self._board, session_id)
+        await self._send_json(send, 201, {'session_id': session_id})
+
+    @staticmethod
+    def _unmapped_tags():
+        # KnowledgeStore.default() bisa memuat katalog pada panggilan pertama -> thread pool
+        return KnowledgeStore.default().tags.unmapped_report()
+
+    async def _get_session(self, send, session_id):
+        def snapshot():
+            with self.sessions.in_use(session_id) as board:
+                bean = board.get_context_bean()
+                recipe = board.get_context_recipe()
+                return {
+                    'session_id': session_id,
+                    'intent': board.get_intent(),
+                    'doctor_state': board.get_doctor_state(),
+                    'brewer_state': board.get_brewer_state(),
+                    'evidence': board.get_evidence(),
+                    'context_bean': bean.id if bean else None,
+                    'context_recipe': recipe.recipe_id if recipe else None,
+                    'messages': board.get_chat_history(),
+                    'history_summary': board.get_history_summary(),
+                }
+        await self._send_json(send, 200, await self._run_blocking(snapshot))
+
+    async def _post_message(self, receive, send, session_id):
+        try:
+            payload = json.loads(await self._read_body(receive) or b'{}')
+            text = str(payload['text']).strip()
+        except (ValueError, KeyError, TypeError):
+            await self._send_json(send, 400, {'error': 'body must be JSON {"text": "..."}'})
+            return
+        if not text:
+            await self._send_json(send, 400, {'error': 'text must not be empty'})
+            return
+        if self.orchestrator is None:
+            await self._send_json(send, 503, {'error': 'agents not loaded'})
+            return
+
+        channel = self._channel(session_id)
+        async with channel.lock:
+            new_messages, shed = await self._run_blocking(self._run_turn, session_id, text)
+        for message in new_messages:
+            channel.publish(message)
+        await self._send_json(send, 200, {'session_id': session_id, 'messages': new_messages, 'shed': shed})
+
+    def _run_turn(self, session_id, text):
+        """Satu turn (di thread pool): tulis input, jalankan siklus, ambil pesan bot baru."""
+        # Sesi di-pin selama turn: sweep TTL / evict LRU tidak boleh membuangnya di tengah jalan
+        with self.sessions.in_use(session_id) as board:
+            board.add_user_message(text)
+            seen_seq = board.last_message_seq()
+            deadline = self.orchestrator.run_cycle(board)
+            new_messages = [m for m in board.get_messages_since(seen_seq) if m['role'] == 'assistant']
+        return new_messages, list(deadline.shed_steps)
+
+    async def _stream_events(self, receive, send, session_id):
+        channel = self._channel(session_id)
+        queue = asyncio.Queue()
+        channel.subscribers.add(queue)
+        await send({
+            'type': 'http.response.start', 'status': 200,
+            'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache')],
+        })
+        disconnect = asyncio.ensure_future(self._wait_disconnect(receive))
+        try:
+            while not disconnect.done():
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({getter, disconnect}, timeout=self.keepalive_seconds,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    chunk = f"event: message\ndata: {json.dumps(getter.result())}\n\n"
+                else:
+                    getter.cancel()
+                    if disconnect.done():
+                        break
+                    chunk = ": keepalive\n\n"
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            channel.subscribers.discard(queue)
+            disconnect.cancel()
+
+    # --- LOW LEVEL ---
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                return body
+
+    @staticmethod
+    async def _send_body(send, status, body, content_type):
+        await send({
+            'type': 'http.response.start', 'status': status,
+            'headers': [(b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    @classmethod
+    async def _send_json(cls, send, status, payload):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        await cls._send_body(send, status, body, 'application/json')
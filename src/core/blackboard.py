@@ -1,26 +1,66 @@
-import streamlit as st
+import contextlib
+import contextvars
+import os
+import pickle
+from collections import deque
+from src.core.state_backends import create_backend
+from src.knowledge.store import KnowledgeStore
 from src.utils.logger import setup_logger
 
 logger = setup_logger("Blackboard")
 
+# Blackboard sesi yang sedang diproses (diikat oleh Orchestrator per turn)
+_bound_blackboard = contextvars.ContextVar('bound_blackboard', default=None)
+
+
 class Blackboard:
     """
     Pusat Memori Bersama (Shared Memory) untuk Arsitektur Blackboard.
     Bertindak sebagai Single Source of Truth bagi semua agen.
+    Data disimpan lewat StateBackend (streamlit / memory / sqlite) sehingga
+    inti penalaran bisa berjalan headless.
+
+    Skema sesi ringkas: frame bean/resep disimpan sebagai id dan antrian diagnosis
+    sebagai (problem_key, cause_key); semuanya di-resolve lewat KnowledgeStore saat
+    dibaca. Frame/penyebab yang tidak ada di KnowledgeStore disimpan apa adanya.
     """
     
     # Kunci-kunci standar untuk menghindari Typo
     KEY_MESSAGES = 'chat_history'
     KEY_LAST_INPUT = 'last_user_input'
     KEY_INTENT = 'current_intent'
-    KEY_CONTEXT_BEAN = 'context_bean_frame'     # Akan menyimpan Objek BeanFrame
-    KEY_CONTEXT_RECIPE = 'context_recipe_frame' # Akan menyimpan Objek RecipeFrame
+    KEY_CONTEXT_BEAN = 'context_bean_frame'     # Menyimpan id BeanFrame (di-resolve saat dibaca)
+    KEY_CONTEXT_RECIPE = 'context_recipe_frame' # Menyimpan recipe_id RecipeFrame
     KEY_DIAGNOSIS_STATE = 'diagnosis_state'     # State internal dokter (misal: 'GATHERING', 'SOLVED')
     KEY_EVIDENCE = 'collected_evidence'         # Bukti gejala yang dikumpulkan
+    KEY_DOCTOR_STATE = 'doctor_internal_state'
+    KEY_BREWER_STATE = 'brewer_state'
+    KEY_MESSAGE_SEQ = 'chat_next_seq'           # Nomor urut pesan berikutnya (monoton per sesi)
+    KEY_HISTORY_SUMMARY = 'chat_summary'        # Ringkasan pesan lama yang keluar dari ring buffer
+    KEY_DIAGNOSIS_QUEUE = 'diagnosis_queue'     # [(problem_key, cause_key), ...]
+    KEY_CURRENT_DIAGNOSIS_ITEM = 'current_diagnosis_item'
+
+    # Semua key milik sesi (isi snapshot)
+    SESSION_KEYS = (
+        KEY_MESSAGES, KEY_MESSAGE_SEQ, KEY_HISTORY_SUMMARY, KEY_LAST_INPUT, KEY_INTENT,
+        KEY_CONTEXT_BEAN, KEY_CONTEXT_RECIPE, KEY_DIAGNOSIS_STATE, KEY_EVIDENCE,
+        KEY_DOCTOR_STATE, KEY_BREWER_STATE, KEY_DIAGNOSIS_QUEUE, KEY_CURRENT_DIAGNOSIS_ITEM,
+    )
+    SNAPSHOT_VERSION = 1
+
+    # Banyak sorotan (pesan user lama) yang disimpan di ringkasan kompaksi
+    SUMMARY_HIGHLIGHTS = 5
 
-    def __init__(self):
+    def __init__(self, backend=None, session_id='default', knowledge=None):
         """Inisialisasi state jika belum ada."""
-        self._init_state(self.KEY_MESSAGES, [])
+        self.state = backend or create_backend(session_id=session_id)
+        self._knowledge = knowledge
+        self._listeners = []
+        # Riwayat chat = ring buffer; pesan tertua dikompaksi ke ringkasan saat penuh
+        self.history_limit = int(os.environ.get("CHAT_HISTORY_LIMIT", 200))
+        self._init_state(self.KEY_MESSAGES, deque(maxlen=self.history_limit))
+        self._init_state(self.KEY_MESSAGE_SEQ, 1)
+        self._init_state(self.KEY_HISTORY_SUMMARY, None)
         self._init_state(self.KEY_LAST_INPUT, None)
         self._init_state(self.KEY_INTENT, None)
         self._init_state(self.KEY_CONTEXT_BEAN, None)
@@ -29,35 +69,165 @@ class Blackboard:
         self._init_state(self.KEY_EVIDENCE, {}) # Dictionary untuk menyimpan {gejala: CF}
 
     def _init_state(self, key, default_value):
-        if key not in st.session_state:
-            st.session_state[key] = default_value
+        if key not in self.state:
+            self.state.set(key, default_value)
+
+    def _set(self, key, value):
+        """Tulis ke backend lalu pancarkan change event ke semua listener (scheduler)."""
+        self.state.set(key, value)
+        for listener in self._listeners:
+            listener(key)
+
+    @property
+    def knowledge(self):
+        """KnowledgeStore untuk me-resolve referensi (default: store bersama proses)."""
+        if self._knowledge is None:
+            self._knowledge = KnowledgeStore.default()
+        return self._knowledge
+
+    # --- REFERENSI RINGKAS (frame -> id, penyebab -> key) ---
+
+    def _bean_ref(self, bean_frame):
+        if bean_frame is None or isinstance(bean_frame, str):
+            return bean_frame
+        return bean_frame.id if self.knowledge.bean(bean_frame.id) is not None else bean_frame
+
+    def _recipe_ref(self, recipe_frame):
+        if recipe_frame is None or isinstance(recipe_frame, str):
+            return recipe_frame
+        return recipe_frame.recipe_id if self.knowledge.recipe(recipe_frame.recipe_id) is not None else recipe_frame
+
+    def _cause_ref(self, item, problem_key):
+        """(cause_key, cause_data) -> (problem_key, cause_key) jika penyebab ada di KB."""
+        if item is None or isinstance(item[1], str):
+            return item
+        cause_key = item[0]
+        if problem_key and self.knowledge.cause(problem_key, cause_key) is not None:
+            return (problem_key, cause_key)
+        return tuple(item)
+
+    def _resolve_cause(self, ref):
+        if ref is None or not isinstance(ref[1], str):
+            return ref
+        problem_key, cause_key = ref
+        return (cause_key, self.knowledge.cause(problem_key, cause_key))
+
+    def _problem_key(self):
+        return (self.state.get(self.KEY_EVIDENCE) or {}).get('current_problem_key')
+
+    # --- CHANGE EVENTS ---
+
+    def add_listener(self, listener):
+        """Daftarkan callback(key) yang dipanggil setiap kali sebuah key ditulis."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    # --- BINDING PER TURN ---
+
+    @staticmethod
+    def bound():
+        """Blackboard yang sedang diikat ke turn aktif, atau None."""
+        return _bound_blackboard.get()
+
+    @contextlib.contextmanager
+    def bind(self):
+        """Ikat Blackboard ini ke turn aktif agar agen (yang dipakai bersama) membacanya."""
+        token = _bound_blackboard.set(self)
+        try:
+            yield self
+        finally:
+            _bound_blackboard.reset(token)
 
     # --- PUBLIC API: CHAT HISTORY ---
 
+    def _messages(self):
+        messages = self.state.get(self.KEY_MESSAGES)
+        # Sesi lama (list biasa) atau limit yang berubah -> bungkus ulang sebagai ring buffer
+        if not isinstance(messages, deque) or messages.maxlen != self.history_limit:
+            old = list(messages or [])
+            messages = deque(maxlen=self.history_limit)
+            for msg in old:
+                self._append(messages, msg)
+            # Simpan hasil upgrade sekali agar bacaan berikutnya tidak mengompaksi ulang
+            self.state.set(self.KEY_MESSAGES, messages)
+        return messages
+
+    def _append(self, messages, msg):
+        """Tambah pesan ke ring buffer; pesan yang terdesak keluar dikompaksi ke ringkasan."""
+        if len(messages) == messages.maxlen:
+            self._compact(messages[0])
+        messages.append(msg)
+
+    def _compact(self, msg):
+        summary = self.state.get(self.KEY_HISTORY_SUMMARY) or {
+            'compacted': 0, 'highlights': deque(maxlen=self.SUMMARY_HIGHLIGHTS),
+        }
+        summary['compacted'] += 1
+        if msg['role'] == 'user':
+            text = msg['content'].strip()
+            summary['highlights'].append(text if len(text) <= 80 else text[:77] + '...')
+        self.state.set(self.KEY_HISTORY_SUMMARY, summary)
+
+    def _add_message(self, role, content):
+        seq = self.state.get(self.KEY_MESSAGE_SEQ, 1)
+        messages = self._messages()
+        self._append(messages, {"seq": seq, "role": role, "content": content})
+        self.state.set(self.KEY_MESSAGE_SEQ, seq + 1)
+        self._set(self.KEY_MESSAGES, messages)
+        return seq
+
     def add_user_message(self, message):
-        st.session_state[self.KEY_MESSAGES].append({"role": "user", "content": message})
-        st.session_state[self.KEY_LAST_INPUT] = message
-        logger.info(f"User Input received: {message}")
+        self._add_message("user", message)
+        self._set(self.KEY_LAST_INPUT, message)
+        logger.info("User Input received: %.200s", message)
 
     def add_bot_message(self, message):
-        st.session_state[self.KEY_MESSAGES].append({"role": "assistant", "content": message})
-        logger.info(f"Bot Output generated: {message[:50]}...") # Log pendek saja
+        self._add_message("assistant", message)
+        logger.info("Bot Output generated: %.50s...", message) # Log pendek saja
 
     def get_chat_history(self):
-        return st.session_state[self.KEY_MESSAGES]
+        """Jendela riwayat yang masih disimpan (maks. CHAT_HISTORY_LIMIT pesan)."""
+        return list(self._messages())
+
+    def get_messages_since(self, seq):
+        """Pesan dengan nomor urut > seq (untuk render/kirim inkremental)."""
+        new = []
+        for msg in reversed(self._messages()):
+            if msg.get('seq', 0) <= seq:
+                break
+            new.append(msg)
+        new.reverse()
+        return new
+
+    def last_message_seq(self):
+        """Nomor urut pesan terakhir (0 jika belum ada pesan)."""
+        return self.state.get(self.KEY_MESSAGE_SEQ, 1) - 1
+
+    def get_history_summary(self):
+        """Ringkasan pesan yang sudah keluar dari jendela riwayat, atau None."""
+        summary = self.state.get(self.KEY_HISTORY_SUMMARY)
+        if not summary:
+            return None
+        text = f"{summary['compacted']} earlier messages compacted."
+        if summary['highlights']:
+            text += " Earlier requests: " + "; ".join(f'"{h}"' for h in summary['highlights'])
+        return text
 
     def get_last_user_input(self):
-        return st.session_state[self.KEY_LAST_INPUT]
+        return self.state.get(self.KEY_LAST_INPUT)
 
     # --- PUBLIC API: SHARED KNOWLEDGE (WRITE) ---
 
     def set_intent(self, intent):
-        old_intent = st.session_state.get(self.KEY_INTENT)
+        old_intent = self.state.get(self.KEY_INTENT)
         
         # Hanya lakukan sesuatu jika intent benar-benar BERUBAH
         if old_intent != intent:
-            logger.debug(f"INTENT CHANGE DETECTED: '{old_intent}' -> '{intent}'")
-            st.session_state[self.KEY_INTENT] = intent
+            logger.debug("INTENT CHANGE DETECTED: '%s' -> '%s'", old_intent, intent)
+            self._set(self.KEY_INTENT, intent)
             
             # --- AUTO-CLEANUP LOGIC ---
             # Jika intent berubah, reset state internal agen lain agar UI bersih
@@ -73,35 +243,47 @@ class Blackboard:
             # Reset Evidence (Opsional: Tergantung apakah kita mau ingatan masalah hilang saat ganti topik)
             # Untuk sekarang kita KEEP evidence agar sistem terasa punya memori jangka panjang,
             # tapi kita reset pointer diagnosis saat ini.
-            st.session_state['current_diagnosis_item'] = None
+            self._set(self.KEY_CURRENT_DIAGNOSIS_ITEM, None)
 
     def set_context_bean(self, bean_frame):
-        """Menyimpan objek BeanFrame yang sedang dibicarakan."""
-        st.session_state[self.KEY_CONTEXT_BEAN] = bean_frame
-        logger.debug(f"CONTEXT UPDATE: Bean set to {bean_frame.name if bean_frame else 'None'}")
+        """Menyimpan BeanFrame yang sedang dibicarakan (sebagai id)."""
+        self._set(self.KEY_CONTEXT_BEAN, self._bean_ref(bean_frame))
+        logger.debug("CONTEXT UPDATE: Bean set to %s", bean_frame.name if bean_frame else 'None')
 
     def set_context_recipe(self, recipe_frame):
-        st.session_state[self.KEY_CONTEXT_RECIPE] = recipe_frame
-        logger.debug(f"CONTEXT UPDATE: Recipe set to {recipe_frame.recipe_id if recipe_frame else 'None'}")
+        self._set(self.KEY_CONTEXT_RECIPE, self._recipe_ref(recipe_frame))
+        logger.debug("CONTEXT UPDATE: Recipe set to %s", recipe_frame.recipe_id if recipe_frame else 'None')
 
     def update_evidence(self, symptom_key, certainty_factor):
         """Dokter mencatat bukti gejala baru."""
-        st.session_state[self.KEY_EVIDENCE][symptom_key] = certainty_factor
-        logger.debug(f"EVIDENCE ADDED: {symptom_key} (CF={certainty_factor})")
+        evidence = self.state.get(self.KEY_EVIDENCE)
+        evidence[symptom_key] = certainty_factor
+        self._set(self.KEY_EVIDENCE, evidence)
+        logger.debug("EVIDENCE ADDED: %s (CF=%s)", symptom_key, certainty_factor)
+
+    def discard_evidence(self, symptom_keys):
+        """Hapus bukti lama (mis. jawaban diagnosis sebelumnya untuk penyebab yang akan ditanya ulang)."""
+        evidence = self.state.get(self.KEY_EVIDENCE)
+        removed = [key for key in symptom_keys if evidence.pop(key, None) is not None]
+        if removed:
+            self._set(self.KEY_EVIDENCE, evidence)
+            logger.debug("EVIDENCE DISCARDED: %s", removed)
 
     # --- PUBLIC API: SHARED KNOWLEDGE (READ) ---
 
     def get_intent(self):
-        return st.session_state[self.KEY_INTENT]
+        return self.state.get(self.KEY_INTENT)
 
     def get_context_bean(self):
-        return st.session_state[self.KEY_CONTEXT_BEAN]
+        bean = self.state.get(self.KEY_CONTEXT_BEAN)
+        return self.knowledge.bean(bean) if isinstance(bean, str) else bean
 
     def get_evidence(self):
-        return st.session_state[self.KEY_EVIDENCE]
+        return self.state.get(self.KEY_EVIDENCE)
     
     def get_context_recipe(self):
-        return st.session_state.get(self.KEY_CONTEXT_RECIPE)
+        recipe = self.state.get(self.KEY_CONTEXT_RECIPE)
+        return self.knowledge.recipe(recipe) if isinstance(recipe, str) else recipe
 
     # --- UTILITY ---
     
@@ -111,49 +293,88 @@ class Blackboard:
         tapi tetap menyimpan history chat.
         """
         logger.info("--- MEMORY RESET (Context Cleared) ---")
-        st.session_state[self.KEY_INTENT] = None
-        st.session_state[self.KEY_CONTEXT_BEAN] = None
-        st.session_state[self.KEY_CONTEXT_RECIPE] = None
-        st.session_state[self.KEY_EVIDENCE] = {}
+        self._set(self.KEY_INTENT, None)
+        self._set(self.KEY_CONTEXT_BEAN, None)
+        self._set(self.KEY_CONTEXT_RECIPE, None)
+        self._set(self.KEY_EVIDENCE, {})
 
     # --- DOCTOR SPECIFIC MEMORY ---
 
     def get_doctor_state(self):
         """Mengambil state diagnosis saat ini (misal: 'INIT', 'ASK_BEAN', 'DIAGNOSING')."""
-        return st.session_state.get('doctor_internal_state', 'INIT')
+        return self.state.get(self.KEY_DOCTOR_STATE, 'INIT')
 
     def set_doctor_state(self, state):
-        st.session_state['doctor_internal_state'] = state
-        logger.debug(f"DOCTOR STATE: {state}")
+        self._set(self.KEY_DOCTOR_STATE, state)
+        logger.debug("DOCTOR STATE: %s", state)
 
     def get_diagnosis_queue(self):
-        """Mengambil antrian penyebab yang harus diperiksa."""
-        return st.session_state.get('diagnosis_queue', [])
+        """Mengambil antrian penyebab yang harus diperiksa: [(cause_key, cause_data), ...]."""
+        return [self._resolve_cause(ref) for ref in self.state.get(self.KEY_DIAGNOSIS_QUEUE, [])]
 
-    def set_diagnosis_queue(self, queue):
-        st.session_state['diagnosis_queue'] = queue
+    def set_diagnosis_queue(self, queue, problem_key=None):
+        """Simpan antrian sebagai referensi (problem_key, cause_key) ke troubleshooting KB."""
+        problem_key = problem_key or (self._problem_key() if queue else None)
+        self._set(self.KEY_DIAGNOSIS_QUEUE, [self._cause_ref(item, problem_key) for item in queue])
 
     def pop_diagnosis_queue(self):
         """Mengambil item pertama dari antrian dan menyimpannya sebagai 'current_check'."""
-        queue = self.get_diagnosis_queue()
-        if queue:
-            item = queue.pop(0)
-            self.set_diagnosis_queue(queue)
-            st.session_state['current_diagnosis_item'] = item
-            return item
+        refs = self.state.get(self.KEY_DIAGNOSIS_QUEUE, [])
+        if refs:
+            ref = refs.pop(0)
+            self._set(self.KEY_DIAGNOSIS_QUEUE, refs)
+            self._set(self.KEY_CURRENT_DIAGNOSIS_ITEM, ref)
+            return self._resolve_cause(ref)
         return None
 
     def get_current_diagnosis_item(self):
-        return st.session_state.get('current_diagnosis_item')
+        return self._resolve_cause(self.state.get(self.KEY_CURRENT_DIAGNOSIS_ITEM))
     
     def set_current_diagnosis_item(self, item):
-        st.session_state['current_diagnosis_item'] = item
+        self._set(self.KEY_CURRENT_DIAGNOSIS_ITEM, self._cause_ref(item, self._problem_key()))
 
     # --- BREWER SPECIFIC MEMORY ---
     
     def get_brewer_state(self):
-        return st.session_state.get('brewer_state', 'INIT')
+        return self.state.get(self.KEY_BREWER_STATE, 'INIT')
 
     def set_brewer_state(self, state):
-        st.session_state['brewer_state'] = state
-        logger.debug(f"BREWER STATE: {state}")
\ No newline at end of file
+        self._set(self.KEY_BREWER_STATE, state)
+        logger.debug("BREWER STATE: %s", state)
+
+    # --- SNAPSHOT (persistensi / migrasi antar replika) ---
+
+    def snapshot(self):
+        """
+        Serialisasi seluruh state sesi ke bytes (pickle biner ber-versi).
+        Nilai lama yang masih berupa objek frame ikut diringkas menjadi referensi.
+        Hanya restore snapshot dari penyimpanan tepercaya (pickle).
+        """
+        problem_key = self._problem_key()
+        state = {}
+        for key in self.SESSION_KEYS:
+            if key not in self.state:
+                continue
+            value = self.state.get(key)
+            if key == self.KEY_CONTEXT_BEAN:
+                value = self._bean_ref(value)
+            elif key == self.KEY_CONTEXT_RECIPE:
+                value = self._recipe_ref(value)
+            elif key == self.KEY_DIAGNOSIS_QUEUE:
+                value = [self._cause_ref(item, problem_key) for item in value or []]
+            elif key == self.KEY_CURRENT_DIAGNOSIS_ITEM:
+                value = self._cause_ref(value, problem_key)
+            state[key] = value
+        return pickle.dumps({'version': self.SNAPSHOT_VERSION, 'state': state}, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def restore(self, data):
+        """Ganti state sesi ini dengan isi snapshot (key non-sesi di backend tidak disentuh)."""
+        payload = pickle.loads(data)
+        version = payload.get('version')
+        if version != self.SNAPSHOT_VERSION:
+            raise ValueError(f"Versi snapshot {version} tidak didukung (butuh {self.SNAPSHOT_VERSION}).")
+        for key in self.SESSION_KEYS:
+            self.state.delete(key)
+        for key, value in payload['state'].items():
+            self.state.set(key, value)
+        logger.info(f"Sesi dipulihkan dari snapshot ({len(data)} bytes).")
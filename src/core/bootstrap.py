@@ -0,0 +1,145 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from src.agents.intent_agent import IntentAgent, INTENT_MODEL_PATH, PROBLEM_MODEL_PATH
+from src.agents.doctor_agent import DoctorAgent
+from src.agents.sommelier_agent import SommelierAgent
+from src.agents.brewer_agent import BrewerAgent
+from src.core.llm_service import LLMService
+from src.core.orchestrator import Orchestrator
+from src.core.question_planner import QuestionPlanner
+from src.core import warmup
+from src.knowledge.loader import KnowledgeLoader
+from src.knowledge.sop_store import SOPStore
+from src.knowledge.store import KnowledgeStore, BEANS_PATH, RECIPES_PATH
+from src.utils import profiling
+from src.utils.logger import setup_logger
+
+logger = setup_logger("Bootstrap")
+
+
+class StartupGraph:
+    """
+    Graf dependensi tugas startup. Tugas yang dependensinya sudah selesai langsung
+    dijalankan di thread pool, sehingga waktu boot mendekati rantai terpanjang, bukan
+    jumlah semua tugas. Setiap tugas dipanggil dengan dict hasil tugas sebelumnya.
+
+    Tugas opsional yang gagal dicatat dan hasilnya None; tugas turunannya tetap berjalan
+    dan memakai jalur muat bawaannya sendiri (sama seperti konstruktor agen tanpa preload).
+    Kegagalan tugas wajib (optional=False) dilempar ulang oleh run().
+    """
+
+    def __init__(self):
+        self.tasks = {}
+        self.results = {}
+        self.timings = {}   # nama -> (mulai, selesai) dalam detik sejak run() dimulai
+        self._origin = None
+
+    def add(self, name, fn, deps=(), optional=True):
+        # Dependensi harus terdaftar lebih dulu: graf dijamin asiklik
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"Tugas '{name}' bergantung pada '{dep}' yang belum terdaftar.")
+        self.tasks[name] = (fn, tuple(deps), optional)
+        return self
+
+    def _run_task(self, name, fn, optional, origin):
+        started = time.perf_counter() - origin
+        try:
+            with profiling.phase(name):
+                return fn(self.results)
+        except Exception as e:
+            if not optional:
+                raise
+            logger.error(f"Tugas startup '{name}' gagal: {e}")
+            return None
+        finally:
+            self.timings[name] = (started, time.perf_counter() - origin)
+
+    def run(self, max_workers=None):
+        origin = self._origin = time.perf_counter()
+        pending = dict(self.tasks)
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup") as pool:
+            while pending or running:
+                for name, (fn, deps, optional) in list(pending.items()):
+                    if all(dep in self.results for dep in deps):
+                        del pending[name]
+                        running[pool.submit(self._run_task, name, fn, optional, origin)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.results[running.pop(future)] = future.result()
+        return self.results
+
+    def run_inline(self, name, fn):
+        """
+        Jalankan satu fase lanjutan di thread pemanggil (setelah run()), ikut dicatat di timings.
+        Dipakai untuk konstruksi agen: Blackboard bawaan (Streamlit) hanya valid di thread script.
+        """
+        self.results[name] = self._run_task(name, fn, False, self._origin or time.perf_counter())
+        return self.results[name]
+
+    def log_timings(self):
+        total = max((end for _, end in self.timings.values()), default=0.0)
+        for name, (start, end) in sorted(self.timings.items(), key=lambda item: item[1]):
+            logger.info("Startup %-18s %6.3fs (t=%.3f..%.3f)", name, end - start, start, end)
+        logger.info("Startup selesai dalam %.2fs (jumlah semua fase %.2fs).",
+                    total, sum(end - start for start, end in self.timings.values()))
+
+
+def build_startup_graph():
+    """
+    Fase muat independen (katalog, troubleshooting KB, dua classifier, SOP, statistik
+    diagnosis, LLM) berjalan paralel. Konstruksi agen (build_agents) menunggu semuanya.
+    """
+    graph = StartupGraph()
+    graph.add('catalog', lambda r: KnowledgeLoader(BEANS_PATH, RECIPES_PATH).load_knowledge())
+    graph.add('troubleshooting_kb', lambda r: KnowledgeStore.load_troubleshooting())
+    graph.add('intent_model', lambda r: IntentAgent.load_classifier(INTENT_MODEL_PATH))
+    graph.add('problem_model', lambda r: IntentAgent.load_classifier(PROBLEM_MODEL_PATH))
+    graph.add('sop_store', lambda r: SOPStore())
+    graph.add('question_planner', lambda r: QuestionPlanner())
+    graph.add('llm', lambda r: LLMService())
+    graph.add('knowledge', _build_knowledge, deps=('catalog', 'troubleshooting_kb'), optional=False)
+    return graph
+
+
+def _build_knowledge(results):
+    beans, recipes = results['catalog'] or ([], [])
+    store = KnowledgeStore(beans, recipes, results['troubleshooting_kb'] or {})
+    # Dipakai bersama agen & Blackboard (resolve id) lewat KnowledgeStore.default()
+    KnowledgeStore.set_default(store)
+    return store
+
+
+def build_agents(results):
+    """Rangkai agen dari hasil StartupGraph; sumber daya yang None dimuat oleh agennya sendiri."""
+    knowledge = results['knowledge']
+    bean_names = [bean.name.lower() for bean in knowledge.beans if bean.name]
+    intent_agent = IntentAgent(results['intent_model'], results['problem_model'], bean_names=bean_names)
+    doctor_agent = DoctorAgent(knowledge, planner=results['question_planner'])
+    sommelier_agent = SommelierAgent(knowledge)
+    brewer_agent = BrewerAgent(knowledge, sop_store=results['sop_store'])
+    return Orchestrator(intent_agent, doctor_agent, sommelier_agent, brewer_agent)
+
+
+def load_agents():
+    """
+    Memuat semua agen ke memori dan merangkainya ke Orchestrator.
+    Dipakai bersama oleh UI Streamlit (app.py) dan server headless (server.py).
+    Sumber daya dimuat paralel (STARTUP_WORKERS thread) lewat StartupGraph.
+    Diakhiri fase warm-up; setelahnya warmup.is_ready() bernilai True.
+    Jika STARTUP_PROFILE aktif, report profiling startup ditulis di akhir.
+    """
+    logger.info("Initializing Agents...")
+    graph = build_startup_graph()
+    workers = os.environ.get("STARTUP_WORKERS")
+    graph.run(max_workers=int(workers) if workers else None)
+    orchestrator = graph.run_inline('agents', build_agents)
+    graph.log_timings()
+    with profiling.phase('warmup'):
+        warmup.warm_up(orchestrator)
+    report = profiling.finish()
+    if report is not None:
+        logger.info("Profil startup (%.2fs, RSS %s MB) ditulis.", report['total']['wall_s'], report['total']['rss_mb'])
+    return orchestrator
@@ -8,6 +8,10 @@ class CBREngine:
     Mesin untuk menangani logika Case-Based Reasoning dan Fuzzy Matching.
     """
 
+    def __init__(self, shards=None):
+        # ShardedCatalog opsional (CBR_SHARDS): scoring atas katalog yang sama di-broadcast ke worker
+        self.shards = shards
+
     @staticmethod
     def calculate_similarity(case_a_features, case_b_features, weights):
         """
@@ -72,6 +76,11 @@ class CBREngine:
             'roast_level': 0.4, # Tingkat sangrai SANGAT penting untuk resep
             'processing': 0.3   # Proses juga penting
         }
+
+        if self.shards is not None and all_bean_frames is self.shards.beans:
+            top = self.shards.find_nearest_neighbors(target_features, weights, top_k=1)
+            if top:
+                return top[0][1], top[0][0]
         
         for bean in all_bean_frames:
             # Kita bandingkan target dengan data bean ini
@@ -161,6 +170,11 @@ class CBREngine:
         """
         Mencari K kasus teratas yang paling mirip dari case_base.
         """
+        if self.shards is not None and case_base is self.shards.beans:
+            top = self.shards.find_nearest_neighbors(query_case, weights, top_k)
+            if top is not None:
+                return top
+
         results = []
         
         for case in case_base:
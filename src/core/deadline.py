@@ -0,0 +1,62 @@
+import contextvars
+import time
+from src.utils.logger import setup_logger
+
+logger = setup_logger("Deadline")
+
+# Deadline turn yang sedang aktif (per thread / per task asyncio)
+_current_deadline = contextvars.ContextVar('turn_deadline', default=None)
+
+
+class Deadline:
+    """
+    Anggaran waktu satu turn percakapan.
+    Dibuat oleh Orchestrator, diaktifkan dengan `with deadline:` sehingga agen dan
+    LLMService bisa membacanya lewat `Deadline.current()` tanpa mengubah signature.
+    Langkah mahal yang dilewati (shed) dan waktu tiap langkah dicatat untuk traceability.
+    """
+
+    def __init__(self, budget_seconds, clock=time.monotonic):
+        self.budget = float(budget_seconds)
+        self._clock = clock
+        self.started_at = clock()
+        self.expires_at = self.started_at + self.budget
+        self.shed_steps = []
+        self.step_timings = {}   # {langkah: detik} mis. waktu process() tiap agen
+        self._token = None
+
+    @staticmethod
+    def current():
+        """Deadline aktif untuk turn ini, atau None jika tidak ada."""
+        return _current_deadline.get()
+
+    def elapsed(self):
+        return self._clock() - self.started_at
+
+    def remaining(self):
+        return max(0.0, self.expires_at - self._clock())
+
+    def expired(self):
+        return self.remaining() <= 0.0
+
+    def allows(self, cost_seconds):
+        """True jika sisa anggaran cukup untuk langkah dengan estimasi biaya `cost_seconds`."""
+        return self.remaining() >= cost_seconds
+
+    def shed(self, step, reason="budget"):
+        """Catat langkah yang diturunkan ke jalur murah (cached/template/lokal)."""
+        self.shed_steps.append(step)
+        logger.warning("SHED '%s' (%s), sisa anggaran %.2fs dari %.2fs", step, reason, self.remaining(), self.budget)
+
+    def record(self, step, seconds):
+        """Akumulasi waktu yang dihabiskan sebuah langkah dalam turn ini."""
+        self.step_timings[step] = self.step_timings.get(step, 0.0) + seconds
+
+    def __enter__(self):
+        self._token = _current_deadline.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_deadline.reset(self._token)
+        self._token = None
+        return False
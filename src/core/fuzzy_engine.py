@@ -0,0 +1,303 @@
+import csv
+import json
+import math
+import numpy as np
+from src.core.question_planner import combine_cf
+from src.utils.logger import setup_logger
+
+logger = setup_logger("FuzzyEngine")
+
+# Variabel seduh sebagai data: term -> (bentuk, parameter...)
+#   left_shoulder (c, d)      : 1 di bawah c, turun linear ke 0 di d
+#   right_shoulder (a, b)     : 0 sampai a, naik linear ke 1 di b
+#   trapezoid (a, b, c, d)    : naik a..b, rata b..c, turun c..d
+#   triangle (a, b, c)        : trapezoid dengan puncak tunggal b
+# Batas mengikuti CBREngine.fuzzy_check_temperature lama (suhu harus identik bit-per-bit).
+VARIABLES = {
+    'temperature': {
+        'unit': '°C',
+        'terms': {
+            'LOW': ('left_shoulder', 90, 92),
+            'IDEAL': ('trapezoid', 90, 92, 94, 96),
+            'HIGH': ('right_shoulder', 94, 96),
+        },
+        'labels': {'LOW': 'Low/Cold', 'IDEAL': 'Ideal', 'HIGH': 'High/Hot'},
+    },
+    'brew_time': {
+        'unit': 's',
+        'terms': {
+            'SHORT': ('left_shoulder', 120, 150),
+            'IDEAL': ('trapezoid', 120, 150, 210, 240),
+            'LONG': ('right_shoulder', 210, 240),
+        },
+    },
+    'grind_size': {
+        'unit': 'µm',
+        'terms': {
+            'FINE': ('left_shoulder', 400, 550),
+            'MEDIUM': ('trapezoid', 400, 550, 750, 900),
+            'COARSE': ('right_shoulder', 750, 900),
+        },
+    },
+    'ratio': {
+        # Gram air per gram kopi (1:16 -> 16)
+        'unit': 'g/g',
+        'terms': {
+            'STRONG': ('left_shoulder', 13, 15),
+            'IDEAL': ('trapezoid', 13, 15, 17, 19),
+            'WEAK': ('right_shoulder', 17, 19),
+        },
+    },
+    'dose': {
+        'unit': 'g',
+        'terms': {
+            'LOW': ('left_shoulder', 10, 13),
+            'IDEAL': ('triangle', 10, 15, 22),
+            'HIGH': ('right_shoulder', 18, 22),
+        },
+    },
+}
+
+# Rule base: IF semua antecedent (AND = min) THEN penyebab KB dengan CF aturan.
+# Beberapa aturan untuk penyebab yang sama digabung dengan combine_cf (MYCIN).
+RULES = [
+    {'if': [('temperature', 'LOW')], 'then': 'water_temp_low', 'cf': 1.0},
+    {'if': [('temperature', 'HIGH')], 'then': 'water_temp_high', 'cf': 1.0},
+    {'if': [('brew_time', 'SHORT')], 'then': 'brew_time_short', 'cf': 1.0},
+    {'if': [('brew_time', 'LONG')], 'then': 'brew_time_long', 'cf': 1.0},
+    {'if': [('grind_size', 'COARSE')], 'then': 'grind_coarse', 'cf': 0.9},
+    {'if': [('grind_size', 'COARSE'), ('brew_time', 'SHORT')], 'then': 'grind_coarse', 'cf': 0.6},
+    {'if': [('grind_size', 'FINE')], 'then': 'grind_fine', 'cf': 0.9},
+    {'if': [('grind_size', 'FINE'), ('brew_time', 'LONG')], 'then': 'grind_fine', 'cf': 0.6},
+    {'if': [('grind_size', 'COARSE'), ('ratio', 'WEAK')], 'then': 'grind_too_coarse', 'cf': 0.7},
+    {'if': [('ratio', 'WEAK')], 'then': 'bad_ratio', 'cf': 1.0},
+    {'if': [('dose', 'LOW')], 'then': 'bad_ratio', 'cf': 0.6},
+]
+
+
+def membership(shape, x):
+    """Derajat keanggotaan satu nilai skalar (float Python)."""
+    kind, params = shape[0], shape[1:]
+    if kind == 'left_shoulder':
+        c, d = params
+        if x < c:
+            return 1.0
+        elif c <= x < d:
+            return (d - x) / (d - c)
+        return 0.0
+    if kind == 'right_shoulder':
+        a, b = params
+        if x > b:
+            return 1.0
+        elif a < x <= b:
+            return (x - a) / (b - a)
+        return 0.0
+    if kind == 'triangle':
+        a, b, d = params
+        c = b
+    elif kind == 'trapezoid':
+        a, b, c, d = params
+    else:
+        raise ValueError(f"Bentuk membership tidak dikenal: {kind}")
+    if x < a or x > d:
+        return 0.0
+    elif a <= x < b:
+        return (x - a) / (b - a)
+    elif b <= x <= c:
+        return 1.0
+    elif c < x <= d:
+        return (d - x) / (d - c)
+    return 0.0
+
+
+def membership_array(shape, x):
+    """Versi numpy dari membership(): cabang dan rumus sama, elemen NaN -> 0."""
+    x = np.asarray(x, dtype=np.float64)
+    kind, params = shape[0], shape[1:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if kind == 'left_shoulder':
+            c, d = params
+            conditions = [x < c, (c <= x) & (x < d)]
+            choices = [1.0, (d - x) / (d - c)]
+        elif kind == 'right_shoulder':
+            a, b = params
+            conditions = [x > b, (a < x) & (x <= b)]
+            choices = [1.0, (x - a) / (b - a)]
+        else:
+            if kind == 'triangle':
+                a, b, d = params
+                c = b
+            elif kind == 'trapezoid':
+                a, b, c, d = params
+            else:
+                raise ValueError(f"Bentuk membership tidak dikenal: {kind}")
+            conditions = [(x < a) | (x > d), (a <= x) & (x < b), (b <= x) & (x <= c), (c < x) & (x <= d)]
+            choices = [0.0, (x - a) / (b - a), 1.0, (d - x) / (d - c)]
+        return np.select(conditions, choices, default=0.0)
+
+
+def combine_cf_array(cfs):
+    """combine_cf (MYCIN) elemen-per-elemen atas beberapa array CF dengan urutan yang sama."""
+    combined = None
+    for cf in cfs:
+        if combined is None:
+            combined = np.zeros_like(cf)
+        # Bukti +1 vs -1 (pembagi 0) tidak terdefinisi di MYCIN; dianggap saling meniadakan
+        denominator = 1 - np.minimum(np.abs(combined), np.abs(cf))
+        conflict = np.where(denominator == 0, 0.0, (combined + cf) / np.where(denominator == 0, 1.0, denominator))
+        combined = np.where(
+            (combined >= 0) & (cf >= 0), combined + cf * (1 - combined),
+            np.where((combined < 0) & (cf < 0), combined + cf * (1 + combined), conflict),
+        )
+    return combined
+
+
+class FuzzyEngine:
+    """
+    Inferensi fuzzy kecil atas variabel seduh (suhu, waktu, grind, rasio, dosis).
+
+    Membership function dan rule base adalah data (VARIABLES, RULES, atau JSON lewat
+    from_json). Satu nilai dievaluasi dengan Python biasa (fuzzify/infer), ribuan log
+    seduhan sekaligus dengan numpy (fuzzify_batch/infer_batch) untuk tuning KB offline.
+    Hasil inferensi adalah certainty factor per penyebab di troubleshooting KB:
+    kekuatan aturan = min membership antecedent, CF = kekuatan * CF aturan,
+    beberapa aturan digabung dengan combine_cf.
+    """
+
+    def __init__(self, variables=None, rules=None):
+        self.variables = variables or VARIABLES
+        self.rules = rules if rules is not None else RULES
+        for rule in self.rules:
+            for variable, term in rule['if']:
+                if term not in self.variables.get(variable, {}).get('terms', {}):
+                    raise ValueError(f"Aturan '{rule['then']}' memakai term tidak dikenal: {variable}.{term}")
+        self.conclusions = list(dict.fromkeys(rule['then'] for rule in self.rules))
+
+    @classmethod
+    def from_json(cls, path):
+        """{"variables": {...}, "rules": [...]} dengan format yang sama seperti VARIABLES/RULES."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        variables = {
+            name: dict(spec, terms={term: tuple(shape) for term, shape in spec['terms'].items()})
+            for name, spec in data['variables'].items()
+        }
+        rules = [dict(rule, **{'if': [tuple(antecedent) for antecedent in rule['if']]}) for rule in data['rules']]
+        return cls(variables, rules)
+
+    # --- SKALAR ---
+
+    def fuzzify(self, variable, value):
+        """{term: derajat keanggotaan} untuk satu nilai."""
+        return {term: membership(shape, value) for term, shape in self.variables[variable]['terms'].items()}
+
+    def infer(self, inputs):
+        """
+        {penyebab: CF} dari input {variabel: nilai}. Aturan yang menyentuh variabel tanpa
+        nilai tidak menyala; penyebab yang tidak punya aturan menyala tidak dimasukkan.
+        """
+        memberships = {name: self.fuzzify(name, value) for name, value in inputs.items()
+                       if name in self.variables and value is not None}
+        fired = {}
+        for rule in self.rules:
+            if not all(variable in memberships for variable, _ in rule['if']):
+                continue
+            strength = min(memberships[variable][term] for variable, term in rule['if'])
+            fired.setdefault(rule['then'], []).append(strength * rule['cf'])
+        return {conclusion: combine_cf(cfs) for conclusion, cfs in fired.items()}
+
+    def conclusions_for(self, variable):
+        """Penyebab yang bisa disimpulkan dari variabel ini saja (aturan satu antecedent)."""
+        return {rule['then'] for rule in self.rules if [v for v, _ in rule['if']] == [variable]}
+
+    # --- BATCH (NUMPY) ---
+
+    def fuzzify_batch(self, variable, values):
+        """{term: array membership} untuk array nilai (NaN = tidak diketahui -> 0)."""
+        return {term: membership_array(shape, values) for term, shape in self.variables[variable]['terms'].items()}
+
+    def infer_batch(self, columns):
+        """
+        {penyebab: array CF} untuk banyak seduhan sekaligus. `columns` = {variabel: array};
+        NaN berarti nilai tidak dicatat, sehingga aturan yang memakainya tidak menyala di baris itu.
+        """
+        columns = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items() if name in self.variables}
+        memberships = {name: self.fuzzify_batch(name, values) for name, values in columns.items()}
+        fired = {}
+        for rule in self.rules:
+            if not all(variable in memberships for variable, _ in rule['if']):
+                continue
+            strength = memberships[rule['if'][0][0]][rule['if'][0][1]]
+            for variable, term in rule['if'][1:]:
+                strength = np.minimum(strength, memberships[variable][term])
+            fired.setdefault(rule['then'], []).append(strength * rule['cf'])
+        return {conclusion: combine_cf_array(cfs) for conclusion, cfs in fired.items()}
+
+
+_default = None
+
+
+def default_engine():
+    global _default
+    if _default is None:
+        _default = FuzzyEngine()
+    return _default
+
+
+# --- CLI: skor log seduhan offline ---
+
+def load_brew_log(path):
+    """CSV/JSONL log seduhan -> (rows, {variabel: array}); kolom kosong/tidak ada -> NaN."""
+    if path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+    columns = {}
+    for name in VARIABLES:
+        values = [_number(row.get(name)) for row in rows]
+        if any(not math.isnan(value) for value in values):
+            columns[name] = np.array(values, dtype=np.float64)
+    return rows, columns
+
+
+def _number(value):
+    try:
+        return float(value) if value not in (None, '') else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def main():
+    """CLI: python -m src.core.fuzzy_engine LOG.csv [--out hasil.csv] -> CF penyebab per seduhan."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inferensi fuzzy batch atas log seduhan (tuning KB).")
+    parser.add_argument('log', help="CSV/JSONL dengan kolom temperature, brew_time, grind_size, ratio, dose.")
+    parser.add_argument('--rules', help="JSON variabel + aturan pengganti default.")
+    parser.add_argument('--out', help="Tulis CSV log + kolom cf_<penyebab>.")
+    parser.add_argument('--threshold', type=float, default=0.5, help="CF minimum untuk dihitung terkonfirmasi.")
+    args = parser.parse_args()
+
+    engine = FuzzyEngine.from_json(args.rules) if args.rules else default_engine()
+    rows, columns = load_brew_log(args.log)
+    results = engine.infer_batch(columns)
+
+    print(f"{len(rows)} seduhan, variabel: {', '.join(columns) or '-'}")
+    print(f"{'penyebab':<20} {'rata CF':>9} {'>= ' + str(args.threshold):>9}")
+    for conclusion, cfs in results.items():
+        print(f"{conclusion:<20} {cfs.mean():>9.3f} {int((cfs >= args.threshold).sum()):>9}")
+
+    if args.out:
+        fields = list(dict.fromkeys(key for row in rows for key in row)) + [f"cf_{c}" for c in results]
+        with open(args.out, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for i, row in enumerate(rows):
+                writer.writerow(dict(row, **{f"cf_{c}": round(float(cfs[i]), 6) for c, cfs in results.items()}))
+        print(f"\nHasil ditulis ke {args.out}")
+
+
+if __name__ == "__main__":
+    main()
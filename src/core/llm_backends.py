@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from src.utils import metrics, tracing
+from src.utils.logger import setup_logger
+
+logger = setup_logger("LLMBackends")
+
+CACHE_REQUESTS = metrics.counter(
+    "baristabox_llm_cache_requests", "Lookup rekaman LLM (replay) per hasil hit/miss.", ("backend", "result"),
+)
+
+
+class LLMBackend:
+    """
+    Antarmuka backend LLM. LLMService hanya bergantung pada method `generate`,
+    sehingga Gemini, backend lokal, maupun record/replay bisa dipertukarkan.
+    """
+
+    name = 'base'
+    # True untuk backend yang jawabannya sintetis (tidak layak disimpan sebagai konten nyata)
+    deterministic = False
+
+    def generate(self, prompt, timeout=None):
+        """Mengembalikan teks jawaban untuk `prompt`. Boleh melempar exception."""
+        raise NotImplementedError("Setiap backend harus punya method generate() sendiri.")
+
+
+class GeminiBackend(LLMBackend):
+    """Backend Google Gemini (google.generativeai)."""
+
+    name = 'gemini'
+
+    def __init__(self, api_key=None, model_name='gemini-2.5-flash', model=None):
+        if model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(model_name)
+        self.model = model
+
+    def generate(self, prompt, timeout=None):
+        request_options = {"timeout": timeout} if timeout is not None else None
+        response = self.model.generate_content(prompt, request_options=request_options)
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            tracing.current_span().set_attributes(
+                prompt_tokens=getattr(usage, 'prompt_token_count', None),
+                output_tokens=getattr(usage, 'candidates_token_count', None),
+            )
+        return response.text
+
+
+class LocalBackendError(Exception):
+    """Error sementara yang disuntikkan LocalBackend (diperlakukan seperti HTTP 503)."""
+    code = 503
+
+
+class LatencyModel:
+    """
+    Distribusi latensi (detik) yang bisa dikonfigurasi, deterministik lewat `seed`.
+    dist: 'fixed' (value) | 'uniform' (low, high) | 'normal' (mean, std) | 'lognormal' (median, sigma)
+    """
+
+    def __init__(self, dist='fixed', seed=0, **params):
+        self.dist = dist
+        self.params = params
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Bangun dari string 'dist:a,b' (mis. 'lognormal:0.8,0.5') atau angka (fixed, detik)."""
+        if spec is None or spec == '':
+            return cls('fixed', value=0.0)
+        if isinstance(spec, (int, float)):
+            return cls('fixed', value=float(spec))
+        dist, _, args = str(spec).partition(':')
+        values = [float(v) for v in args.split(',') if v]
+        names = {
+            'fixed': ['value'], 'uniform': ['low', 'high'],
+            'normal': ['mean', 'std'], 'lognormal': ['median', 'sigma'],
+        }[dist]
+        return cls(dist, **dict(zip(names, values)))
+
+    def sample(self):
+        p = self.params
+        with self._lock:
+            if self.dist == 'fixed':
+                value = p.get('value', 0.0)
+            elif self.dist == 'uniform':
+                value = self._rng.uniform(p['low'], p['high'])
+            elif self.dist == 'normal':
+                value = self._rng.gauss(p['mean'], p['std'])
+            elif self.dist == 'lognormal':
+                import math
+                value = self._rng.lognormvariate(math.log(p['median']), p['sigma'])
+            else:
+                raise ValueError(f"Distribusi latensi tidak dikenal: {self.dist}")
+        return max(0.0, value)
+
+
+def default_local_rules():
+    """
+    Aturan bawaan LocalBackend: meniru tugas-tugas prompt LLMService secara deterministik
+    (klasifikasi jawaban, ekstraksi preferensi, ekstraksi angka, SOP dari RAW DATA).
+    """
+    from src.core.llm_service import LLMService
+
+    def certainty(match):
+        return _certainty_category(LLMService.heuristic_certainty(match.group(1)))
+
+    def preferences(match):
+        return json.dumps(LLMService.heuristic_preferences(match.group(1)))
+
+    def number(match):
+        value = LLMService.heuristic_number(match.group(1))
+        return 'None' if value is None else str(value)
+
+    def raw_data(match):
+        return match.group(1).strip()
+
+    return [
+        (r'User Response: "(.*?)"', certainty),
+        (r'Extract taste preferences.*?Input: "(.*?)"', preferences),
+        (r"Extract the numerical value.*?Input: \"(.*?)\"", number),
+        (r'RAW DATA:(.*)', raw_data),
+    ]
+
+
+def _certainty_category(result):
+    """Balikkan (tipe, CF) ke kategori linguistik agar LLMService memetakannya ulang."""
+    mapping = {
+        ("YES", 1.0): "STRONG_YES", ("YES", 0.6): "MILD_YES",
+        ("NO", 0.6): "MILD_NO", ("NO", 1.0): "STRONG_NO",
+    }
+    return mapping.get(result, "UNSURE")
+
+
+class LocalBackend(LLMBackend):
+    """
+    Backend lokal deterministik untuk CI dan load test (tanpa jaringan).
+    - `rules`: list (regex, response) dicek berurutan; response berupa string template
+      (`{0}`, `{1}` = grup regex) atau callable(match) -> str.
+    - `latency`: LatencyModel / spec string untuk mensimulasikan waktu respons.
+    - `error_rate`: peluang melempar LocalBackendError (503) untuk uji resiliensi.
+    """
+
+    name = 'local'
+    deterministic = True
+
+    def __init__(self, rules=None, default_response="OK", latency=None, error_rate=0.0, seed=0, sleep=time.sleep):
+        rules = default_local_rules() if rules is None else rules
+        self.rules = [(re.compile(pattern, re.DOTALL), response) for pattern, response in rules]
+        self.default_response = default_response
+        self.latency = latency if isinstance(latency, LatencyModel) else LatencyModel.from_spec(latency)
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._sleep = sleep
+        self.call_count = 0
+
+    def _render(self, prompt):
+        for pattern, response in self.rules:
+            match = pattern.search(prompt)
+            if match:
+                if callable(response):
+                    return response(match)
+                return response.format(*match.groups())
+        return self.default_response
+
+    def generate(self, prompt, timeout=None):
+        self.call_count += 1
+        delay = self.latency.sample()
+        if timeout is not None and delay > timeout:
+            self._sleep(timeout)
+            raise TimeoutError("LocalBackend simulated latency exceeded timeout")
+        if delay:
+            self._sleep(delay)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise LocalBackendError("Injected transient error")
+        return self._render(prompt)
+
+
+class ReplayMissError(Exception):
+    """Prompt tidak ditemukan di rekaman saat mode replay."""
+
+
+class RecordReplayBackend(LLMBackend):
+    """
+    Backend record/replay berbasis file JSONL ({key, prompt, response} per baris).
+    - mode 'record': meneruskan ke `inner` lalu menyimpan jawaban.
+    - mode 'replay': menjawab dari rekaman; prompt yang tidak ada -> ReplayMissError,
+      atau diteruskan ke `inner` jika disediakan.
+    """
+
+    name = 'replay'
+
+    def __init__(self, path, mode='replay', inner=None):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Mode tidak dikenal: {mode}")
+        if mode == 'record' and inner is None:
+            raise ValueError("Mode record membutuhkan backend `inner`.")
+        self.path = path
+        self.mode = mode
+        self.inner = inner
+        self._lock = threading.Lock()
+        self.recordings = self._load()
+
+    @staticmethod
+    def key_for(prompt):
+        return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+    def _load(self):
+        recordings = {}
+        if not os.path.exists(self.path):
+            return recordings
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    recordings[entry['key']] = entry['response']
+        logger.info(f"Memuat {len(recordings)} rekaman LLM dari {self.path}")
+        return recordings
+
+    def generate(self, prompt, timeout=None):
+        key = self.key_for(prompt)
+        if self.mode == 'replay':
+            hit = key in self.recordings
+            tracing.current_span().set_attribute('cache_hit', hit)
+            CACHE_REQUESTS.inc(backend=self.name, result='hit' if hit else 'miss')
+            if hit:
+                return self.recordings[key]
+            if self.inner is None:
+                raise ReplayMissError(f"Tidak ada rekaman untuk prompt {key[:12]}")
+            return self.inner.generate(prompt, timeout=timeout)
+
+        response = self.inner.generate(prompt, timeout=timeout)
+        with self._lock:
+            self.recordings[key] = response
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, 'prompt': prompt, 'response': response}) + "\n")
+        return response
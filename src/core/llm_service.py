@@ -1,13 +1,50 @@
-import google.generativeai as genai
 import streamlit as st
 import os
+import re
+import time
+from src.core.deadline import Deadline
+from src.core.llm_backends import LLMBackend, GeminiBackend, LocalBackend, RecordReplayBackend
+from src.core.resilience import (
+    TokenBucket, CircuitBreaker, RetryPolicy, CircuitOpenError, RateLimitedError,
+    is_transient_error,
+)
+from src.utils import metrics, tracing
 from src.utils.logger import setup_logger
 
 logger = setup_logger("LLMService")
 
+LLM_REQUESTS = metrics.counter(
+    "baristabox_llm_requests", "LLM requests per step and outcome (ok, error, shed, breaker_open, unavailable).",
+    ("step", "outcome"),
+)
+LLM_SECONDS = metrics.histogram("baristabox_llm_request_duration_seconds", "LLM call latency incl. retries.", ("step",))
+
+
+def _env_float(name, default):
+    """Read a numeric setting from the environment, falling back to the default."""
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid value for {name}, using default {default}.")
+        return float(default)
+
+
 class LLMService:
     _instance = None
 
+    # Default fallback message when no deterministic fallback is supplied by the caller
+    DEFAULT_FALLBACK = "I'm having trouble thinking right now. Please try again later."
+
+    # Vocabulary for the keyword-based preference fallback (used when the LLM is unavailable)
+    FLAVOR_VOCABULARY = [
+        'fruity', 'floral', 'bright', 'sweet', 'chocolate', 'nutty', 'earthy', 'bold',
+        'spicy', 'bitter', 'sour', 'acidic', 'smooth', 'balanced', 'complex', 'caramel',
+        'citrus', 'berry', 'creamy', 'clean', 'juicy', 'herbal', 'smoky', 'strong', 'mild',
+    ]
+    NEGATION_WORDS = {'not', 'no', 'without', 'hate', 'avoid', "don't", 'dont', 'never', 'less'}
+    MODERATE_WORDS = {'maybe', 'bit', 'hint', 'hints', 'slightly', 'little', 'somewhat'}
+    CLAUSE_BREAKS = {'but', 'and', 'or', 'tapi', 'dan'}
+
     def __new__(cls):
         """Singleton implementation."""
         if cls._instance is None:
@@ -16,7 +53,38 @@ class LLMService:
         return cls._instance
 
     def _initialize(self):
-        """Setup connection to Gemini API."""
+        """
+        Select the LLM backend from LLM_BACKEND (gemini | local | record | replay).
+        - local : deterministic scripted backend, latency from LLM_LOCAL_LATENCY (e.g. 'lognormal:0.8,0.5').
+        - record: Gemini (or local when no API key) recorded to LLM_REPLAY_PATH.
+        - replay: answers served from LLM_REPLAY_PATH only.
+        """
+        self._setup_resilience()
+        self.backend = None
+        mode = os.environ.get("LLM_BACKEND", "gemini").lower()
+        replay_path = os.environ.get("LLM_REPLAY_PATH", "datasets/llm_recordings.jsonl")
+
+        if mode == "local":
+            self.backend = self._build_local_backend()
+        elif mode == "replay":
+            self.backend = RecordReplayBackend(replay_path, mode="replay")
+        else:
+            self.backend = self._build_gemini_backend()
+            if mode == "record":
+                inner = self.backend or self._build_local_backend()
+                self.backend = RecordReplayBackend(replay_path, mode="record", inner=inner)
+        if self.backend is not None:
+            logger.info(f"LLMService using backend: {self.backend.name}")
+
+    @staticmethod
+    def _build_local_backend():
+        return LocalBackend(
+            latency=os.environ.get("LLM_LOCAL_LATENCY"),
+            error_rate=_env_float("LLM_LOCAL_ERROR_RATE", 0.0),
+        )
+
+    def _build_gemini_backend(self):
+        """Setup connection to Gemini API. Returns None when no key is configured."""
         try:
             # Try getting API Key from Streamlit Secrets or Environment Variable
             api_key = None
@@ -30,33 +98,167 @@ class LLMService:
             
             if not api_key:
                 logger.warning("GEMINI_API_KEY not found. AI features will be disabled.")
-                self.model = None
-                return
+                return None
 
-            genai.configure(api_key=api_key)
             # Using flash model for speed and cost-efficiency
-            self.model = genai.GenerativeModel('gemini-2.5-flash') 
+            backend = GeminiBackend(api_key=api_key, model_name='gemini-2.5-flash')
             logger.info("LLMService initialized successfully with Gemini-2.5-Flash.")
+            return backend
             
         except Exception as e:
             logger.error(f"Failed to initialize LLMService: {e}")
-            self.model = None
+            return None
 
-    def generate_response(self, prompt, context=""):
+    def use_backend(self, backend):
+        """Swap the backend at runtime (tests, load harness, failover). Resets the breaker."""
+        self.backend = backend
+        self.breaker.record_success()
+        logger.info(f"LLMService switched to backend: {backend.name if backend else 'None'}")
+
+    @property
+    def model(self):
+        """Backward-compatible alias: the active backend, or None when AI is disabled."""
+        return self.backend
+
+    @model.setter
+    def model(self, value):
+        # Legacy: a raw model object (e.g. GenerativeModel or a mock) is wrapped as a Gemini backend
+        if value is None or isinstance(value, LLMBackend):
+            self.backend = value
+        else:
+            self.backend = GeminiBackend(model=value)
+
+    def _setup_resilience(self):
         """
-        Safe wrapper for content generation.
-        Returns response string or default error message.
+        Rate limiter, retry policy and circuit breaker, configured via environment:
+        LLM_RATE_PER_SEC, LLM_BURST, LLM_MAX_RETRIES, LLM_CALL_TIMEOUT,
+        LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN.
         """
-        if not self.model:
-            return "Sorry, connection to the AI brain is currently unavailable (Missing API Key)."
+        self.call_timeout = _env_float("LLM_CALL_TIMEOUT", 20.0)
+        # Minimum remaining turn budget needed to attempt a live call (see Deadline)
+        self.min_call_budget = _env_float("LLM_MIN_BUDGET", 1.0)
+        self.rate_limiter = TokenBucket(
+            rate=_env_float("LLM_RATE_PER_SEC", 5.0),
+            capacity=_env_float("LLM_BURST", 10.0),
+        )
+        self.retry_policy = RetryPolicy(max_retries=int(_env_float("LLM_MAX_RETRIES", 2)))
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(_env_float("LLM_BREAKER_THRESHOLD", 5)),
+            reset_timeout=_env_float("LLM_BREAKER_COOLDOWN", 30.0),
+        )
 
+    def is_available(self):
+        """
+        True if a live LLM call can be attempted right now.
+        Agents use this to switch to deterministic fallbacks while the breaker is open.
+        """
+        return self.backend is not None and not self.breaker.is_open()
+
+    def _has_budget(self, step):
+        """
+        Check the active turn Deadline. When the remaining budget is too short for a
+        live call, the step is recorded as shed and the caller must use its cheap path.
+        """
+        deadline = Deadline.current()
+        if deadline is not None and not deadline.allows(self.min_call_budget):
+            deadline.shed(step)
+            return False
+        return True
+
+    def _call_backend(self, full_prompt, timeout=None):
+        """
+        Call the backend with rate limiting, bounded retries (jittered backoff) and a
+        per-call deadline that covers all attempts. Raises on final failure.
+        The breaker sees one outcome per logical call, not one per attempt.
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Circuit breaker is open")
+        deadline = time.monotonic() + (timeout if timeout is not None else self.call_timeout)
+        attempt = 0
+        backend_failed = False
         try:
-            full_prompt = f"{context}\n\n{prompt}" if context else prompt
-            response = self.model.generate_content(full_prompt)
-            return response.text
-        except Exception as e:
-            logger.error(f"Error calling Gemini: {e}")
-            return "I'm having trouble thinking right now. Please try again later."
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("LLM call deadline exceeded")
+                if not self.rate_limiter.acquire(timeout=remaining):
+                    raise RateLimitedError("Rate limit wait exceeds the call deadline")
+
+                try:
+                    remaining = max(deadline - time.monotonic(), 0.001)
+                    tracing.current_span().set_attribute('attempts', attempt + 1)
+                    text = self.backend.generate(full_prompt, timeout=remaining)
+                except Exception as e:
+                    # Permanent errors (blocked prompt / bad request) are not retried
+                    if not is_transient_error(e):
+                        raise
+                    backend_failed = True
+                    if attempt >= self.retry_policy.max_retries:
+                        raise
+                    delay = self.retry_policy.backoff(attempt, e)
+                    if time.monotonic() + delay >= deadline:
+                        raise
+                    logger.warning("Transient LLM error (%s), retry %d in %.2fs", type(e).__name__, attempt + 1, delay)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                self.breaker.record_success()
+                return text
+        except Exception:
+            if backend_failed:
+                self.breaker.record_failure()
+            else:
+                # The service answered (4xx) or we gave up locally: not an outage, not a recovery
+                self.breaker.release()
+            raise
+
+    def generate_response(self, prompt, context="", fallback=None, timeout=None, step="llm.generate"):
+        """
+        Safe wrapper for content generation.
+        Returns response string, or `fallback` (default: error message) when the
+        model is missing, the breaker is open, all retries failed, or the turn
+        Deadline has no budget left (the `step` is then logged as shed).
+        """
+        if fallback is None:
+            fallback = self.DEFAULT_FALLBACK
+        if self.backend is None:
+            LLM_REQUESTS.inc(step=step, outcome='unavailable')
+            if fallback is self.DEFAULT_FALLBACK:
+                return "Sorry, connection to the AI brain is currently unavailable (Missing API Key)."
+            return fallback
+
+        with tracing.span("llm.call", step=step, backend=self.backend.name) as span:
+            if not self._has_budget(step):
+                span.set_attribute('outcome', 'shed')
+                LLM_REQUESTS.inc(step=step, outcome='shed')
+                return fallback
+
+            # The call may never outlive the turn
+            deadline = Deadline.current()
+            if deadline is not None:
+                budget = self.call_timeout if timeout is None else timeout
+                timeout = min(budget, deadline.remaining())
+
+            started = time.perf_counter()
+            try:
+                full_prompt = f"{context}\n\n{prompt}" if context else prompt
+                text = self._call_backend(full_prompt, timeout=timeout)
+                LLM_SECONDS.observe(time.perf_counter() - started, step=step)
+                LLM_REQUESTS.inc(step=step, outcome='ok')
+                # Exact token counts are added by backends that report them (see GeminiBackend)
+                span.set_attributes(outcome='ok', prompt_chars=len(full_prompt), response_chars=len(text or ''))
+                return text
+            except CircuitOpenError:
+                LLM_REQUESTS.inc(step=step, outcome='breaker_open')
+                span.set_attribute('outcome', 'breaker_open')
+                logger.warning("Circuit breaker open, serving fallback response.")
+                return fallback
+            except Exception as e:
+                LLM_SECONDS.observe(time.perf_counter() - started, step=step)
+                LLM_REQUESTS.inc(step=step, outcome='error')
+                span.set_attributes(outcome='error', error=type(e).__name__)
+                logger.error(f"Error calling LLM backend: {e}")
+                return fallback
 
     def interpret_certainty(self, user_input, question_context):
         """
@@ -68,8 +270,8 @@ class LLMService:
         Where ANSWER_TYPE: 'YES', 'NO', 'UNSURE'
         Where CF_VALUE: 0.0 to 1.0
         """
-        if not self.model:
-            return "UNSURE", 0.0
+        if not self.is_available() or not self._has_budget("llm.interpret_certainty"):
+            return self.heuristic_certainty(user_input)
 
         # Definition of Categories for LLM (Now in English)
         system_prompt = f"""
@@ -91,38 +293,66 @@ class LLMService:
         
         try:
             # 1. Get Linguistic Classification from LLM
-            category = self.generate_response(system_prompt).strip().upper()
+            category = self.generate_response(system_prompt, fallback="", step="llm.interpret_certainty").strip().upper()
+            if not category:
+                return self.heuristic_certainty(user_input)
             
             # Cleanup punctuation just in case
             category = category.replace('.', '').replace("'", "").replace('"', '')
 
             # 2. Python Mapping (Deterministic Logic)
-            # Format: CATEGORY -> (Logic Type, CF Value)
-            cf_mapping = {
-                "STRONG_YES": ("YES", 1.0),  # Very Certain
-                "MILD_YES":   ("YES", 0.6),  # Somewhat Certain
-                "UNSURE":     ("UNSURE", 0.0),
-                "MILD_NO":    ("NO", 0.6),   # Somewhat Certain Not
-                "STRONG_NO":  ("NO", 1.0)    # Very Certain Not
-            }
-            
-            # Return mapping result, default to UNSURE if LLM hallucinates
-            result = cf_mapping.get(category, ("UNSURE", 0.0))
+            result = self._map_category(category)
             
             # Log for debugging (Traceability)
-            logger.debug(f"Input: '{user_input}' -> Category: {category} -> Result: {result}")
+            logger.debug("Input: '%.200s' -> Category: %s -> Result: %s", user_input, category, result)
             
             return result
 
         except Exception as e:
             logger.error(f"Failed to interpret certainty: {e}")
             return "UNSURE", 0.0
+
+    @staticmethod
+    def _map_category(category):
+        """Map a linguistic category to (Logic Type, CF Value). Unknown -> UNSURE."""
+        cf_mapping = {
+            "STRONG_YES": ("YES", 1.0),  # Very Certain
+            "MILD_YES":   ("YES", 0.6),  # Somewhat Certain
+            "UNSURE":     ("UNSURE", 0.0),
+            "MILD_NO":    ("NO", 0.6),   # Somewhat Certain Not
+            "STRONG_NO":  ("NO", 1.0)    # Very Certain Not
+        }
+        # Return mapping result, default to UNSURE if LLM hallucinates
+        return cf_mapping.get(category, ("UNSURE", 0.0))
+
+    @classmethod
+    def heuristic_certainty(cls, user_input):
+        """
+        Deterministic fallback for interpret_certainty (no LLM).
+        Checks phrases from the most specific to the most generic.
+        """
+        text = f" {(user_input or '').lower()} "
+        text = re.sub(r"[^\w' ]", " ", text)
+        rules = [
+            ("UNSURE", ["don't know", "dont know", "not sure", "unsure", "no idea", "hard to tell", "nggak tau", "gak tau"]),
+            ("MILD_NO", ["don't think", "dont think", "probably not", "doubt"]),
+            ("MILD_YES", ["think so", "maybe", "a bit", "a little", "looks like", "kind of", "mungkin"]),
+            ("STRONG_NO", [" no ", " nope ", " not ", " never ", " wrong ", " tidak ", " nggak ", " bukan "]),
+            ("STRONG_YES", [" yes ", " yeah ", " yep ", " definitely ", " exactly ", " correct ", " iya ", " ya "]),
+        ]
+        for category, phrases in rules:
+            if any(p in text for p in phrases):
+                return cls._map_category(category)
+        return cls._map_category("UNSURE")
         
     def extract_weighted_preferences(self, user_input):
         """
         KHUSUS SOMMELIER: Mengubah input natural menjadi dictionary bobot.
         Contoh: "I want fruity but not bitter" -> {"fruity": 1.0, "bitter": -1.0}
         """
+        if not self.is_available() or not self._has_budget("llm.extract_preferences"):
+            return self.heuristic_preferences(user_input)
+
         system_prompt = f"""
         Task: Extract taste preferences and assign a weight (-1.0 to 1.0).
         Input: "{user_input}"
@@ -137,7 +367,9 @@ class LLMService:
         Example: {{"fruity": 1.0, "nutty": 0.5, "bitter": -1.0}}
         """
         try:
-            response = self.generate_response(system_prompt).strip()
+            response = self.generate_response(system_prompt, fallback="", step="llm.extract_preferences").strip()
+            if not response:
+                return self.heuristic_preferences(user_input)
             # Bersihkan markdown json jika ada
             response = response.replace("```json", "").replace("```", "")
             import json
@@ -146,19 +378,58 @@ class LLMService:
             logger.error(f"Weighted extraction failed: {e}")
             return {}
 
+    @classmethod
+    def heuristic_preferences(cls, user_input):
+        """
+        Deterministic fallback for extract_weighted_preferences (no LLM).
+        A flavor word preceded (within 3 words, same clause) by a negation gets -1.0,
+        by a moderating word 0.5, otherwise 1.0.
+        """
+        words = re.findall(r"[\w']+", (user_input or '').lower())
+        prefs = {}
+        for i, word in enumerate(words):
+            for flavor in cls.FLAVOR_VOCABULARY:
+                if word.startswith(flavor) or (len(word) >= 4 and flavor.startswith(word)):
+                    window = set()
+                    for prev in reversed(words[max(0, i - 3):i]):
+                        if prev in cls.CLAUSE_BREAKS:
+                            break
+                        window.add(prev)
+                    if window & cls.NEGATION_WORDS:
+                        prefs[flavor] = -1.0
+                    elif window & cls.MODERATE_WORDS:
+                        prefs[flavor] = 0.5
+                    else:
+                        prefs[flavor] = 1.0
+                    break
+        return prefs
+
     def extract_numerical_value(self, user_input, parameter_name):
         """
         KHUSUS FUZZY LOGIC: Mengekstrak angka dari teks.
         Contoh: "Sekitar 88 derajat" -> 88.0
         """
+        if not self.is_available() or not self._has_budget("llm.extract_number"):
+            return self.heuristic_number(user_input)
+
         system_prompt = f"""
         Task: Extract the numerical value for '{parameter_name}' from the text.
         Input: "{user_input}"
         Output: ONLY the number (int or float). If no number found, output 'None'.
         """
         try:
-            val = self.generate_response(system_prompt).strip()
+            val = self.generate_response(system_prompt, fallback="", step="llm.extract_number").strip()
+            if not val:
+                return self.heuristic_number(user_input)
             if val.lower() == 'none': return None
             return float(val)
         except:
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def heuristic_number(user_input):
+        """Deterministic fallback for extract_numerical_value: first number in the text."""
+        match = re.search(r"-?\d+(?:[.,]\d+)?", user_input or '')
+        if not match:
+            return None
+        return float(match.group(0).replace(',', '.'))
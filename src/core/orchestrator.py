@@ -0,0 +1,63 @@
+import os
+from src.core.blackboard import Blackboard
+from src.core.deadline import Deadline
+from src.core.scheduler import AgentScheduler
+from src.utils import metrics, tracing
+from src.utils.logger import setup_logger
+
+logger = setup_logger("Orchestrator")
+
+TURNS = metrics.counter("baristabox_turns", "Turn yang diproses, per intent akhir.", ("intent",))
+TURN_SECONDS = metrics.histogram("baristabox_turn_duration_seconds", "Durasi satu siklus agen.")
+SHED_STEPS = metrics.counter("baristabox_shed_steps", "Langkah yang turun ke jalur murah karena anggaran turn.", ("step",))
+
+
+class Orchestrator:
+    """
+    Menjalankan satu siklus agen (Intent -> Sommelier -> Brewer -> Doctor) per turn.
+    Setiap turn mendapat Deadline sendiri (TURN_BUDGET_SECONDS) yang dibaca oleh
+    agen dan LLMService untuk turun ke jalur murah saat waktu hampir habis.
+    """
+
+    def __init__(self, intent_agent, doctor_agent, sommelier_agent, brewer_agent, turn_budget=None):
+        self.intent_agent = intent_agent
+        self.doctor_agent = doctor_agent
+        self.sommelier_agent = sommelier_agent
+        self.brewer_agent = brewer_agent
+        if turn_budget is None:
+            turn_budget = float(os.environ.get("TURN_BUDGET_SECONDS", 8.0))
+        self.turn_budget = turn_budget
+        # Urutan registrasi = urutan pemutus seri; dependensi tiap agen dideklarasikan di agen
+        self.scheduler = AgentScheduler([intent_agent, sommelier_agent, brewer_agent, doctor_agent])
+
+    def run_cycle(self, board=None):
+        """
+        Siklus kerja agen untuk pesan user terakhir di Blackboard.
+        `board` diikat ke semua agen selama turn, sehingga satu set agen bisa
+        melayani banyak sesi (backend memory/sqlite).
+        Return Deadline turn ini (berisi daftar langkah yang di-shed).
+        """
+        board = board or Blackboard()
+        deadline = Deadline(self.turn_budget)
+
+        session_id = getattr(board.state, 'session_id', None)
+        with deadline, board.bind(), tracing.get_tracer().start_trace('turn', session=str(session_id)) as span:
+            # Pesan user baru adalah event pemicu turn; sisanya dipicu oleh tulisan agen
+            activated = self.scheduler.run(board, changed_keys=(Blackboard.KEY_LAST_INPUT,))
+            span.set_attributes(
+                budget_s=self.turn_budget,
+                agents=','.join(activated),
+                intent=str(board.get_intent()),
+                shed=','.join(deadline.shed_steps),
+            )
+
+        TURNS.inc(intent=board.get_intent() or 'none')
+        TURN_SECONDS.observe(deadline.elapsed())
+        for step in deadline.shed_steps:
+            SHED_STEPS.inc(step=step)
+
+        if deadline.shed_steps:
+            logger.warning("Turn selesai dalam %.2fs (%s), shed: %s", deadline.elapsed(), activated, deadline.shed_steps)
+        else:
+            logger.info("Turn selesai dalam %.2fs (%s)", deadline.elapsed(), activated)
+        return deadline
@@ -0,0 +1,190 @@
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.logger import setup_logger
+
+logger = setup_logger("QuestionPlanner")
+
+STATS_VERSION = 1
+
+
+def combine_cf(cfs):
+    """Kombinasi certainty factor ala MYCIN untuk beberapa bukti atas hipotesis yang sama."""
+    combined = 0.0
+    for cf in cfs:
+        if combined >= 0 and cf >= 0:
+            combined = combined + cf * (1 - combined)
+        elif combined < 0 and cf < 0:
+            combined = combined + cf * (1 + combined)
+        else:
+            combined = (combined + cf) / (1 - min(abs(combined), abs(cf)))
+    return combined
+
+
+def binary_entropy(p):
+    if p <= 0.0 or p >= 1.0:
+        return 0.0
+    return -(p * math.log2(p) + (1 - p) * math.log2(1 - p))
+
+
+class QuestionPlanner:
+    """
+    Menentukan urutan pertanyaan diagnosis DoctorAgent dan kapan boleh berhenti.
+
+    Prior diambil dari statistik hasil diagnosis yang dicatat (DIAGNOSIS_STATS_PATH):
+      { "version": 1, "problems": { problem: { "sessions": n, "unresolved": m,
+                                               "causes": { cause: {"asked": a, "confirmed": k} } } } }
+    P(cause terkonfirmasi) = (k + 1) / (a + 2)  (Laplace smoothing; a = berapa kali ditanyakan,
+    sehingga penyebab yang dilewati karena berhenti dini tidak dihitung sebagai "ditolak").
+
+    Mode urutan (DIAGNOSIS_QUESTION_ORDER):
+      info_gain (default) -> greedy: pertanyaan dengan information gain terbesar atas distribusi
+                             "akar masalah" (penyebab + 'tidak ada'), dievaluasi ulang setelah
+                             setiap penyebab diasumsikan ditolak
+      prior               -> prior terbesar dulu
+      static              -> urutan JSON knowledge base (perilaku lama)
+    Tanpa data, semua prior sama sehingga urutan stabil = urutan JSON.
+
+    Berhenti dini saat kombinasi CF (MYCIN) dari penyebab terkonfirmasi >= DIAGNOSIS_CF_THRESHOLD.
+    Satu jawaban pasti (STRONG_YES, CF 1.0) sengaja langsung menghentikan diagnosis: user sudah
+    mengonfirmasi akar masalah. Kombinasi MYCIN berperan untuk jawaban moderat
+    (MILD_YES 0.6 atau CF fuzzy): empat kali 0.6 -> 0.97.
+
+    Statistik ditulis ulang ke file oleh satu thread latar belakang (bukan di jalur request);
+    beberapa hasil yang masuk selama penulisan digabung ke satu penulisan berikutnya.
+    """
+
+    MODES = ('info_gain', 'prior', 'static')
+
+    def __init__(self, stats_path=None, mode=None, cf_threshold=None):
+        self.stats_path = stats_path or os.environ.get("DIAGNOSIS_STATS_PATH", "datasets/diagnosis_outcomes.json")
+        mode = (mode or os.environ.get("DIAGNOSIS_QUESTION_ORDER", "info_gain")).lower()
+        if mode not in self.MODES:
+            logger.warning(f"DIAGNOSIS_QUESTION_ORDER '{mode}' tidak dikenal, memakai info_gain.")
+            mode = 'info_gain'
+        self.mode = mode
+        if cf_threshold is None:
+            cf_threshold = float(os.environ.get("DIAGNOSIS_CF_THRESHOLD", 0.95))
+        self.cf_threshold = cf_threshold
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._save_pending = False
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diagnosis-stats")
+        self.stats = self._load()
+
+    # --- STATISTIK ---
+
+    def _load(self):
+        if not os.path.exists(self.stats_path):
+            return {}
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Gagal membaca statistik diagnosis {self.stats_path}: {e}")
+            return {}
+        if data.get('version') != STATS_VERSION:
+            logger.warning(f"Versi statistik diagnosis {data.get('version')} diabaikan.")
+            return {}
+        return data.get('problems', {})
+
+    def _save(self):
+        # Snapshot diambil di dalam _write_lock sehingga penulis terakhir selalu membawa data terbaru
+        with self._write_lock:
+            with self._lock:
+                self._save_pending = False
+                payload = json.dumps({'version': STATS_VERSION, 'problems': self.stats}, indent=2)
+            try:
+                directory = os.path.dirname(os.path.abspath(self.stats_path))
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                os.replace(tmp_path, self.stats_path)
+            except OSError as e:
+                logger.error(f"Gagal menyimpan statistik diagnosis: {e}")
+
+    def flush(self):
+        """Tunggu sampai statistik terbaru tertulis ke file."""
+        self._writer.submit(self._save).result()
+
+    def record_outcome(self, problem_key, asked_causes, confirmed_causes, persist=True):
+        """Catat hasil satu sesi diagnosis (dipanggil saat SYNTHESIZE_RESULTS; penulisan file di latar belakang)."""
+        schedule = False
+        with self._lock:
+            problem = self.stats.setdefault(problem_key, {'sessions': 0, 'unresolved': 0, 'causes': {}})
+            problem['sessions'] += 1
+            if not confirmed_causes:
+                problem['unresolved'] += 1
+            for cause in asked_causes:
+                counts = problem['causes'].setdefault(cause, {'asked': 0, 'confirmed': 0})
+                counts['asked'] += 1
+                if cause in confirmed_causes:
+                    counts['confirmed'] += 1
+            if persist and not self._save_pending:
+                self._save_pending = schedule = True
+        if schedule:
+            self._writer.submit(self._save)
+
+    def prior(self, problem_key, cause_key):
+        counts = self.stats.get(problem_key, {}).get('causes', {}).get(cause_key, {})
+        return (counts.get('confirmed', 0) + 1.0) / (counts.get('asked', 0) + 2.0)
+
+    def _unresolved_prior(self, problem_key):
+        problem = self.stats.get(problem_key, {})
+        return (problem.get('unresolved', 0) + 1.0) / (problem.get('sessions', 0) + 2.0)
+
+    # --- PERENCANAAN ---
+
+    def plan(self, problem_key, causes):
+        """
+        `causes` = dict {cause_key: cause_data} dari knowledge base.
+        Return list [(cause_key, cause_data)] dalam urutan tanya.
+        """
+        items = list(causes.items())
+        if self.mode == 'static' or len(items) < 2:
+            return items
+
+        priors = [self.prior(problem_key, key) for key, _ in items]
+        if self.mode == 'prior':
+            order = sorted(range(len(items)), key=lambda i: (-priors[i], i))
+        else:
+            order = self._greedy_information_gain(priors, self._unresolved_prior(problem_key))
+
+        planned = [items[i] for i in order]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Urutan pertanyaan '%s' (%s): %s", problem_key, self.mode, [k for k, _ in planned])
+        return planned
+
+    @staticmethod
+    def _greedy_information_gain(weights, none_weight):
+        """
+        Distribusi akar masalah ∝ bobot tiap penyebab + bobot 'tidak ada'.
+        Pertanyaan "apakah penyebabnya c?" memberi gain H(π) - (1-π_c)·H(π|tidak) = h(π_c),
+        jadi cukup pilih π_c (ter-normalisasi atas sisa kandidat) yang paling dekat 0.5.
+        Seri diputus oleh urutan knowledge base.
+        """
+        remaining = list(range(len(weights)))
+        order = []
+        while remaining:
+            mass = sum(weights[i] for i in remaining) + none_weight
+            best = max(remaining, key=lambda i: (binary_entropy(weights[i] / mass), -i))
+            order.append(best)
+            remaining.remove(best)
+        return order
+
+    def should_stop(self, evidence, causes=None):
+        """
+        True jika bukti penyebab terkonfirmasi sudah cukup yakin untuk langsung menyimpulkan.
+        `causes` membatasi bukti ke penyebab diagnosis yang sedang berjalan (evidence sesi
+        bertahan lintas topik, jadi konfirmasi dari diagnosis lama tidak boleh ikut dihitung).
+        """
+        if causes is not None:
+            evidence = {f'confirmed_cause_{cause}': evidence[f'confirmed_cause_{cause}']
+                        for cause in causes if f'confirmed_cause_{cause}' in evidence}
+        cfs = [v for k, v in evidence.items() if k.startswith('confirmed_cause_')]
+        return bool(cfs) and combine_cf(cfs) >= self.cf_threshold
@@ -0,0 +1,198 @@
+import random
+import threading
+import time
+from src.utils.logger import setup_logger
+
+logger = setup_logger("Resilience")
+
+
+# Nama kelas exception (google.api_core / requests / stdlib) yang dianggap sementara.
+# Dicek berdasarkan nama agar modul ini tidak bergantung langsung ke SDK tertentu.
+TRANSIENT_ERROR_NAMES = {
+    'ServiceUnavailable', 'DeadlineExceeded', 'InternalServerError', 'BadGateway',
+    'GatewayTimeout', 'TooManyRequests', 'ResourceExhausted', 'Aborted',
+    'TimeoutError', 'timeout', 'ConnectionError', 'ConnectionResetError',
+    'ConnectionRefusedError', 'RemoteDisconnected', 'URLError', 'IncompleteRead',
+}
+QUOTA_ERROR_NAMES = {'TooManyRequests', 'ResourceExhausted'}
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def _status_code(error):
+    """Mengambil kode HTTP dari exception jika tersedia (api_core memakai `.code`)."""
+    for attr in ('code', 'status', 'status_code'):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_quota_error(error):
+    """True jika error menandakan kuota/rate limit habis (HTTP 429)."""
+    return type(error).__name__ in QUOTA_ERROR_NAMES or _status_code(error) == 429
+
+
+def is_transient_error(error):
+    """
+    Menentukan apakah error layak di-retry.
+    Error permanen (API key salah, prompt diblokir, dsb.) tidak di-retry.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return True
+    return _status_code(error) in TRANSIENT_STATUS_CODES
+
+
+class CircuitOpenError(Exception):
+    """Dilempar saat circuit breaker terbuka (panggilan ditolak tanpa mencoba)."""
+
+
+class RateLimitedError(Exception):
+    """Dilempar saat token bucket kosong dan waktu tunggu melewati deadline."""
+
+
+class TokenBucket:
+    """
+    Rate limiter Token Bucket (thread-safe).
+    `rate` token diisi ulang per detik, maksimal `capacity` token (burst).
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self._last
+        self._last = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def try_acquire(self, tokens=1.0):
+        """Ambil token tanpa menunggu. Return waktu tunggu (0.0 jika berhasil)."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            if self.rate <= 0:
+                return float('inf')
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1.0, timeout=None):
+        """
+        Menunggu sampai token tersedia.
+        Return False jika token tidak bisa didapat dalam `timeout` detik.
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return True
+            if timeout is not None and waited + wait > timeout:
+                return False
+            self._sleep(wait)
+            waited += wait
+
+
+class CircuitBreaker:
+    """
+    Circuit Breaker klasik dengan tiga state: CLOSED -> OPEN -> HALF_OPEN.
+    - CLOSED   : panggilan normal, kegagalan beruntun dihitung.
+    - OPEN     : semua panggilan langsung ditolak (fail fast) selama `reset_timeout`.
+    - HALF_OPEN: satu panggilan percobaan diizinkan; sukses -> CLOSED, gagal -> OPEN.
+    """
+
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+            logger.info("Circuit breaker HALF_OPEN: mengizinkan satu panggilan percobaan.")
+        return self._state
+
+    def is_open(self):
+        """True jika panggilan saat ini akan ditolak."""
+        with self._lock:
+            state = self._current_state()
+            return state == self.OPEN or (state == self.HALF_OPEN and self._probe_in_flight)
+
+    def allow_request(self):
+        """Cek (dan klaim slot probe saat HALF_OPEN) sebelum memanggil layanan."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit breaker CLOSED: layanan pulih.")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """
+        Lepas slot probe tanpa mengubah state, untuk panggilan yang berakhir tanpa bukti
+        layanan sehat atau mati (mis. 4xx, antre rate limiter melewati deadline).
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuit breaker OPEN setelah {self._failures} kegagalan beruntun.")
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+
+class RetryPolicy:
+    """
+    Retry terbatas dengan exponential backoff + full jitter.
+    Delay percobaan ke-n: random(0, min(max_delay, base_delay * 2^n)).
+    Error kuota (429) memakai `quota_base_delay` yang lebih besar.
+    """
+
+    def __init__(self, max_retries=2, base_delay=0.5, max_delay=8.0, quota_base_delay=2.0, rng=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.quota_base_delay = quota_base_delay
+        self._rng = rng or random.Random()
+
+    def backoff(self, attempt, error=None):
+        base = self.quota_base_delay if error is not None and is_quota_error(error) else self.base_delay
+        cap = min(self.max_delay, base * (2 ** attempt))
+        return self._rng.uniform(0, cap)
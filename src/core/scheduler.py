@@ -0,0 +1,98 @@
+import time
+from src.core.deadline import Deadline
+from src.utils import metrics, tracing
+from src.utils.logger import setup_logger
+
+logger = setup_logger("Scheduler")
+
+AGENT_SECONDS = metrics.histogram("baristabox_agent_process_seconds", "Durasi process() per agen.", ("agent",))
+
+
+class AgentScheduler:
+    """
+    Penjadwal agen berbasis event Blackboard (pola Blackboard klasik: knowledge source
+    hanya dipicu oleh perubahan yang ia pedulikan).
+
+    Setiap agen mendeklarasikan:
+      WATCHES          -> tuple key Blackboard yang memicunya (None = setiap perubahan)
+      DEPENDS_ON       -> nama agen yang harus dievaluasi lebih dulu dalam satu pass
+      should_activate  -> predikat murah atas Blackboard (mis. intent cocok / agen sedang locking)
+
+    Satu turn = satu pass dalam urutan dependensi. Agen yang tidak berlangganan key
+    yang berubah, atau yang predikatnya False, tidak dipanggil sama sekali.
+    """
+
+    def __init__(self, agents):
+        self.agents = list(agents)
+        self.order = self._dependency_order(self.agents)
+        # Indeks key -> agen, dibangun sekali agar pengecekan per turn O(jumlah key kotor)
+        self.subscriptions = {}
+        self.wildcard = []
+        for agent in self.order:
+            watches = getattr(agent, 'WATCHES', None)
+            if watches is None:
+                self.wildcard.append(agent)
+            else:
+                for key in watches:
+                    self.subscriptions.setdefault(key, []).append(agent)
+
+    @staticmethod
+    def _dependency_order(agents):
+        """Urutan topologis stabil: dependensi dulu, seri diputus oleh urutan registrasi."""
+        by_name = {agent.name: agent for agent in agents}
+        ordered, visiting, done = [], set(), set()
+
+        def visit(agent):
+            if agent.name in done:
+                return
+            if agent.name in visiting:
+                raise ValueError(f"Dependensi agen melingkar di '{agent.name}'")
+            visiting.add(agent.name)
+            for dep in getattr(agent, 'DEPENDS_ON', ()):
+                if dep in by_name:
+                    visit(by_name[dep])
+                else:
+                    logger.warning(f"Agen '{agent.name}' bergantung pada '{dep}' yang tidak terdaftar.")
+            visiting.discard(agent.name)
+            done.add(agent.name)
+            ordered.append(agent)
+
+        for agent in agents:
+            visit(agent)
+        return ordered
+
+    def _is_subscribed(self, agent, dirty):
+        if agent in self.wildcard:
+            return bool(dirty)
+        return any(agent in self.subscriptions.get(key, ()) for key in dirty)
+
+    def run(self, board, changed_keys=()):
+        """
+        Jalankan satu pass. `changed_keys` = key yang berubah sebelum pass dimulai
+        (mis. input user baru); perubahan yang ditulis agen selama pass ikut memicu
+        agen sesudahnya. Return daftar nama agen yang benar-benar dijalankan.
+        """
+        dirty = set(changed_keys)
+        listener = dirty.add
+        board.add_listener(listener)
+        deadline = Deadline.current()
+        activated = []
+        try:
+            for agent in self.order:
+                if not self._is_subscribed(agent, dirty):
+                    continue
+                predicate = getattr(agent, 'should_activate', None)
+                if predicate is not None and not predicate(board):
+                    continue
+                started = time.perf_counter()
+                with tracing.span(f"agent.{agent.name}", agent=agent.name):
+                    agent.process()
+                elapsed = time.perf_counter() - started
+                AGENT_SECONDS.observe(elapsed, agent=agent.name)
+                if deadline is not None:
+                    deadline.record(agent.name, elapsed)
+                activated.append(agent.name)
+        finally:
+            board.remove_listener(listener)
+        logger.debug("Agen aktif: %s", activated)
+        return activated
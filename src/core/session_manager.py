@@ -0,0 +1,228 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from src.core.blackboard import Blackboard
+from src.core.state_backends import create_backend
+from src.utils import metrics
+from src.utils.logger import setup_logger
+
+logger = setup_logger("SessionManager")
+
+SESSIONS = metrics.gauge("baristabox_sessions", "Sesi yang dikelola SessionManager (active / spilled).", ("state",))
+EVICTIONS = metrics.counter("baristabox_session_evictions", "Sesi yang dievict per alasan (ttl / lru).", ("reason",))
+
+
+def deep_sizeof(obj, seen=None):
+    """Perkiraan ukuran memori (bytes) sebuah objek beserta isinya (tanpa menghitung ulang objek bersama)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+class SessionManager:
+    """
+    Mengatur umur sesi Blackboard untuk backend headless (memory / sqlite).
+
+    - Idle TTL (SESSION_TTL_SECONDS, default 3600): sesi yang tidak disentuh selama TTL
+      dibuang (atau di-spill ke disk) saat sweep().
+    - Batas global (SESSION_MAX, default 1000): sesi paling lama tidak dipakai (LRU)
+      dievict ketika batas terlampaui.
+    - Spill opsional (SESSION_SPILL_DIR): sesi yang dievict/kedaluwarsa disimpan sebagai
+      snapshot biner dan dipulihkan otomatis saat sesi itu dipakai lagi.
+    - Backend bersama (sqlite: dipakai banyak replika, bertahan lintas restart): eviction hanya
+      membuang pembukuan lokal proses ini; state sesi di database tidak pernah dihapus oleh
+      TTL/LRU replika mana pun (hanya lewat drop()).
+    - Sesi yang sedang dipakai turn (in_use) di-pin: tidak dievict oleh TTL maupun LRU;
+      batas LRU boleh terlampaui sementara jika semua kandidat sedang di-pin.
+    - memory_report(): footprint per sesi dan total.
+    """
+
+    SPILL_SUFFIX = '.session'
+
+    def __init__(self, backend_kind='memory', ttl_seconds=None, max_sessions=None, spill_dir=None,
+                 clock=time.monotonic, backend_factory=None):
+        self.backend_kind = backend_kind
+        self.backend_factory = backend_factory or (lambda session_id: create_backend(backend_kind, session_id))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.environ.get("SESSION_TTL_SECONDS", 3600))
+        self.max_sessions = max_sessions if max_sessions is not None else int(os.environ.get("SESSION_MAX", 1000))
+        self.spill_dir = spill_dir if spill_dir is not None else os.environ.get("SESSION_SPILL_DIR") or None
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+        self.clock = clock
+        self.lock = threading.RLock()
+        # session_id -> waktu akses terakhir, urut dari yang paling lama tidak dipakai
+        self.last_access = OrderedDict()
+        # session_id -> jumlah turn yang sedang memakai sesi (tidak boleh dievict)
+        self.pinned = {}
+        # Dievaluasi saat scrape saja; manager terakhir yang dibuat yang dilaporkan
+        SESSIONS.set_function(lambda: len(self.last_access), state='active')
+        SESSIONS.set_function(self._spilled_count, state='spilled')
+
+    # --- AKSES SESI ---
+
+    def _backend(self, session_id):
+        return self.backend_factory(session_id)
+
+    def _spill_path(self, session_id):
+        return os.path.join(self.spill_dir, session_id + self.SPILL_SUFFIX)
+
+    def _is_spilled(self, session_id):
+        return bool(self.spill_dir) and os.path.exists(self._spill_path(session_id))
+
+    def exists(self, session_id):
+        with self.lock:
+            if session_id in self.last_access or self._is_spilled(session_id):
+                return True
+        # Backend sqlite dibagi antar replika: sesi bisa dibuat proses lain (membuat
+        # InMemoryStateBackend justru mendaftarkan sesi baru, jadi hanya untuk sqlite)
+        if self.backend_kind == 'sqlite':
+            return self._backend(session_id).session_exists()
+        return False
+
+    def board(self, session_id):
+        """Blackboard sesi (dibuat/dipulihkan bila perlu). Setiap akses memperbarui urutan LRU."""
+        with self.lock:
+            if session_id not in self.last_access and self._is_spilled(session_id):
+                self._restore(session_id)
+            self.last_access[session_id] = self.clock()
+            self.last_access.move_to_end(session_id)
+            board = Blackboard(self._backend(session_id))
+            self._enforce_cap()
+            return board
+
+    @contextmanager
+    def in_use(self, session_id):
+        """Blackboard sesi yang di-pin selama blok berjalan (mis. satu turn agen)."""
+        with self.lock:
+            self.pinned[session_id] = self.pinned.get(session_id, 0) + 1
+            try:
+                board = self.board(session_id)
+            except BaseException:
+                self._unpin(session_id)
+                raise
+        try:
+            yield board
+        finally:
+            with self.lock:
+                self._unpin(session_id)
+                # Akhir turn juga dihitung sebagai aktivitas (turn panjang tidak langsung kedaluwarsa)
+                if session_id in self.last_access:
+                    self.last_access[session_id] = self.clock()
+                    self.last_access.move_to_end(session_id)
+
+    def _unpin(self, session_id):
+        count = self.pinned.pop(session_id) - 1
+        if count:
+            self.pinned[session_id] = count
+
+    def drop(self, session_id):
+        """Hapus sesi sepenuhnya (memori dan spill)."""
+        with self.lock:
+            self.last_access.pop(session_id, None)
+            self._backend(session_id).drop()
+            if self._is_spilled(session_id):
+                os.remove(self._spill_path(session_id))
+
+    # --- EVICTION ---
+
+    def _enforce_cap(self):
+        excess = len(self.last_access) - self.max_sessions
+        if excess <= 0:
+            return
+        victims = [sid for sid in self.last_access if sid not in self.pinned][:excess]
+        for oldest in victims:
+            logger.info(f"Batas {self.max_sessions} sesi terlampaui, evict LRU: {oldest}")
+            self._evict(oldest)
+            EVICTIONS.inc(reason='lru')
+        if len(victims) < excess:
+            logger.warning(f"Batas {self.max_sessions} sesi terlampaui sementara: {len(self.pinned)} sesi sedang dipakai.")
+
+    def _evict(self, session_id):
+        self.last_access.pop(session_id, None)
+        backend = self._backend(session_id)
+        if backend.shared:
+            # last_access hanya pandangan replika ini; replika lain mungkin sedang melayani sesi ini
+            return 'local'
+        if self.spill_dir:
+            self._spill(session_id, Blackboard(backend).snapshot())
+        backend.drop()
+        return 'spill' if self.spill_dir else 'drop'
+
+    def sweep(self):
+        """Evict semua sesi yang idle lebih lama dari TTL. Return daftar session_id yang dievict."""
+        now = self.clock()
+        expired = []
+        modes = set()
+        with self.lock:
+            for session_id, last in list(self.last_access.items()):
+                # OrderedDict urut LRU: begitu ketemu sesi yang masih segar, sisanya juga segar
+                if now - last < self.ttl_seconds:
+                    break
+                if session_id in self.pinned:
+                    continue
+                modes.add(self._evict(session_id))
+                expired.append(session_id)
+                EVICTIONS.inc(reason='ttl')
+        if expired:
+            logger.info(f"Sweep: {len(expired)} sesi idle dievict ({', '.join(sorted(modes))}).")
+        return expired
+
+    # --- SPILL / RESTORE ---
+
+    def _spill(self, session_id, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._spill_path(session_id))
+
+    def _restore(self, session_id):
+        path = self._spill_path(session_id)
+        with open(path, 'rb') as f:
+            data = f.read()
+        Blackboard(self._backend(session_id)).restore(data)
+        os.remove(path)
+        logger.info(f"Sesi {session_id} dipulihkan dari spill ({len(data)} bytes).")
+
+    # --- MEMORY ACCOUNTING ---
+
+    def session_footprint(self, session_id):
+        return self._footprint(self._backend(session_id))
+
+    @staticmethod
+    def _footprint(backend):
+        seen = set()
+        return sum(deep_sizeof(key, seen) + deep_sizeof(backend.get(key), seen) for key in backend.keys())
+
+    def _spilled_count(self):
+        if not self.spill_dir:
+            return 0
+        return sum(1 for name in os.listdir(self.spill_dir) if name.endswith(self.SPILL_SUFFIX))
+
+    def memory_report(self):
+        # Footprint dihitung di luar lock agar scrape /memory tidak menahan board()/in_use()
+        # (backend dibuat di dalam lock: membuat backend memory untuk sesi yang baru dievict
+        # akan mendaftarkannya ulang sebagai sesi kosong)
+        with self.lock:
+            backends = {sid: self._backend(sid) for sid in self.last_access}
+        per_session = {sid: self._footprint(backend) for sid, backend in backends.items()}
+        return {
+            'active_sessions': len(per_session),
+            'spilled_sessions': self._spilled_count(),
+            'total_bytes': sum(per_session.values()),
+            'per_session_bytes': per_session,
+            'ttl_seconds': self.ttl_seconds,
+            'max_sessions': self.max_sessions,
+        }
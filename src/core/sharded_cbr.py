@@ -0,0 +1,381 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+from src.knowledge.tag_vocabulary import TagVocabulary
+from src.utils import metrics
+from src.utils.logger import setup_logger
+
+logger = setup_logger("ShardedCBR")
+
+# Fitur bean yang di-encode untuk nearest neighbour (bobot di luar ini -> jalur in-process)
+NN_FEATURES = ('origin', 'roast_level', 'processing')
+
+# Jenis nilai fitur, meniru cabang isinstance di CBREngine.calculate_similarity
+KIND_NONE, KIND_STR, KIND_NUM, KIND_OTHER = 0, 1, 2, 3
+NO_CODE = -1
+
+# Bitmask kata preferensi disimpan di uint64
+MAX_TERMS = 64
+
+SHARD_FAILURES = metrics.counter(
+    "baristabox_cbr_shard_failures", "Worker shard CBR yang mati/timeout (shard di-score di proses utama).",
+)
+
+
+def shard_count():
+    """Jumlah shard dari CBR_SHARDS (0/kosong = mode shard mati)."""
+    try:
+        return max(0, int(os.environ.get("CBR_SHARDS", "0")))
+    except ValueError:
+        logger.error(f"CBR_SHARDS tidak valid: {os.environ.get('CBR_SHARDS')!r}")
+        return 0
+
+
+def _kind(value):
+    if value is None:
+        return KIND_NONE
+    if isinstance(value, str):
+        return KIND_STR
+    if isinstance(value, (int, float)):
+        return KIND_NUM
+    return KIND_OTHER
+
+
+def _features(case):
+    return case if isinstance(case, dict) else case.__dict__
+
+
+# --- SHARED MEMORY ---
+
+def _pack(arrays):
+    """Salin dict array numpy ke satu blok SharedMemory. Return (shm, layout)."""
+    layout = []
+    offset = 0
+    for key, array in arrays.items():
+        offset = -(-offset // 8) * 8
+        layout.append((key, array.dtype.str, array.shape, offset))
+        offset += array.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (key, dtype, shape, start), array in zip(layout, arrays.values()):
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = array
+    return shm, layout
+
+
+def _views(shm, layout):
+    return {key: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            for key, dtype, shape, offset in layout}
+
+
+def _encode(beans, bean_tags, features, codes):
+    """Array numpy satu shard: tag id per bean (CSR) + kolom fitur nearest neighbour."""
+    size = len(beans)
+    lengths = np.fromiter((len(tags) for tags in bean_tags), dtype=np.int64, count=size)
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    tag_ids = np.fromiter((tag_id for tags in bean_tags for tag_id in tags), dtype=np.int32, count=int(indptr[-1]))
+    arrays = {'indptr': indptr, 'tag_ids': tag_ids}
+    for feature in features:
+        kinds = np.zeros(size, dtype=np.int8)
+        string_codes = np.full(size, NO_CODE, dtype=np.int32)
+        numbers = np.zeros(size, dtype=np.float64)
+        for i, bean in enumerate(beans):
+            value = _features(bean).get(feature)
+            kinds[i] = kind = _kind(value)
+            if kind == KIND_STR:
+                string_codes[i] = codes.setdefault(value.lower(), len(codes))
+            elif kind == KIND_NUM:
+                numbers[i] = value
+        arrays[f'{feature}.kind'] = kinds
+        arrays[f'{feature}.code'] = string_codes
+        arrays[f'{feature}.num'] = numbers
+    return arrays
+
+
+# --- SCORING (dipakai worker dan fallback in-process) ---
+
+def _tag_scores(arrays, query):
+    """Skor TagQuery untuk semua bean di shard (nilai float sama persis dengan query.score)."""
+    tag_ids, indptr = arrays['tag_ids'], arrays['indptr']
+    size = len(indptr) - 1
+    lut = np.zeros(int(tag_ids.max()) + 1 if len(tag_ids) else 1, dtype=np.uint64)
+    for tag_id, bits in query.tag_masks.items():
+        if tag_id < len(lut):
+            lut[tag_id] = bits
+    values = np.append(lut[tag_ids], np.uint64(0))
+    masks = np.bitwise_or.reduceat(values, indptr[:-1]) if size else np.zeros(0, dtype=np.uint64)
+    masks[indptr[:-1] == indptr[1:]] = 0
+    unique, inverse = np.unique(masks, return_inverse=True)
+    table = np.array([query.mask_score(int(mask)) for mask in unique], dtype=np.float64)
+    return table[inverse.reshape(-1)]
+
+
+def _neighbor_scores(arrays, spec, size):
+    """
+    Vektorisasi CBREngine.calculate_similarity per shard. Urutan operasi float sama
+    (fitur dalam urutan bobot), jadi skornya identik dengan loop Python.
+    """
+    total_score = np.zeros(size)
+    total_weight = np.zeros(size)
+    for feature, kind, value, weight in spec:
+        kinds = arrays[f'{feature}.kind']
+        present = kinds != KIND_NONE
+        if kind == KIND_STR:
+            similarity = ((kinds == KIND_STR) & (arrays[f'{feature}.code'] == value)).astype(np.float64)
+        elif kind == KIND_NUM:
+            similarity = np.where(kinds == KIND_NUM, 1.0 / (1.0 + np.abs(value - arrays[f'{feature}.num'])), 0.0)
+        else:
+            similarity = np.zeros(size)
+        total_score = np.where(present, total_score + similarity * weight, total_score)
+        total_weight = np.where(present, total_weight + weight, total_weight)
+    empty = total_weight == 0
+    return np.where(empty, 0.0, total_score / np.where(empty, 1.0, total_weight))
+
+
+def _top_k(scores, k, offset):
+    """(skor, index global) terbaik: skor turun, seri -> index naik (sama dengan sort stabil)."""
+    if len(scores) > k:
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(len(scores))
+    order = candidates[np.argsort(-scores[candidates], kind='stable')][:k]
+    return [(float(scores[i]), int(i) + offset) for i in order]
+
+
+def _run(arrays, message, offset):
+    op, payload, k = message
+    if op == 'tags':
+        scores = _tag_scores(arrays, payload)
+    elif op == 'neighbors':
+        scores = _neighbor_scores(arrays, payload, len(arrays['indptr']) - 1)
+    else:
+        raise ValueError(f"Operasi shard tidak dikenal: {op}")
+    return _top_k(scores, k, offset)
+
+
+def _worker_main(conn, name, layout, offset):
+    """Loop worker: attach shard dari shared memory, jawab query sampai 'stop' / pipe putus."""
+    shm = shared_memory.SharedMemory(name=name)
+    arrays = _views(shm, layout)
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            if message == 'stop':
+                break
+            try:
+                conn.send(('ok', _run(arrays, message, offset)))
+            except Exception as e:
+                conn.send(('error', repr(e)))
+    finally:
+        arrays.clear()
+        shm.close()
+
+
+class ShardedCatalog:
+    """
+    Mode eksekusi sharded untuk scoring CBREngine atas katalog sangat besar.
+
+    Katalog dipartisi kontigu ke N shard. Setiap shard di-encode sekali ke array numpy
+    (tag id per bean + kolom origin/roast_level/processing) di satu blok SharedMemory,
+    dan satu proses worker per shard meng-attach blok itu tanpa menyalin. Query
+    di-broadcast ke semua worker, masing-masing mengembalikan top-k lokal, lalu di-merge
+    (skor turun, seri -> urutan katalog), sama dengan hasil jalur in-process.
+
+    Jika worker mati, timeout (CBR_SHARD_TIMEOUT) atau gagal start, shard itu di-score
+    di proses utama dari shared memory yang sama dan worker-nya di-spawn ulang.
+
+    Setiap pipe worker punya kunci sendiri (satu query in-flight per worker). Query dari
+    sesi berbeda berjalan ter-pipeline: begitu satu shard selesai menjawab query A, query
+    B sudah bisa dikirim ke shard itu selagi A menunggu shard berikutnya.
+    """
+
+    def __init__(self, beans, shards=None, vocabulary=None, features=NN_FEATURES, timeout=None):
+        self.beans = beans
+        self.vocabulary = vocabulary or TagVocabulary(beans)
+        self.features = tuple(features)
+        self.timeout = timeout or float(os.environ.get("CBR_SHARD_TIMEOUT", "30"))
+        self._codes = {}
+        self._context = multiprocessing.get_context(os.environ.get("CBR_SHARD_START_METHOD", "spawn"))
+        self._closed = False
+
+        count = max(1, shards or shard_count() or os.cpu_count() or 1)
+        step = max(1, -(-len(beans) // count))
+        self._shards = []
+        for start in range(0, len(beans), step):
+            end = min(start + step, len(beans))
+            arrays = _encode(beans[start:end], self.vocabulary.bean_tags[start:end], self.features, self._codes)
+            shm, layout = _pack(arrays)
+            shard = {'offset': start, 'size': end - start, 'shm': shm, 'layout': layout,
+                     'arrays': _views(shm, layout), 'process': None, 'conn': None, 'lock': threading.Lock()}
+            self._shards.append(shard)
+            self._start_worker(shard)
+        atexit.register(self.close)
+        logger.info(f"Katalog CBR dibagi ke {len(self._shards)} shard ({len(beans)} bean).")
+
+    # --- WORKER ---
+
+    def _start_worker(self, shard):
+        try:
+            parent, child = self._context.Pipe()
+            process = self._context.Process(
+                target=_worker_main, args=(child, shard['shm'].name, shard['layout'], shard['offset']),
+                name=f"cbr-shard-{shard['offset']}", daemon=True,
+            )
+            process.start()
+            child.close()
+        except Exception as e:
+            logger.error(f"Gagal menjalankan worker shard @{shard['offset']}: {e}. Shard di-score in-process.")
+            shard['process'], shard['conn'] = None, None
+            return
+        shard['process'], shard['conn'] = process, parent
+
+    def _stop_worker(self, shard, graceful=True):
+        process, conn = shard['process'], shard['conn']
+        shard['process'], shard['conn'] = None, None
+        if conn is not None:
+            if graceful:
+                try:
+                    conn.send('stop')
+                except (OSError, ValueError):
+                    pass
+            conn.close()
+        if process is not None:
+            process.join(1.0 if graceful else 0)
+            if process.is_alive():
+                process.terminate()
+                process.join(1.0)
+
+    def _receive(self, shard, message):
+        conn = shard['conn']
+        try:
+            if not conn.poll(self.timeout):
+                logger.error(f"Worker shard @{shard['offset']} timeout setelah {self.timeout}s.")
+                return None
+            status, payload = conn.recv()
+        except (EOFError, OSError) as e:
+            logger.error(f"Worker shard @{shard['offset']} mati: {e!r}")
+            return None
+        if status != 'ok':
+            # Worker masih sehat, query-nya yang gagal: ulangi di proses ini tanpa restart
+            logger.error(f"Worker shard @{shard['offset']} gagal: {payload}")
+            return _run(shard['arrays'], message, shard['offset'])
+        return payload
+
+    def _recover(self, shard, message):
+        """Worker gagal: score shard di proses ini, lalu spawn ulang worker-nya."""
+        SHARD_FAILURES.inc()
+        self._stop_worker(shard, graceful=False)
+        self._start_worker(shard)
+        return _run(shard['arrays'], message, shard['offset'])
+
+    def _send(self, shard, message):
+        if shard['conn'] is None:
+            return False
+        try:
+            shard['conn'].send(message)
+            return True
+        except (OSError, ValueError) as e:
+            logger.error(f"Gagal mengirim query ke shard @{shard['offset']}: {e!r}")
+            return False
+
+    def _collect(self, shard, message, sent):
+        if shard['process'] is None and shard['conn'] is None:
+            # Worker tidak bisa di-start: shard ini permanen in-process
+            return _run(shard['arrays'], message, shard['offset'])
+        payload = self._receive(shard, message) if sent else None
+        return self._recover(shard, message) if payload is None else payload
+
+    def _broadcast(self, message, k):
+        if self._closed:
+            raise RuntimeError("ShardedCatalog sudah ditutup.")
+        results = []
+        # [shard, terkirim?] yang kuncinya sedang dipegang query ini. Kunci diambil dalam
+        # urutan shard (tidak bisa deadlock) dan dilepas begitu jawaban shard itu diterima.
+        pending = []
+        try:
+            for shard in self._shards:
+                shard['lock'].acquire()
+                pending.append([shard, False])
+                pending[-1][1] = self._send(shard, message)
+            while pending:
+                shard, sent = pending[0]
+                results.extend(self._collect(shard, message, sent))
+                pending.pop(0)
+                shard['lock'].release()
+        finally:
+            # Hanya tersisa jika ada exception: jawaban yang belum dibaca akan mengacaukan
+            # query berikutnya di pipe yang sama, jadi worker-nya diganti
+            for shard, sent in pending:
+                if sent:
+                    self._stop_worker(shard, graceful=False)
+                    self._start_worker(shard)
+                shard['lock'].release()
+        results.sort(key=lambda item: (-item[0], item[1]))
+        return results[:k]
+
+    # --- QUERY ---
+
+    def top_tag_matches(self, user_preferences, top_k=3):
+        """
+        Top-k [(skor, bean)] menurut bobot preferensi tag (skor sama dengan
+        TagVocabulary.compile(...).score / TagPostings.scan).
+        """
+        query = self.vocabulary.compile(user_preferences)
+        if len(query.weights) > MAX_TERMS:
+            scored = [(query.score(tags), i) for i, tags in enumerate(self.vocabulary.bean_tags)]
+            scored.sort(key=lambda item: item[0], reverse=True)
+            return [(score, self.beans[i]) for score, i in scored[:top_k]]
+        return [(score, self.beans[i]) for score, i in self._broadcast(('tags', query, top_k), top_k)]
+
+    def find_nearest_neighbors(self, query_case, weights, top_k=3):
+        """Sama dengan CBREngine.find_nearest_neighbors(query_case, beans, weights, top_k)."""
+        spec = []
+        for feature, weight in weights.items():
+            value = query_case.get(feature)
+            if value is None:
+                continue
+            if feature not in self.features:
+                return None
+            kind = _kind(value)
+            if kind == KIND_STR:
+                value = self._codes.get(value.lower(), NO_CODE)
+            elif kind == KIND_NUM:
+                value = float(value)
+            spec.append((feature, kind, value, weight))
+        return [(score, self.beans[i]) for score, i in self._broadcast(('neighbors', spec, top_k), top_k)]
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for shard in self._shards:
+            with shard['lock']:
+                self._stop_worker(shard)
+            shard['arrays'] = None
+            shard['shm'].close()
+            try:
+                shard['shm'].unlink()
+            except FileNotFoundError:
+                pass
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def for_store(knowledge):
+    """ShardedCatalog bersama untuk KnowledgeStore ini jika CBR_SHARDS >= 2, selain itu None."""
+    shards = shard_count()
+    if shards < 2:
+        return None
+    with _catalogs_lock:
+        catalog = _catalogs.get(id(knowledge))
+        if catalog is None:
+            catalog = _catalogs[id(knowledge)] = ShardedCatalog(knowledge.beans, shards, knowledge.tags)
+        return catalog
@@ -0,0 +1,216 @@
+import os
+import pickle
+import sqlite3
+import threading
+from src.utils.logger import setup_logger
+
+logger = setup_logger("StateBackend")
+
+
+class StateBackend:
+    """
+    Antarmuka penyimpanan state satu sesi (key -> value) untuk Blackboard.
+    Nilai yang diubah in-place (list/dict) WAJIB ditulis ulang lewat `set`,
+    karena backend persisten tidak melihat mutasi objek.
+    """
+
+    name = 'base'
+    # True jika penyimpanan dibagi antar replika / bertahan lintas restart (sesi bukan milik proses ini)
+    shared = False
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def keys(self):
+        raise NotImplementedError
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def clear(self):
+        for key in list(self.keys()):
+            self.delete(key)
+
+    def drop(self):
+        """Hapus seluruh sesi dari penyimpanan (dipakai saat sesi kedaluwarsa/dievict)."""
+        self.clear()
+
+
+class StreamlitStateBackend(StateBackend):
+    """Backend bawaan: st.session_state (satu sesi = satu tab browser)."""
+
+    name = 'streamlit'
+
+    def __init__(self):
+        import streamlit as st
+        self._st = st
+
+    def get(self, key, default=None):
+        return self._st.session_state.get(key, default)
+
+    def set(self, key, value):
+        self._st.session_state[key] = value
+
+    def delete(self, key):
+        if key in self._st.session_state:
+            del self._st.session_state[key]
+
+    def keys(self):
+        return list(self._st.session_state.keys())
+
+    def __contains__(self, key):
+        return key in self._st.session_state
+
+
+class MemorySessionStore:
+    """Key-value store proses lokal: { session_id: {key: value} } (thread-safe)."""
+
+    def __init__(self):
+        self.sessions = {}
+        self.lock = threading.RLock()
+
+    def session(self, session_id):
+        with self.lock:
+            return self.sessions.setdefault(session_id, {})
+
+    def drop(self, session_id):
+        with self.lock:
+            self.sessions.pop(session_id, None)
+
+    def __contains__(self, session_id):
+        return session_id in self.sessions
+
+
+# Store default yang dipakai bersama oleh semua InMemoryStateBackend di proses ini
+DEFAULT_MEMORY_STORE = MemorySessionStore()
+
+
+class InMemoryStateBackend(StateBackend):
+    """Backend headless di memori proses, dipisah per session_id."""
+
+    name = 'memory'
+
+    def __init__(self, session_id='default', store=None):
+        self.session_id = session_id
+        self.store = store or DEFAULT_MEMORY_STORE
+        self._data = self.store.session(session_id)
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def set(self, key, value):
+        self._data[key] = value
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def keys(self):
+        return list(self._data.keys())
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def drop(self):
+        self.store.drop(self.session_id)
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    Backend SQLite: stand-in key-value lokal yang bisa dibagi antar proses/replika.
+    Nilai disimpan ter-pickle per (session_id, key). Koneksi dibuat per thread.
+    """
+
+    name = 'sqlite'
+    shared = True
+    _local = threading.local()
+
+    def __init__(self, session_id='default', path='blackboard_sessions.db'):
+        self.session_id = session_id
+        self.path = path
+        self._ensure_schema()
+
+    def _conn(self):
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+        conn = connections.get(self.path)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            connections[self.path] = conn
+        return conn
+
+    def _ensure_schema(self):
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS blackboard_state ("
+            " session_id TEXT NOT NULL, key TEXT NOT NULL, value BLOB,"
+            " PRIMARY KEY (session_id, key))"
+        )
+        conn.commit()
+
+    def get(self, key, default=None):
+        row = self._conn().execute(
+            "SELECT value FROM blackboard_state WHERE session_id = ? AND key = ?",
+            (self.session_id, key),
+        ).fetchone()
+        return pickle.loads(row[0]) if row else default
+
+    def set(self, key, value):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO blackboard_state (session_id, key, value) VALUES (?, ?, ?)",
+            (self.session_id, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)),
+        )
+        conn.commit()
+
+    def delete(self, key):
+        conn = self._conn()
+        conn.execute("DELETE FROM blackboard_state WHERE session_id = ? AND key = ?", (self.session_id, key))
+        conn.commit()
+
+    def keys(self):
+        rows = self._conn().execute(
+            "SELECT key FROM blackboard_state WHERE session_id = ?", (self.session_id,)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def __contains__(self, key):
+        row = self._conn().execute(
+            "SELECT 1 FROM blackboard_state WHERE session_id = ? AND key = ?", (self.session_id, key)
+        ).fetchone()
+        return row is not None
+
+    def session_exists(self):
+        """True jika sesi ini punya state di database (mungkin dibuat oleh replika lain)."""
+        row = self._conn().execute(
+            "SELECT 1 FROM blackboard_state WHERE session_id = ? LIMIT 1", (self.session_id,)
+        ).fetchone()
+        return row is not None
+
+    def drop(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM blackboard_state WHERE session_id = ?", (self.session_id,))
+        conn.commit()
+
+
+def create_backend(kind=None, session_id='default'):
+    """
+    Pilih backend dari konfigurasi:
+    BLACKBOARD_BACKEND = streamlit (default) | memory | sqlite
+    BLACKBOARD_SQLITE_PATH = lokasi file SQLite (default: blackboard_sessions.db)
+    """
+    kind = (kind or os.environ.get("BLACKBOARD_BACKEND", "streamlit")).lower()
+    if kind == 'memory':
+        return InMemoryStateBackend(session_id)
+    if kind == 'sqlite':
+        return SQLiteStateBackend(session_id, os.environ.get("BLACKBOARD_SQLITE_PATH", "blackboard_sessions.db"))
+    if kind != 'streamlit':
+        logger.warning(f"BLACKBOARD_BACKEND '{kind}' tidak dikenal, memakai streamlit.")
+    return StreamlitStateBackend()
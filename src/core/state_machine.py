@@ -0,0 +1,87 @@
+from src.utils import metrics, tracing
+from src.utils.logger import setup_logger
+
+logger = setup_logger("StateMachine")
+
+TRANSITIONS = metrics.counter(
+    "baristabox_state_transitions", "Perpindahan state mesin agen.", ("machine", "from_state", "to_state"),
+)
+
+
+class TurnContext:
+    """
+    Data satu turn yang dibaca sekali lalu dibagikan ke semua handler
+    (menghindari membaca ulang Blackboard di setiap perpindahan state).
+    """
+
+    def __init__(self, board, user_input):
+        self.board = board
+        self.user_input = user_input
+
+
+class StateMachine:
+    """
+    Mesin state berbasis tabel dengan driver iteratif (pengganti rekursi process()).
+
+    transitions = {
+        'STATE': (handler, ('NEXT_A', 'NEXT_B')),   # handler(turn) -> state berikutnya / None
+        ...
+    }
+
+    Aturan driver untuk satu turn:
+      - state awal SELALU dijalankan (turn ini membawa input user baru);
+      - handler mengembalikan None -> tetap di state itu, berhenti;
+      - masuk ke wait state (butuh jawaban user) atau terminal state -> berhenti;
+      - selain itu lanjut menjalankan handler state berikutnya dalam turn yang sama.
+
+    Tabel divalidasi sekali saat dibangun; state hasil handler yang tidak dideklarasikan
+    dianggap bug dan menimbulkan ValueError.
+    """
+
+    def __init__(self, name, transitions, wait_states=(), terminal_states=(), max_steps=64):
+        self.name = name
+        self.handlers = {}
+        self.allowed = {}
+        for state, (handler, targets) in transitions.items():
+            self.handlers[state] = handler
+            self.allowed[state] = frozenset(targets)
+        self.wait_states = frozenset(wait_states)
+        self.terminal_states = frozenset(terminal_states)
+        self.max_steps = max_steps
+        self._validate()
+
+    def _validate(self):
+        known = set(self.handlers) | self.terminal_states
+        for state, targets in self.allowed.items():
+            unknown = targets - known
+            if unknown:
+                raise ValueError(f"[{self.name}] Transisi {state} -> {sorted(unknown)} tidak punya handler.")
+        missing = self.wait_states - set(self.handlers)
+        if missing:
+            raise ValueError(f"[{self.name}] Wait state tanpa handler: {sorted(missing)}")
+
+    def run(self, state, turn):
+        """Jalankan dari `state` sampai berhenti. Return state akhir."""
+        final_state = self._run(state, turn)
+        tracing.current_span().set_attributes(state_from=state, state_to=final_state)
+        return final_state
+
+    def _run(self, state, turn):
+        for _ in range(self.max_steps):
+            handler = self.handlers.get(state)
+            if handler is None:
+                return state
+
+            next_state = handler(turn)
+            if next_state is None:
+                return state
+            if next_state not in self.allowed[state]:
+                raise ValueError(f"[{self.name}] Transisi tidak dideklarasikan: {state} -> {next_state}")
+
+            logger.debug("[%s] %s -> %s", self.name, state, next_state)
+            TRANSITIONS.inc(machine=self.name, from_state=state, to_state=next_state)
+            state = next_state
+            if state in self.wait_states or state in self.terminal_states:
+                return state
+
+        raise RuntimeError(f"[{self.name}] Melebihi {self.max_steps} langkah dalam satu turn (siklus?).")
@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from src.core.llm_backends import RecordReplayBackend
+from src.core.llm_service import LLMService
+from src.utils import metrics
+from src.utils.logger import setup_logger
+
+logger = setup_logger("Warmup")
+
+_ready = threading.Event()
+
+READY = metrics.gauge("baristabox_ready", "1 jika replika sudah warm dan siap menerima trafik.")
+READY.set_function(lambda: 1.0 if _ready.is_set() else 0.0)
+WARMUP_SECONDS = metrics.gauge("baristabox_warmup_seconds", "Durasi tiap langkah warm-up saat startup.", ("step",))
+
+
+def is_ready():
+    """Readiness proses: True setelah warm-up selesai (dibaca /readyz untuk load balancer)."""
+    return _ready.is_set()
+
+
+def mark_ready():
+    _ready.set()
+
+
+def reset():
+    """Kembali ke status belum siap (mis. sebelum reload agen, atau di test)."""
+    _ready.clear()
+
+
+def prefill_llm_cache(path, llm=None):
+    """
+    Isi cache jawaban LLM dari file JSONL format RecordReplayBackend ({key, prompt, response}).
+    Backend replay yang sudah aktif cukup ditambah rekamannya; backend lain dibungkus
+    RecordReplayBackend mode replay sehingga prompt yang ada di file dijawab dari cache
+    dan sisanya tetap diteruskan ke backend asli. Return jumlah entri yang dimuat.
+    """
+    llm = llm or LLMService()
+    if llm.backend is None:
+        logger.warning("Prefill cache LLM dilewati: tidak ada backend LLM aktif.")
+        return 0
+    if not os.path.exists(path):
+        logger.warning(f"File cache LLM tidak ditemukan: {path}")
+        return 0
+
+    backend = llm.backend
+    if isinstance(backend, RecordReplayBackend) and backend.mode == 'replay':
+        entries = RecordReplayBackend(path, mode='replay').recordings
+        with backend._lock:
+            backend.recordings.update(entries)
+        return len(entries)
+
+    cache = RecordReplayBackend(path, mode='replay', inner=backend)
+    llm.use_backend(cache)
+    return len(cache.recordings)
+
+
+def warm_up(orchestrator, llm_cache_path=None):
+    """
+    Fase warm-up startup, dijalankan sekali setelah agen dimuat:
+      1. warm_up() setiap agen (forward pass dummy, tokenizer priming, indeks katalog)
+      2. prefill cache LLM dari WARMUP_LLM_CACHE (opsional)
+    Langkah yang gagal dicatat tapi tidak fatal: replika tetap bisa melayani, hanya
+    turn pertamanya lebih lambat. Readiness ditandai di akhir. WARMUP_ENABLED=0
+    melewati semua langkah dan langsung menandai siap.
+    Return dict {langkah: detik}.
+    """
+    timings = {}
+    if os.environ.get("WARMUP_ENABLED", "1").lower() in ('0', 'false', 'no'):
+        logger.info("Warm-up dinonaktifkan (WARMUP_ENABLED=0).")
+        mark_ready()
+        return timings
+
+    steps = [(f"agent.{agent.name}", agent.warm_up) for agent in orchestrator.scheduler.order]
+    llm_cache_path = llm_cache_path or os.environ.get("WARMUP_LLM_CACHE")
+    if llm_cache_path:
+        steps.append(("llm_cache", lambda: prefill_llm_cache(llm_cache_path)))
+
+    started = time.perf_counter()
+    for step, run in steps:
+        step_started = time.perf_counter()
+        try:
+            result = run()
+        except Exception as e:
+            logger.error(f"Warm-up '{step}' gagal: {e}")
+            continue
+        timings[step] = time.perf_counter() - step_started
+        WARMUP_SECONDS.set(timings[step], step=step)
+        if result is not None:
+            logger.info("Warm-up %s: %.3fs (%s)", step, timings[step], result)
+        else:
+            logger.info("Warm-up %s: %.3fs", step, timings[step])
+
+    mark_ready()
+    logger.info("Warm-up selesai dalam %.2fs, replika siap menerima trafik.", time.perf_counter() - started)
+    return timings
@@ -0,0 +1,237 @@
+import functools
+import re
+from array import array
+from src.utils.logger import setup_logger
+
+logger = setup_logger("FacetIndex")
+
+FACETS = ('roast_level', 'processing', 'origin', 'type', 'tags')
+
+# Istilah sangrai -> roast_level (1 = light ... 5 = dark). Frasa terpanjang dicocokkan dulu.
+ROAST_TERMS = {
+    'medium light': (2,),
+    'medium dark': (4,),
+    'light': (1, 2),
+    'medium': (3,),
+    'dark': (4, 5),
+}
+
+# Bentuk kata sifat asal -> nilai facet origin ("Ethiopian coffees" -> ethiopia)
+ORIGIN_ADJECTIVES = {
+    'bolivian': 'bolivia', 'brazilian': 'brazil', 'burundian': 'burundi', 'colombian': 'colombia',
+    'costa rican': 'costa rica', 'salvadoran': 'el salvador', 'ethiopian': 'ethiopia',
+    'guatemalan': 'guatemala', 'honduran': 'honduras', 'indian': 'india', 'indonesian': 'indonesia',
+    'jamaican': 'jamaica', 'kenyan': 'kenya', 'mexican': 'mexico', 'nicaraguan': 'nicaragua',
+    'panamanian': 'panama', 'papua new guinean': 'papua new guinea', 'peruvian': 'peru',
+    'rwandan': 'rwanda', 'tanzanian': 'tanzania', 'ugandan': 'uganda', 'american': 'usa',
+    'vietnamese': 'vietnam', 'yemeni': 'yemen', 'sumatran': 'indonesia', 'javanese': 'indonesia',
+}
+
+NEGATIONS = ('no', 'not', 'without', 'avoid', 'except', 'excluding', 'exclude', 'never', 'nothing', 'dont',
+             'hate', 'dislike', 'skip')
+# Negasi hanya berlaku untuk nilai facet yang tepat di belakangnya: maksimal NEGATION_WINDOW kata
+# sebelum nilai, dan jendela berhenti di kata sambung ("no naturals and dark roast only")
+NEGATION_WINDOW = 5
+NEGATION_STOPS = ('and', 'or', 'with', 'plus')
+
+# Penanda batasan keras untuk facet apa pun; tanpa penanda, sebutan facet tetap preferensi lunak.
+# 'just' sengaja tidak termasuk: "I just want something fruity" bukan batasan.
+INCLUDE_CUES = ('only', 'strictly', 'must', 'exclusively')
+
+_CLAUSE_SPLIT = re.compile(r"[,.;!?]|\bbut\b|\bhowever\b")
+_NONZERO_BYTE = re.compile(b'[^\x00]')
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+_SEPARATORS = re.compile(r"[-/_]")
+
+
+def _negated(before):
+    """True jika ada kata negasi di jendela kata tepat sebelum nilai facet."""
+    for word in reversed(before[-NEGATION_WINDOW:]):
+        if word in NEGATION_STOPS:
+            return False
+        if word in NEGATIONS:
+            return True
+    return False
+
+
+@functools.lru_cache(maxsize=65536)
+def normalize(value):
+    """Kunci facet: huruf kecil, tanda hubung/garis miring jadi spasi ('Wet-Hulled' -> 'wet hulled')."""
+    return ' '.join(_SEPARATORS.sub(' ', str(value).lower()).split())
+
+
+def _bitmap_from_indices(indices, size):
+    bits = bytearray((size + 7) // 8)
+    for i in indices:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class FacetQuery:
+    """
+    Batasan keras atas facet: {facet: set nilai} untuk include (OR di dalam facet,
+    AND antar facet) dan exclude (AND NOT). Nilai sudah dinormalisasi.
+    """
+
+    def __init__(self):
+        self.include = {}
+        self.exclude = {}
+
+    def require(self, facet, values):
+        self.include.setdefault(facet, set()).update(values)
+        return self
+
+    def reject(self, facet, values):
+        self.exclude.setdefault(facet, set()).update(values)
+        return self
+
+    def __bool__(self):
+        return bool(self.include or self.exclude)
+
+    def describe(self):
+        parts = [f"{facet} in {sorted(map(str, values))}" for facet, values in self.include.items()]
+        parts += [f"{facet} not in {sorted(map(str, values))}" for facet, values in self.exclude.items()]
+        return '; '.join(parts)
+
+
+class FacetIndex:
+    """
+    Indeks bitmap atas facet BeanFrame (roast_level, processing, origin, type, tags),
+    dibangun sekali saat katalog dimuat. Bit ke-i = bean ke-i dalam urutan katalog,
+    sehingga filter keras cukup AND/OR/NOT integer sebelum scoring apa pun.
+
+    Nilai yang padat disimpan sebagai bitmap int; nilai langka (ekor panjang origin/tag)
+    disimpan sebagai daftar posisi dan baru dijadikan bitmap saat query menyentuhnya,
+    agar memori tidak tumbuh n/8 byte untuk setiap nilai.
+    """
+
+    # Daftar posisi lebih hemat dari bitmap selama count * 32 bit < n bit
+    DENSE_RATIO = 32
+
+    def __init__(self, beans):
+        self.size = len(beans)
+        self.all = (1 << self.size) - 1
+        self._entries = {facet: {} for facet in FACETS}
+        self.counts = {facet: {} for facet in FACETS}
+
+        postings = {facet: {} for facet in FACETS}
+        roast, processing, origin, types, tags = (postings[facet] for facet in FACETS)
+        for i, bean in enumerate(beans):
+            if bean.roast_level is not None:
+                roast.setdefault(bean.roast_level, []).append(i)
+            if bean.processing:
+                processing.setdefault(normalize(bean.processing), []).append(i)
+            if bean.origin:
+                origin.setdefault(normalize(bean.origin), []).append(i)
+            if bean.type:
+                types.setdefault(normalize(bean.type), []).append(i)
+            for tag in {normalize(tag) for tag in bean.expert_tags or ()}:
+                tags.setdefault(tag, []).append(i)
+
+        for facet, by_value in postings.items():
+            for value, indices in by_value.items():
+                self.counts[facet][value] = len(indices)
+                if len(indices) * self.DENSE_RATIO >= self.size:
+                    self._entries[facet][value] = _bitmap_from_indices(indices, self.size)
+                else:
+                    self._entries[facet][value] = array('I', indices)
+        self._patterns = self._compile_patterns()
+        logger.info(f"Indeks facet dibangun: {self.size} bean, "
+                    f"{sum(len(values) for values in self.counts.values())} nilai facet.")
+
+    # --- BITMAP ---
+
+    def bitmap(self, facet, value):
+        """Bitmap bean dengan facet == value (0 jika tidak ada)."""
+        entry = self._entries[facet].get(value)
+        if entry is None:
+            return 0
+        if isinstance(entry, int):
+            return entry
+        return _bitmap_from_indices(entry, self.size)
+
+    def any_of(self, facet, values):
+        mask = 0
+        for value in values:
+            mask |= self.bitmap(facet, value)
+        return mask
+
+    def candidates(self, query):
+        """Bitmap kandidat untuk FacetQuery: AND antar facet include, lalu buang exclude."""
+        mask = self.all
+        for facet, values in query.include.items():
+            mask &= self.any_of(facet, values)
+        for facet, values in query.exclude.items():
+            mask &= ~self.any_of(facet, values)
+        return mask & self.all
+
+    def indices(self, mask):
+        """Posisi bit aktif, urut naik (urutan katalog)."""
+        raw = mask.to_bytes((self.size + 7) // 8, 'little')
+        positions = []
+        for match in _NONZERO_BYTE.finditer(raw):
+            base = match.start() * 8
+            positions.extend(base + bit for bit in _BYTE_BITS[raw[match.start()]])
+        return positions
+
+    def select(self, mask, items):
+        """Elemen `items` (sejajar dengan katalog) yang bitnya aktif di `mask`."""
+        return [items[i] for i in self.indices(mask)]
+
+    @staticmethod
+    def count(mask):
+        return bin(mask).count('1')
+
+    # --- PARSER BATASAN KERAS ---
+
+    def _compile_patterns(self):
+        patterns = {}
+        vocab = {facet: list(self.counts[facet]) for facet in ('processing', 'origin', 'type', 'tags')}
+        vocab['roast_level'] = list(ROAST_TERMS)
+        vocab['origin'] += [adjective for adjective, origin in ORIGIN_ADJECTIVES.items() if origin in self.counts['origin']]
+        for facet, values in vocab.items():
+            phrases = sorted({str(v) for v in values if str(v).strip()}, key=len, reverse=True)
+            if not phrases:
+                continue
+            alternation = '|'.join(r'[\s-]+'.join(map(re.escape, phrase.split())) for phrase in phrases)
+            # Bentuk jamak sederhana ikut cocok: 'naturals', 'robustas'
+            patterns[facet] = re.compile(rf"\b({alternation})(?:e?s)?\b")
+        return patterns
+
+    def parse(self, text):
+        """
+        Ekstraksi batasan keras dari teks user, per klausa (dipisah tanda baca / 'but'):
+          - kata negasi hingga NEGATION_WINDOW kata sebelum nilai facet ("no naturals",
+            "not a fan of dark roasts") -> exclude; negasi sesudah nilai ("light roast, not too
+            sour") tidak membalik nilai itu
+          - 'from <origin>' atau penanda 'only/must/strictly' -> include
+        Sebutan tanpa penanda ("something fruity", "dark roast", "not bitter") dibiarkan sebagai
+        preferensi lunak untuk scoring; tag hanya menjadi batasan keras bersama penanda eksplisit.
+        """
+        query = FacetQuery()
+        if not text:
+            return query
+        for clause in _CLAUSE_SPLIT.split(text.lower().replace("'", '')):
+            words = clause.split()
+            has_cue = any(cue in words for cue in INCLUDE_CUES)
+            for facet, pattern in self._patterns.items():
+                for match in pattern.finditer(clause):
+                    before = clause[:match.start()].split()
+                    after = clause[match.end():].split()
+                    value = normalize(match.group(1))
+                    if facet == 'roast_level':
+                        # Istilah sangrai hanya bermakna jika diikuti 'roast' (bukan 'medium body')
+                        if not after or not after[0].startswith('roast'):
+                            continue
+                        values = ROAST_TERMS[value]
+                    elif facet == 'origin':
+                        values = (ORIGIN_ADJECTIVES.get(value, value),)
+                    else:
+                        values = (value,)
+                    if facet == 'tags' and not has_cue:
+                        continue
+                    if _negated(before):
+                        query.reject(facet, values)
+                    elif has_cue or (facet == 'origin' and before[-1:] == ['from']):
+                        query.require(facet, values)
+        return query
@@ -29,6 +29,37 @@ class RecipeFrame:
             return round(self.water_grams / self.coffee_grams, 1)
         return 0
 
+    def sop_raw_data(self, bean_name):
+        """Data mentah resep yang menjadi input prompt SOP."""
+        return (
+            f"TARGET BEAN: {bean_name}\n"
+            f"METHOD: {self.brew_method}\n"
+            f"RATIO: {self.coffee_grams}g Coffee to {self.water_grams}ml Water\n"
+            f"TEMP: {self.water_temp_c}°C\n"
+            f"GRIND: {self.grind_size}\n"
+            f"TECHNIQUE: {self.technique_notes}\n"
+        )
+
+    def to_sop_text(self, bean_name):
+        """
+        SOP deterministik (tanpa LLM) dari slot resep.
+        Dipakai sebagai fallback saat LLM tidak tersedia.
+        """
+        return (
+            f"| Parameter | Value |\n"
+            f"|---|---|\n"
+            f"| Bean | {bean_name} |\n"
+            f"| Method | {self.brew_method} |\n"
+            f"| Dose | {self.coffee_grams}g coffee : {self.water_grams}ml water (1:{self.get_ratio()}) |\n"
+            f"| Water Temp | {self.water_temp_c}°C |\n"
+            f"| Grind | {self.grind_size} |\n\n"
+            f"**Steps:**\n"
+            f"1. Heat water to {self.water_temp_c}°C.\n"
+            f"2. Grind {self.coffee_grams}g coffee {str(self.grind_size).lower()}.\n"
+            f"3. Brew with {self.water_grams}ml water using {self.brew_method}.\n"
+            f"4. {self.technique_notes}"
+        )
+
     def __repr__(self):
         """Untuk Debugging."""
         return f"<RecipeFrame ID={self.recipe_id} Method='{self.brew_method}' for BeanID='{self.bean_id}'>"
\ No newline at end of file
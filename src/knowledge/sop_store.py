@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import threading
+from src.utils.logger import setup_logger
+
+logger = setup_logger("SOPStore")
+
+# Naikkan versi ini jika prompt SOP berubah, agar semua SOP tersimpan dianggap usang.
+SOP_PROMPT_VERSION = 1
+SOP_CONTEXT = "You are a Technical Manual Generator."
+
+
+def build_sop_prompt(recipe, bean_name):
+    """Prompt Anti-Hallucination & Anti-Fluff untuk mengubah RecipeFrame menjadi SOP."""
+    return f"""
+        TASK: Convert the RAW DATA below into a Technical Brewing Standard Operating Procedure (SOP).
+
+        CONSTRAINTS:
+        1. NO conversational filler (e.g., "Here is your recipe", "Enjoy").
+        2. NO introductory or concluding paragraphs. Start directly with the parameters.
+        3. Use a Table or Bullet points for parameters.
+        4. Steps must be numbered, imperative, and extremely concise (under 10 words per step if possible).
+        5. DO NOT invent information not present in the RAW DATA.
+
+        RAW DATA:
+        {recipe.sop_raw_data(bean_name)}
+        """
+
+
+def is_synthetic(llm):
+    """True jika LLM memakai backend deterministik (LocalBackend), termasuk di balik record/replay."""
+    backend = getattr(llm, 'backend', None)
+    while backend is not None:
+        if getattr(backend, 'deterministic', False):
+            return True
+        backend = getattr(backend, 'inner', None)
+    return False
+
+
+def recipe_content_hash(recipe, bean_name):
+    """Hash konten resep (slot + nama bean + versi prompt). Berubah -> SOP harus dibuat ulang."""
+    payload = {
+        'v': SOP_PROMPT_VERSION,
+        'bean_name': bean_name,
+        'recipe_id': recipe.recipe_id,
+        'brew_method': recipe.brew_method,
+        'grind_size': recipe.grind_size,
+        'coffee_grams': recipe.coffee_grams,
+        'water_grams': recipe.water_grams,
+        'water_temp_c': recipe.water_temp_c,
+        'technique_notes': recipe.technique_notes,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()
+
+
+class SOPStore:
+    """
+    Penyimpanan SOP resep hasil pra-komputasi, dikunci dengan content hash resep.
+    Format file: { recipe_id: {"hash": ..., "text": ...} }
+    """
+
+    def __init__(self, path='datasets/recipe_sops.json'):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            logger.info(f"Memuat {len(entries)} SOP tersimpan dari {self.path}")
+            return entries
+        except Exception as e:
+            logger.error(f"Gagal memuat SOP store: {e}")
+            return {}
+
+    def get(self, recipe, bean_name):
+        """SOP tersimpan jika hash masih cocok, selain itu None (perlu generate ulang)."""
+        entry = self.entries.get(recipe.recipe_id)
+        if entry and entry.get('hash') == recipe_content_hash(recipe, bean_name):
+            return entry['text']
+        return None
+
+    def put(self, recipe, bean_name, text, persist=True):
+        with self._lock:
+            self.entries[recipe.recipe_id] = {
+                'hash': recipe_content_hash(recipe, bean_name),
+                'text': text,
+            }
+            if persist:
+                self._save()
+
+    def _save(self):
+        # Tulis atomik: file sementara lalu replace
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def build(self, recipes, beans, llm, force=False):
+        """
+        Build step: generate SOP untuk setiap resep yang belum ada / berubah.
+        Return (jumlah dibuat, jumlah dilewati). Ditolak untuk backend deterministik:
+        teks sintetis tidak boleh masuk file SOP yang dikirim bersama aplikasi.
+        """
+        if is_synthetic(llm):
+            logger.error("Backend LLM deterministik (LLM_BACKEND=local): SOP build dibatalkan, file tidak diubah.")
+            return 0, 0
+        bean_names = {bean.id: bean.name for bean in beans}
+        generated, skipped = 0, 0
+        for recipe in recipes:
+            bean_name = bean_names.get(recipe.bean_id, recipe.bean_id)
+            if not force and self.get(recipe, bean_name) is not None:
+                skipped += 1
+                continue
+            text = llm.generate_response(build_sop_prompt(recipe, bean_name), context=SOP_CONTEXT, fallback="")
+            if not text:
+                logger.warning(f"SOP untuk {recipe.recipe_id} gagal dibuat, dilewati.")
+                continue
+            self.put(recipe, bean_name, text, persist=False)
+            generated += 1
+        with self._lock:
+            self._save()
+        logger.info(f"SOP build selesai: {generated} dibuat, {skipped} masih valid.")
+        return generated, skipped
+
+
+def main():
+    """CLI: python -m src.knowledge.sop_store [--force] [--out PATH]"""
+    import argparse
+    from src.core.llm_service import LLMService
+    from src.knowledge.loader import KnowledgeLoader
+
+    parser = argparse.ArgumentParser(description="Pra-komputasi SOP untuk semua resep.")
+    parser.add_argument('--force', action='store_true', help="Generate ulang semua SOP.")
+    parser.add_argument('--out', default='datasets/recipe_sops.json')
+    args = parser.parse_args()
+
+    llm = LLMService()
+    if not llm.is_available() or is_synthetic(llm):
+        logger.error("LLM tidak tersedia atau sintetis (cek GEMINI_API_KEY / LLM_BACKEND). Build dibatalkan.")
+        return 1
+
+    beans, recipes = KnowledgeLoader('datasets/coffee_beans.json', 'datasets/brew_recipes.json').load_knowledge()
+    SOPStore(args.out).build(recipes, beans, llm, force=args.force)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+from src.knowledge.facet_index import FacetIndex
+from src.knowledge.loader import KnowledgeLoader
+from src.knowledge.tag_postings import TagPostings
+from src.knowledge.tag_vocabulary import TagVocabulary
+from src.utils import metrics
+from src.utils.logger import setup_logger
+
+logger = setup_logger("KnowledgeStore")
+
+BEANS_PATH = 'datasets/coffee_beans.json'
+RECIPES_PATH = 'datasets/brew_recipes.json'
+TROUBLESHOOTING_PATH = 'datasets/troubleshooting_knowledge_base.json'
+
+KNOWLEDGE_RECORDS = metrics.gauge("baristabox_knowledge_records", "Ukuran KnowledgeStore bersama per jenis.", ("kind",))
+
+
+class KnowledgeStore:
+    """
+    Basis pengetahuan read-only yang dimuat sekali per proses dan dipakai bersama.
+    Sesi Blackboard hanya menyimpan id/kunci (bean id, recipe id, cause key) dan
+    me-resolve-nya lewat store ini saat dibaca.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, beans=None, recipes=None, kb_rules=None):
+        self.beans = list(beans or [])
+        self.recipes = list(recipes or [])
+        self.kb_rules = kb_rules or {}
+        self.beans_by_id = {bean.id: bean for bean in self.beans}
+        self.recipes_by_id = {recipe.recipe_id: recipe for recipe in self.recipes}
+        # Bitmap facet bean (roast/processing/origin/type/tag) untuk filter keras Sommelier
+        self.facets = FacetIndex(self.beans)
+        # Tag id kanonik per bean + pemetaan kata preferensi (sinonim/stem) untuk scoring
+        self.tags = TagVocabulary(self.beans)
+        # Posting tag -> bean untuk top-k (WAND) tanpa scan seluruh katalog
+        self.postings = TagPostings(self.tags)
+
+    @classmethod
+    def load(cls, beans_path=BEANS_PATH, recipes_path=RECIPES_PATH, kb_path=TROUBLESHOOTING_PATH):
+        beans, recipes = KnowledgeLoader(beans_path, recipes_path).load_knowledge()
+        return cls(beans, recipes, cls.load_troubleshooting(kb_path))
+
+    @staticmethod
+    def load_troubleshooting(kb_path=TROUBLESHOOTING_PATH):
+        """Troubleshooting KB mentah ({problem: {causes: ...}}); {} jika file tidak ada."""
+        if not os.path.exists(kb_path):
+            logger.error(f"File troubleshooting tidak ditemukan: {kb_path}")
+            return {}
+        with open(kb_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @classmethod
+    def default(cls):
+        """Store bersama proses ini (dimuat malas saat pertama kali dibutuhkan)."""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls.load()
+        return cls._default
+
+    @classmethod
+    def set_default(cls, store):
+        cls._default = store
+
+    @classmethod
+    def _default_size(cls, kind):
+        # Tidak memicu load: sebelum store dimuat, ukurannya 0
+        store = cls._default
+        if store is None:
+            return 0
+        return {'beans': len(store.beans), 'recipes': len(store.recipes), 'problems': len(store.kb_rules)}[kind]
+
+    # --- RESOLVE ---
+
+    def bean(self, bean_id):
+        return self.beans_by_id.get(bean_id)
+
+    def recipe(self, recipe_id):
+        return self.recipes_by_id.get(recipe_id)
+
+    def cause(self, problem_key, cause_key):
+        """Data penyebab (question/solution) dari troubleshooting KB, atau None."""
+        return self.kb_rules.get(problem_key, {}).get('causes', {}).get(cause_key)
+
+
+for _kind in ('beans', 'recipes', 'problems'):
+    KNOWLEDGE_RECORDS.set_function(lambda kind=_kind: KnowledgeStore._default_size(kind), kind=_kind)
@@ -0,0 +1,143 @@
+import heapq
+from array import array
+from bisect import bisect_left
+from src.utils.logger import setup_logger
+
+logger = setup_logger("TagPostings")
+
+
+class TagPostings:
+    """
+    Indeks terbalik tag id -> posting (index bean, urut naik) di atas TagVocabulary,
+    untuk top-k Sommelier tanpa men-scan seluruh katalog.
+
+    top_k memakai algoritma WAND: setiap posting tag punya kontribusi maksimum
+    (bobot positif kata preferensi yang dipetakan ke tag itu). Bean hanya di-score
+    jika gabungan kontribusi maksimum posting yang memuatnya bisa melewati skor
+    ke-k saat ini; posting lain dilompati dengan bisect, dan pencarian berhenti
+    begitu tidak ada bean tersisa yang bisa menang.
+
+    Hasilnya sama persis dengan scan penuh + sort stabil (skor turun, seri -> urutan
+    katalog): skor dihitung dengan TagQuery.score yang sama, batas atas hanya dipakai
+    untuk melompati bean (TagQuery.upper_bound, aman terhadap pembulatan float). Bobot
+    negatif tidak menaikkan batas atas; jika total bobot <= 0 urutan skor terbalik
+    terhadap bobot, jadi jatuh ke scan penuh.
+    """
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+        self.size = len(vocabulary.bean_tags)
+        self.postings = [array('I') for _ in vocabulary.texts]
+        for i, tag_ids in enumerate(vocabulary.bean_tags):
+            for tag_id in tag_ids:
+                self.postings[tag_id].append(i)
+        # Jumlah bean yang di-score pada top_k terakhir (untuk benchmark/tes)
+        self.last_evaluated = 0
+
+    def top_k(self, query, k, mask=None):
+        """
+        List (skor, index bean) terbaik untuk TagQuery, urut skor turun lalu index naik.
+        `mask` (opsional) = bitmap kandidat FacetIndex; bean di luar mask diabaikan.
+        """
+        if k <= 0:
+            return []
+        allowed = None if mask is None else mask.to_bytes((self.size + 7) // 8, 'little')
+        if query.total <= 0:
+            return self.scan(query, k, allowed)
+
+        heap = self._wand(query, k, allowed)
+        results = sorted(((score, -neg_index) for score, neg_index in heap), key=lambda item: (-item[0], item[1]))
+        if len(results) < k:
+            results += self._fill(query, k - len(results), allowed, {i for _, i in results})
+        return results
+
+    def scan(self, query, k, allowed=None):
+        """Scan penuh (referensi dan fallback): score semua kandidat lalu sort stabil."""
+        bean_tags = self.vocabulary.bean_tags
+        scored = [(query.score(bean_tags[i]), i) for i in self._iter_allowed(allowed)]
+        self.last_evaluated = len(scored)
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:k]
+
+    def _wand(self, query, k, allowed):
+        """Heap-min (skor, -index) berisi maksimal k bean berskor > 0 terbaik."""
+        bean_tags = self.vocabulary.bean_tags
+        cursors = []
+        for tag_id, bits in query.tag_masks.items():
+            postings = self.postings[tag_id]
+            if bits & query.positive and postings:
+                # [index bean saat ini, posisi, posting, bit kata (kontribusi maksimum)]
+                cursors.append([postings[0], 0, postings, bits])
+
+        heap = []
+        threshold = 0.0
+        evaluated = 0
+        while cursors:
+            cursors.sort(key=lambda cursor: cursor[0])
+            # Pivot: posting pertama yang membuat batas atas gabungan melewati skor ke-k
+            bits = 0
+            pivot = None
+            for j, cursor in enumerate(cursors):
+                bits |= cursor[3]
+                if query.upper_bound(bits) > threshold:
+                    pivot = j
+                    break
+            if pivot is None:
+                break
+            doc = cursors[pivot][0]
+
+            if cursors[0][0] == doc:
+                if allowed is None or allowed[doc >> 3] >> (doc & 7) & 1:
+                    evaluated += 1
+                    score = query.score(bean_tags[doc])
+                    # Bean diproses urut index: seri dengan skor ke-k selalu kalah
+                    if score > threshold:
+                        if len(heap) < k:
+                            heapq.heappush(heap, (score, -doc))
+                        else:
+                            heapq.heapreplace(heap, (score, -doc))
+                        if len(heap) == k:
+                            threshold = heap[0][0]
+                target = doc + 1
+                advance = [cursor for cursor in cursors if cursor[0] == doc]
+            else:
+                # Bean sebelum pivot hanya ada di posting sebelum pivot: tidak bisa menang
+                target = doc
+                advance = cursors[:pivot]
+
+            for cursor in advance:
+                postings = cursor[2]
+                position = bisect_left(postings, target, cursor[1])
+                cursor[1] = position
+                if position < len(postings):
+                    cursor[0] = postings[position]
+            cursors = [cursor for cursor in cursors if cursor[1] < len(cursor[2])]
+
+        self.last_evaluated = evaluated
+        return heap
+
+    def _fill(self, query, count, allowed, taken):
+        """
+        Kurang dari k bean berskor positif: sisanya bean berskor <= 0 terbaik. Skor
+        maksimum di sini 0, jadi scan urut index berhenti setelah `count` bean berskor 0.
+        """
+        bean_tags = self.vocabulary.bean_tags
+        rest = []
+        zeros = 0
+        for i in self._iter_allowed(allowed):
+            if i in taken:
+                continue
+            score = query.score(bean_tags[i])
+            self.last_evaluated += 1
+            rest.append((score, i))
+            if score == 0:
+                zeros += 1
+                if zeros == count:
+                    break
+        rest.sort(key=lambda item: item[0], reverse=True)
+        return rest[:count]
+
+    def _iter_allowed(self, allowed):
+        for i in range(self.size):
+            if allowed is None or allowed[i >> 3] >> (i & 7) & 1:
+                yield i
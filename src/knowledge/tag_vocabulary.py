@@ -0,0 +1,222 @@
+import difflib
+import json
+import os
+import re
+import threading
+from collections import Counter
+from src.utils import metrics
+from src.utils.logger import setup_logger
+
+logger = setup_logger("TagVocabulary")
+
+SYNONYMS_PATH = 'datasets/tag_synonyms.json'
+
+UNMAPPED_TERMS = metrics.counter(
+    "baristabox_unmapped_preference_terms", "Kata preferensi yang tidak cocok dengan tag katalog mana pun.",
+)
+
+_WORD = re.compile(r"[a-z]+")
+_SUFFIXES = ('iness', 'ness', 'ity', 'ish', 'ing', 'ey', 'ly', 'ic', 'ed', 'es', 'y', 's', 'e')
+
+
+def stem(word):
+    """
+    Stemmer ringan untuk kata rasa: 'fruity'/'fruits' -> 'fruit', 'chocolatey'/'chocolate'
+    -> 'chocolat', 'nutty'/'nuts' -> 'nut'. Cukup untuk menyamakan bentuk kata, bukan linguistik.
+    """
+    word = word.lower()
+    for suffix in _SUFFIXES:
+        # Suffix panjang butuh sisa kata lebih panjang: 'acidity' -> 'acid', tapi 'fruity' bukan 'fru'
+        min_stem = 3 if len(suffix) == 1 else 4
+        if word.endswith(suffix) and len(word) - len(suffix) >= min_stem and not (suffix == 's' and word.endswith('ss')):
+            word = word[:-len(suffix)]
+            break
+    # Konsonan ganda sisa suffix: 'nutt' -> 'nut'
+    if len(word) >= 4 and word[-1] == word[-2] and word[-1] not in 'aeiouls':
+        word = word[:-1]
+    return word
+
+
+def load_synonyms(path=SYNONYMS_PATH):
+    """Tabel sinonim {kata preferensi: [istilah tag kanonik, ...]}; {} jika file tidak ada."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            table = json.load(f)
+    except Exception as e:
+        logger.error(f"Gagal memuat tabel sinonim tag: {e}")
+        return {}
+    return {term.lower(): [target.lower() for target in targets] for term, targets in table.items()}
+
+
+class TagQuery:
+    """
+    Preferensi satu query yang sudah dipetakan ke tag id: tag id -> bitmask kata preferensi
+    yang cocok. Skor satu bean = OR bitmask semua tag-nya, lalu jumlah bobot bit aktif
+    (dihitung sekali per kombinasi dan di-cache).
+
+    Urutan penjumlahan sama persis dengan CBREngine.calculate_weighted_tag_similarity,
+    jadi tanpa sinonim/stem skornya identik bit-per-bit dengan jalur substring lama.
+    """
+
+    def __init__(self, preferences, resolve):
+        self.terms = list(preferences)
+        self.weights = [preferences[term] for term in self.terms]
+        self.total = sum(self.weights)
+        self.tag_masks = {}
+        self.unmapped = []
+        for bit, term in enumerate(self.terms):
+            tag_ids = resolve(term)
+            if not tag_ids:
+                self.unmapped.append(term)
+            for tag_id in tag_ids:
+                self.tag_masks[tag_id] = self.tag_masks.get(tag_id, 0) | (1 << bit)
+        # Bit kata berbobot positif: hanya ini yang bisa menaikkan skor (batas atas top-k)
+        self.positive = sum(1 << bit for bit, weight in enumerate(self.weights) if weight > 0)
+        self._scores = {}
+
+    def score(self, tag_ids):
+        mask = 0
+        for tag_id in tag_ids:
+            mask |= self.tag_masks.get(tag_id, 0)
+        return self.mask_score(mask)
+
+    def mask_score(self, mask):
+        if self.total == 0:
+            return 0.0
+        score = self._scores.get(mask)
+        if score is None:
+            score = self._scores[mask] = self._score_mask(mask)
+        return score
+
+    def upper_bound(self, mask):
+        """
+        Skor maksimum bean yang kata cocoknya subset dari `mask` (untuk total > 0).
+        Penjumlahan float berurutan monoton, jadi batas ini berlaku juga setelah pembulatan.
+        """
+        return self.mask_score(mask & self.positive)
+
+    def _score_mask(self, mask):
+        total_score = 0.0
+        for bit, weight in enumerate(self.weights):
+            if mask >> bit & 1:
+                total_score += 1.0 * weight
+        return (total_score / self.total) * 100
+
+    def matches(self, tag_id):
+        return tag_id in self.tag_masks
+
+
+class TagVocabulary:
+    """
+    Kosakata tag kanonik katalog: setiap expert_tag (huruf kecil) mendapat id integer
+    dan setiap bean disimpan sebagai tuple tag id, dibangun sekali saat katalog dimuat.
+
+    Kata preferensi dari LLM dipetakan ke tag id sekali per query (resolve):
+      substring pada teks tag (perilaku lama)  U  stem kata yang sama  U  tabel sinonim.
+    Kata yang tidak terpetakan dihitung untuk laporan admin (unmapped_report) agar
+    tabel sinonim (datasets/tag_synonyms.json) bisa terus dilengkapi.
+    """
+
+    # Batas cache resolve per kata (kata dari LLM bebas, jangan tumbuh tanpa batas)
+    MAX_CACHED_TERMS = 10000
+
+    def __init__(self, beans, synonyms=None, stemming=True):
+        self.texts = []
+        self.ids = {}
+        self.bean_tags = []
+        for bean in beans:
+            tag_ids = set()
+            for tag in bean.expert_tags or ():
+                key = tag.lower()
+                tag_id = self.ids.get(key)
+                if tag_id is None:
+                    tag_id = self.ids[key] = len(self.texts)
+                    self.texts.append(key)
+                tag_ids.add(tag_id)
+            self.bean_tags.append(tuple(sorted(tag_ids)))
+
+        self.stemming = stemming
+        self.stems = {}
+        for tag_id, text in enumerate(self.texts):
+            for word in _WORD.findall(text):
+                self.stems.setdefault(stem(word), set()).add(tag_id)
+        self.synonyms = load_synonyms() if synonyms is None else {
+            term.lower(): [target.lower() for target in targets] for term, targets in synonyms.items()
+        }
+
+        self._resolved = {}
+        self._lock = threading.Lock()
+        self.unmapped = Counter()
+
+    def _substring_ids(self, term):
+        return {tag_id for tag_id, text in enumerate(self.texts) if term in text}
+
+    def _stem_ids(self, term):
+        ids = set()
+        for word in _WORD.findall(term):
+            word_stem = stem(word)
+            if len(word_stem) >= 3:
+                ids |= self.stems.get(word_stem, set())
+        return ids
+
+    def resolve(self, term):
+        """Frozenset tag id yang cocok dengan satu kata preferensi."""
+        cached = self._resolved.get(term)
+        if cached is not None:
+            return cached
+        ids = self._substring_ids(term)
+        if isinstance(term, str):
+            lowered = term.lower()
+            if self.stemming:
+                ids |= self._stem_ids(lowered)
+            for target in self.synonyms.get(lowered, ()):
+                ids |= self._substring_ids(target)
+                if self.stemming:
+                    ids |= self._stem_ids(target)
+        resolved = frozenset(ids)
+        if len(self._resolved) >= self.MAX_CACHED_TERMS:
+            self._resolved.clear()
+        self._resolved[term] = resolved
+        return resolved
+
+    def compile(self, preferences):
+        """Dict preferensi {kata: bobot} -> TagQuery; kata tak terpetakan dicatat."""
+        query = TagQuery(preferences, self.resolve)
+        if query.unmapped:
+            UNMAPPED_TERMS.inc(len(query.unmapped))
+            with self._lock:
+                self.unmapped.update(str(term).lower() for term in query.unmapped)
+        return query
+
+    def tag_names(self, tag_ids):
+        return [self.texts[tag_id] for tag_id in tag_ids]
+
+    def unmapped_report(self, limit=50):
+        """Kata preferensi tak terpetakan terbanyak + saran tag terdekat untuk tabel sinonim."""
+        with self._lock:
+            top = self.unmapped.most_common(limit)
+        return [
+            {'term': term, 'count': count, 'suggestions': difflib.get_close_matches(term, self.texts, n=3, cutoff=0.5)}
+            for term, count in top
+        ]
+
+
+def main():
+    """CLI: python -m src.knowledge.tag_vocabulary KATA [KATA ...] -> tag yang cocok per kata."""
+    import argparse
+    from src.knowledge.store import KnowledgeStore
+
+    parser = argparse.ArgumentParser(description="Cek pemetaan kata preferensi ke tag katalog.")
+    parser.add_argument('terms', nargs='+')
+    args = parser.parse_args()
+
+    vocabulary = KnowledgeStore.default().tags
+    for term in args.terms:
+        tags = vocabulary.tag_names(sorted(vocabulary.resolve(term)))
+        print(f"{term:<20} -> {', '.join(tags) if tags else '(tidak terpetakan)'}")
+
+
+if __name__ == "__main__":
+    main()
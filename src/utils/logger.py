@@ -1,24 +1,189 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
 import sys
+import threading
+import time
+
+# Format: [WAKTU] [NAMA_MODUL] - PESAN
+TEXT_FORMAT = '[%(asctime)s] [%(name)s] %(levelname)s: %(message)s'
+TEXT_DATEFMT = '%H:%M:%S'
+
+
+def _parse_mapping(spec, cast):
+    """'Blackboard=WARNING,LLMService=INFO' -> {'Blackboard': 'WARNING', ...}; entri rusak diabaikan."""
+    mapping = {}
+    for item in (spec or '').split(','):
+        name, sep, value = item.partition('=')
+        if not sep or not name.strip():
+            continue
+        try:
+            mapping[name.strip()] = cast(value.strip())
+        except ValueError:
+            continue
+    return mapping
+
+
+class JsonFormatter(logging.Formatter):
+    """Satu record = satu baris JSON (ts, level, logger, msg, thread, trace_id, exc)."""
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'thread': record.threadName,
+        }
+        trace_id = getattr(record, 'trace_id', None)
+        if trace_id:
+            entry['trace_id'] = trace_id
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Loloskan hanya sebagian record di bawah WARNING (rate 0..1).
+    WARNING ke atas selalu lolos supaya error tidak pernah hilang.
+    """
+
+    def __init__(self, rate, rng=None):
+        super().__init__()
+        self.rate = rate
+        self._rng = rng or random.Random()
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self._rng.random() < self.rate
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler yang TIDAK memformat pesan di thread pemanggil: msg + args %-style
+    diteruskan apa adanya dan baru digabung oleh listener di thread latar belakang.
+    Jika antrean penuh, record dibuang (dihitung) alih-alih memblokir turn.
+    Karena penggabungan ditunda, args yang mutable tercetak sesuai isinya saat diformat.
+    """
+
+    def __init__(self, log_queue, maxsize=0):
+        super().__init__(log_queue)
+        self.maxsize = maxsize
+        self.dropped = 0
+
+    def handle(self, record):
+        # SimpleQueue sudah thread-safe: tidak perlu lock Handler di jalur panas
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def prepare(self, record):
+        # trace_id diambil di sini karena contextvar span tidak terlihat dari thread listener
+        if not hasattr(record, 'trace_id'):
+            span = _current_span()
+            record.trace_id = span.trace.trace_id if span.sampled else None
+        return record
+
+    def enqueue(self, record):
+        # Batas antrean longgar (qsize tanpa lock) cukup untuk mencegah memori tumbuh tanpa batas
+        if self.maxsize and self.queue.qsize() >= self.maxsize:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+class _QueueLogging:
+    """Satu antrean + satu listener (thread latar belakang) untuk semua logger proses ini."""
+
+    def __init__(self, formatter, maxsize, stream=None):
+        self.queue = queue.SimpleQueue()
+        self.handler = DeferredQueueHandler(self.queue, maxsize)
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(formatter)
+        self.listener = logging.handlers.QueueListener(self.queue, output, respect_handler_level=False)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        # Kosongkan antrean sebelum proses keluar
+        if self.listener._thread is not None:
+            self.listener.stop()
+        if self.handler.dropped:
+            sys.stderr.write(f"[logger] {self.handler.dropped} record log dibuang karena antrean penuh.\n")
+
+
+def _current_span():
+    # Import malas: modul tracing sendiri memakai setup_logger
+    from src.utils.tracing import current_span
+    return current_span()
+
+
+_queue_logging = None
+_queue_lock = threading.Lock()
+
+
+def _config():
+    return {
+        'handler': os.environ.get("LOG_HANDLER", "stream").lower(),
+        'format': os.environ.get("LOG_FORMAT", "").lower(),
+        'level': os.environ.get("LOG_LEVEL", "DEBUG").upper(),
+        'levels': _parse_mapping(os.environ.get("LOG_LEVELS"), str.upper),
+        'sample': _parse_mapping(os.environ.get("LOG_SAMPLE"), float),
+        'queue_size': int(os.environ.get("LOG_QUEUE_SIZE", 10000)),
+    }
+
+
+def _formatter(kind):
+    if kind == 'json':
+        return JsonFormatter()
+    return logging.Formatter(fmt=TEXT_FORMAT, datefmt=TEXT_DATEFMT)
+
+
+def _shared_queue_handler(config):
+    global _queue_logging
+    with _queue_lock:
+        if _queue_logging is None:
+            # Handler antrean menghasilkan JSON terstruktur kecuali LOG_FORMAT=text
+            _queue_logging = _QueueLogging(_formatter(config['format'] or 'json'), config['queue_size'])
+        return _queue_logging.handler
+
 
 def setup_logger(name):
     """
     Membuat logger yang terkonfigurasi dengan format yang rapi untuk debugging.
+
+    Konfigurasi lewat environment (call site tidak perlu berubah):
+      LOG_HANDLER  -> 'stream' (default: StreamHandler sinkron ke stdout) atau
+                      'queue' (format + I/O di thread latar belakang, JSON per baris)
+      LOG_FORMAT   -> 'text' | 'json' (default: text untuk stream, json untuk queue)
+      LOG_LEVEL    -> level default semua logger (default DEBUG)
+      LOG_LEVELS   -> level per logger, mis. 'Blackboard=WARNING,LLMService=INFO'
+      LOG_SAMPLE   -> sampling record di bawah WARNING per logger, mis. 'Blackboard=0.1,*=0.5'
     """
     logger = logging.getLogger(name)
-    
+
     # Mencegah duplikasi log jika dipanggil berkali-kali
     if not logger.handlers:
-        logger.setLevel(logging.DEBUG)
-        
-        # Format: [WAKTU] [NAMA_MODUL] - PESAN
-        formatter = logging.Formatter(
-            fmt='[%(asctime)s] [%(name)s] %(levelname)s: %(message)s',
-            datefmt='%H:%M:%S'
-        )
-        
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        
-    return logger
\ No newline at end of file
+        config = _config()
+        try:
+            logger.setLevel(config['levels'].get(name, config['level']))
+        except ValueError:
+            logger.setLevel(logging.DEBUG)
+
+        rate = config['sample'].get(name, config['sample'].get('*'))
+        if rate is not None and rate < 1.0:
+            logger.addFilter(SamplingFilter(rate))
+
+        if config['handler'] == 'queue':
+            logger.addHandler(_shared_queue_handler(config))
+        else:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(_formatter(config['format'] or 'text'))
+            logger.addHandler(handler)
+
+    return logger
@@ -0,0 +1,316 @@
+import bisect
+import math
+import os
+import threading
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.utils.logger import setup_logger
+
+logger = setup_logger("Metrics")
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bucket default (detik) dari ~1ms sampai ~30s: inferensi lokal hingga panggilan LLM lambat
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Shards:
+    """
+    Nilai metrik dipecah per thread: setiap thread hanya menulis ke dict miliknya sendiri,
+    jadi jalur panas (inc/observe) tidak pernah mengambil lock. Lock hanya dipakai saat
+    thread baru pertama kali menulis dan saat scrape menggabungkan semua shard.
+
+    Shard milik thread yang sudah mati (mis. ScriptRunner Streamlit per rerun) dilebur ke
+    `_base` dengan `merge(base, key, value)`, sehingga jumlah shard dibatasi thread hidup.
+    """
+
+    def __init__(self, merge):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._merge = merge
+        self._base = {}
+        self._all = []
+
+    def get(self):
+        shard = getattr(self._local, 'values', None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._lock:
+                self._fold_dead()
+                self._all.append((weakref.ref(threading.current_thread()), shard))
+        return shard
+
+    def _fold_dead(self):
+        # Thread mati tidak akan menulis lagi, jadi shard-nya aman dilebur tanpa koordinasi
+        live = []
+        for owner, shard in self._all:
+            thread = owner()
+            if thread is not None and thread.is_alive():
+                live.append((owner, shard))
+            else:
+                for key, value in shard.items():
+                    self._merge(self._base, key, value)
+        self._all = live
+
+    def snapshot(self):
+        with self._lock:
+            self._fold_dead()
+            # merge selalu membuat nilai baru, jadi salinan dangkal _base tidak ikut berubah
+            base = dict(self._base)
+            shards = [shard for _, shard in self._all]
+        # dict.copy() atomik di bawah GIL, aman walau thread pemilik sedang menulis
+        return [base] + [shard.copy() for shard in shards]
+
+
+def _merge_sum(base, key, value):
+    base[key] = base.get(key, 0.0) + value
+
+
+def _merge_buckets(base, key, state):
+    total = base.get(key)
+    base[key] = list(state) if total is None else [a + b for a, b in zip(total, state)]
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames) or any(name not in labels for name in self.labelnames):
+            raise ValueError(f"Metrik '{self.name}' butuh label {self.labelnames}, dapat {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """List (suffix, label dict, nilai) untuk exposition."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._shards = _Shards(_merge_sum)
+
+    def inc(self, amount=1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counter hanya boleh naik.")
+        shard = self._shards.get()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        key = self._key(labels)
+        return sum(shard.get(key, 0.0) for shard in self._shards.snapshot())
+
+    def samples(self):
+        totals = {}
+        for shard in self._shards.snapshot():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0.0) + value
+        return [('_total', dict(zip(self.labelnames, key)), value) for key, value in sorted(totals.items())]
+
+
+class Gauge(_Metric):
+    """
+    Nilai sesaat. Bisa di-set langsung, atau didaftarkan sebagai fungsi yang baru
+    dievaluasi saat scrape (gratis di jalur panas, mis. jumlah sesi aktif).
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._functions = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn, **labels):
+        self._functions[self._key(labels)] = fn
+
+    def value(self, **labels):
+        key = self._key(labels)
+        if key in self._functions:
+            return float(self._functions[key]())
+        return self._values.get(key, 0.0)
+
+    def samples(self):
+        values = dict(self._values)
+        for key, fn in list(self._functions.items()):
+            try:
+                values[key] = float(fn())
+            except Exception as e:
+                logger.warning(f"Gauge '{self.name}' {key} gagal dievaluasi: {e}")
+        return [('', dict(zip(self.labelnames, key)), value) for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._shards = _Shards(_merge_buckets)
+
+    def observe(self, value, **labels):
+        shard = self._shards.get()
+        key = self._key(labels)
+        state = shard.get(key)
+        if state is None:
+            # [hitungan per bucket (non-kumulatif) ..., +Inf, sum, count]
+            state = shard[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def samples(self):
+        merged = {}
+        for shard in self._shards.snapshot():
+            for key, state in shard.items():
+                total = merged.setdefault(key, [0] * len(state))
+                for i, value in enumerate(list(state)):
+                    total[i] += value
+        samples = []
+        for key, state in sorted(merged.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state):
+                cumulative += count
+                samples.append(('_bucket', dict(labels, le=_format_value(bound)), cumulative))
+            samples.append(('_sum', labels, state[-2]))
+            samples.append(('_count', labels, state[-1]))
+        return samples
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return f"{value:.1f}"
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """Kumpulan metrik proses; `render()` menghasilkan format teks Prometheus (0.0.4)."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metrik '{name}' sudah terdaftar dengan tipe/label berbeda.")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                label_text = f"{{{label_text}}}" if label_text else ''
+                lines.append(f"{metric.name}{suffix}{label_text} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.gauge(name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
+
+
+# --- EXPOSITION HTTP ---
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port, host='127.0.0.1', registry=REGISTRY):
+    """
+    Endpoint Prometheus (GET /metrics) di thread daemon. Idempotent per proses:
+    rerun script Streamlit tidak membuka port kedua. Return server yang aktif.
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        _server = ThreadingHTTPServer((host, port), MetricsHandler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-exporter", daemon=True).start()
+        logger.info(f"Metrics Prometheus tersedia di http://{host}:{_server.server_address[1]}/metrics")
+        return _server
+
+
+def start_exporter_from_env():
+    """Buka endpoint jika METRICS_PORT di-set (METRICS_HOST default 127.0.0.1)."""
+    port = os.environ.get("METRICS_PORT")
+    if not port:
+        return None
+    try:
+        return start_http_server(int(port), host=os.environ.get("METRICS_HOST", "127.0.0.1"))
+    except (OSError, ValueError) as e:
+        logger.error(f"Gagal membuka endpoint metrics di port {port}: {e}")
+        return None
@@ -0,0 +1,211 @@
+import contextlib
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+DEFAULT_PATH = 'startup_profile.json'
+
+
+def current_rss_mb():
+    """RSS proses saat ini (MB). Tanpa /proc: puncak RSS dari getrusage; None jika tidak tersedia."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: byte di macOS, kilobyte di Linux/BSD
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+class ImportTimer:
+    """
+    Mengukur setiap import baru lewat importlib._bootstrap._find_and_load, titik yang
+    sama dengan `python -X importtime`. Per modul dicatat waktu kumulatif (termasuk
+    import bersarang) dan self time (tanpa anak). Import di thread lain dicatat dengan
+    stack per thread.
+    """
+
+    def __init__(self):
+        self.records = {}   # nama modul -> [self_s, cumulative_s]
+        self._local = threading.local()
+        self._original = None
+        self._bootstrap = sys.modules.get('_frozen_importlib')
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def install(self):
+        if self._original is not None:
+            return self
+        if self._bootstrap is None or not hasattr(self._bootstrap, '_find_and_load'):
+            return self
+        original = self._original = self._bootstrap._find_and_load
+
+        def timed_find_and_load(name, import_):
+            if name in sys.modules:
+                return original(name, import_)
+            stack = self._stack()
+            stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                return original(name, import_)
+            finally:
+                elapsed = time.perf_counter() - started
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                self.records[name] = [elapsed - children, elapsed]
+
+        self._bootstrap._find_and_load = timed_find_and_load
+        return self
+
+    def uninstall(self):
+        if self._original is not None:
+            self._bootstrap._find_and_load = self._original
+            self._original = None
+
+    def report(self):
+        modules = sorted(self.records.items(), key=lambda item: item[1][1], reverse=True)
+        packages = {}
+        for name, (self_s, _) in modules:
+            root = name.split('.')[0]
+            packages[root] = packages.get(root, 0.0) + self_s
+        return {
+            'count': len(modules),
+            'total_s': round(sum(self_s for self_s, _ in self.records.values()), 6),
+            # Jumlah self time per paket top-level (torch, transformers, streamlit, src, ...)
+            'packages': {name: round(seconds, 6) for name, seconds in
+                         sorted(packages.items(), key=lambda item: item[1], reverse=True)},
+            'modules': [{'module': name, 'self_s': round(self_s, 6), 'cumulative_s': round(cum_s, 6)}
+                        for name, (self_s, cum_s) in modules],
+        }
+
+
+class StartupProfiler:
+    """
+    Satu sesi profiling cold start: waktu import per modul, plus wall time, CPU time
+    thread pemanggil (fase StartupGraph berjalan paralel di thread berbeda) dan RSS di
+    akhir setiap `phase(name)`.
+
+    Aktif lewat STARTUP_PROFILE=<path.json> (atau 1 -> startup_profile.json); report
+    ditulis di akhir bootstrap.load_agents. Bandingkan dua rilis dengan
+      python -m benchmarks.startup_profile --diff lama.json baru.json
+    Modul ini hanya memakai stdlib agar bisa di-import sebelum dependensi berat.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.imports = ImportTimer()
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.imports.install()
+        return self
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield
+        finally:
+            entry = {
+                'start_s': round(wall_started - self.started, 6),
+                'wall_s': round(time.perf_counter() - wall_started, 6),
+                'cpu_s': round(time.thread_time() - cpu_started, 6),
+                'rss_mb': _round(current_rss_mb()),
+            }
+            with self._lock:
+                self.phases[name] = entry
+
+    def report(self):
+        return {
+            'meta': {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'cpus': os.cpu_count(),
+                'argv': list(sys.argv),
+            },
+            'total': {
+                'wall_s': round(time.perf_counter() - self.started, 6),
+                'cpu_s': round(time.process_time() - self.cpu_started, 6),
+                'rss_mb': _round(current_rss_mb()),
+            },
+            'phases': dict(sorted(self.phases.items(), key=lambda item: item[1]['start_s'])),
+            'imports': self.imports.report(),
+        }
+
+    def finish(self):
+        """Lepas hook import, tulis report ke `path` (jika ada). Return dict report."""
+        self.imports.uninstall()
+        report = self.report()
+        if self.path:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        return report
+
+
+def _round(value, digits=3):
+    return None if value is None else round(value, digits)
+
+
+# --- PROFILER PROSES ---
+
+_active = None
+_started = False
+
+
+def start(path=None):
+    """Mulai profiling untuk proses ini (sekali saja; rerun script Streamlit tidak memulai ulang)."""
+    global _active, _started
+    if _started:
+        return _active
+    _started = True
+    _active = StartupProfiler(path).start()
+    return _active
+
+
+def start_from_env():
+    """Mulai profiling jika STARTUP_PROFILE di-set (path JSON, atau 1 untuk path default)."""
+    value = os.environ.get("STARTUP_PROFILE", "")
+    if value.lower() in ('', '0', 'false', 'no'):
+        return None
+    return start(DEFAULT_PATH if value.lower() in ('1', 'true', 'yes') else value)
+
+
+def active():
+    return _active
+
+
+def phase(name):
+    """Context manager fase; no-op jika profiling tidak aktif."""
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.phase(name)
+
+
+def finish():
+    """Akhiri profiling aktif dan tulis report-nya. Return dict report, atau None."""
+    global _active
+    profiler, _active = _active, None
+    if profiler is None:
+        return None
+    return profiler.finish()
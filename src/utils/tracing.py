@@ -0,0 +1,241 @@
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from src.utils.logger import setup_logger
+
+logger = setup_logger("Tracing")
+
+# Span yang sedang aktif (per thread / per task asyncio)
+_current_span = contextvars.ContextVar('trace_span', default=None)
+
+
+class _NoopSpan:
+    """Span kosong untuk turn yang tidak disampel: semua operasi tidak melakukan apa-apa."""
+
+    sampled = False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Satu rentang waktu dalam trace (turn, process() agen, forward pass model, panggilan LLM)."""
+
+    sampled = True
+
+    def __init__(self, trace, name, parent_id=None, attributes=None):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.thread_id = threading.get_ident()
+        self.start_ns = None
+        self.end_ns = None
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def duration_ms(self):
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.trace.finish_span(self)
+        return False
+
+
+class Trace:
+    """Kumpulan span satu turn; diekspor saat root span selesai."""
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def finish_span(self, span):
+        with self._lock:
+            self.spans.append(span)
+        if span.parent_id is None:
+            self.tracer.finish_trace(self)
+
+
+class Tracer:
+    """
+    Tracing ringan per turn dengan sampling di awal trace (head sampling):
+    turn yang tidak disampel hanya membayar satu angka acak dan span kosong.
+
+    Konfigurasi:
+      TRACE_SAMPLE_RATE  -> 0.0 (mati, default) .. 1.0 (semua turn)
+      TRACE_EXPORT_DIR   -> direktori output (default 'traces'); kosongkan untuk hanya menyimpan di memori
+      TRACE_FORMAT       -> 'chrome' (chrome://tracing / Perfetto, default) atau 'otlp' (OTLP/JSON)
+
+    Satu file per trace: <dir>/<waktu>-<trace_id>.<format>.json
+    """
+
+    FORMATS = ('chrome', 'otlp')
+
+    def __init__(self, sample_rate=None, export_dir=None, export_format=None, rng=None, keep_recent=50):
+        if sample_rate is None:
+            sample_rate = float(os.environ.get("TRACE_SAMPLE_RATE", 0.0))
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.export_dir = export_dir if export_dir is not None else os.environ.get("TRACE_EXPORT_DIR", "traces")
+        export_format = (export_format or os.environ.get("TRACE_FORMAT", "chrome")).lower()
+        if export_format not in self.FORMATS:
+            logger.warning(f"TRACE_FORMAT '{export_format}' tidak dikenal, memakai chrome.")
+            export_format = 'chrome'
+        self.export_format = export_format
+        self._rng = rng or random.Random()
+        # Trace terakhir yang selesai (untuk inspeksi / test)
+        self.recent = deque(maxlen=keep_recent)
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0.0
+
+    def start_trace(self, name, **attributes):
+        """Root span sebuah turn. Keputusan sampling diambil sekali di sini."""
+        if not self.enabled or (self.sample_rate < 1.0 and self._rng.random() >= self.sample_rate):
+            return NOOP_SPAN
+        return Span(Trace(self, name), name, attributes=attributes)
+
+    @staticmethod
+    def span(name, **attributes):
+        """Span anak dari span aktif; span kosong jika turn ini tidak disampel."""
+        parent = _current_span.get()
+        if parent is None:
+            return NOOP_SPAN
+        return Span(parent.trace, name, parent_id=parent.span_id, attributes=attributes)
+
+    # --- EKSPOR ---
+
+    def finish_trace(self, trace):
+        self.recent.append(trace)
+        if not self.export_dir:
+            return
+        try:
+            os.makedirs(self.export_dir, exist_ok=True)
+            exporter = to_chrome_trace if self.export_format == 'chrome' else to_otlp_json
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            path = os.path.join(self.export_dir, f"{stamp}-{trace.trace_id}.{self.export_format}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(exporter(trace), f, default=str)
+        except OSError as e:
+            logger.error(f"Gagal mengekspor trace {trace.trace_id}: {e}")
+
+
+def to_chrome_trace(trace):
+    """Format Chrome Trace Event (complete events 'X', mikrodetik)."""
+    events = []
+    for span in sorted(trace.spans, key=lambda s: s.start_ns):
+        args = dict(span.attributes)
+        if span.error:
+            args['error'] = span.error
+        events.append({
+            'name': span.name,
+            'cat': span.name.split('.')[0],
+            'ph': 'X',
+            'ts': span.start_ns / 1000.0,
+            'dur': (span.end_ns - span.start_ns) / 1000.0,
+            'pid': os.getpid(),
+            'tid': span.thread_id,
+            'args': args,
+        })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'trace_id': trace.trace_id}}
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def to_otlp_json(trace):
+    """Format OTLP/JSON (ExportTraceServiceRequest) agar bisa dikirim ke collector OpenTelemetry."""
+    spans = []
+    for span in sorted(trace.spans, key=lambda s: s.start_ns):
+        entry = {
+            'traceId': trace.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(span.start_ns),
+            'endTimeUnixNano': str(span.end_ns),
+            'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in span.attributes.items()],
+            'status': {'code': 2, 'message': span.error} if span.error else {'code': 1},
+        }
+        if span.parent_id:
+            entry['parentSpanId'] = span.parent_id
+        spans.append(entry)
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': 'baristabox'}}]},
+        'scopeSpans': [{'scope': {'name': 'baristabox.tracing'}, 'spans': spans}],
+    }]}
+
+
+# --- TRACER PROSES ---
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer
+
+
+def set_tracer(tracer):
+    """Ganti tracer proses (test, harness)."""
+    global _tracer
+    _tracer = tracer
+
+
+def span(name, **attributes):
+    return get_tracer().span(name, **attributes)
+
+
+def current_span():
+    """Span aktif, atau span kosong; aman dipanggil dari mana saja untuk menambah atribut."""
+    return _current_span.get() or NOOP_SPAN
@@ -0,0 +1,193 @@
+import unittest
+import asyncio
+import json
+import sys
+import os
+import tempfile
+import threading
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.api.asgi_app import BaristaBoxAPI
+from src.core.deadline import Deadline
+from src.core.session_manager import SessionManager
+from src.core.state_backends import SQLiteStateBackend
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class EchoOrchestrator:
+    """Orchestrator palsu: membalas setiap pesan user dengan satu pesan bot."""
+
+    def run_cycle(self, board):
+        board.add_bot_message(f"echo: {board.get_last_user_input()}")
+        return Deadline(1.0)
+
+
+async def call(app, method, path, body=None):
+    """Panggil aplikasi ASGI secara langsung, kembalikan (status, json)."""
+    scope = {'type': 'http', 'method': method, 'path': path, 'headers': []}
+    messages = [{'type': 'http.request', 'body': json.dumps(body).encode() if body is not None else b''}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    payload = b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body')
+    return sent[0]['status'], json.loads(payload)
+
+
+class TestHeadlessAPI(unittest.TestCase):
+
+    def setUp(self):
+        self.app = BaristaBoxAPI(orchestrator=EchoOrchestrator(), backend_kind='memory', max_workers=4)
+
+    def tearDown(self):
+        self.app.executor.shutdown(wait=True)
+
+    def test_session_turn_roundtrip(self):
+        async def scenario():
+            status, created = await call(self.app, 'POST', '/sessions')
+            self.assertEqual(status, 201)
+            sid = created['session_id']
+
+            status, reply = await call(self.app, 'POST', f'/sessions/{sid}/messages', {'text': 'hello'})
+            self.assertEqual(status, 200)
+            self.assertEqual(reply['messages'], [{'seq': 2, 'role': 'assistant', 'content': 'echo: hello'}])
+
+            status, snapshot = await call(self.app, 'GET', f'/sessions/{sid}')
+            self.assertEqual(len(snapshot['messages']), 2)
+
+            status, _ = await call(self.app, 'POST', f'/sessions/{sid}/messages', {'wrong': 1})
+            self.assertEqual(status, 400)
+            status, _ = await call(self.app, 'GET', '/sessions/missing')
+            self.assertEqual(status, 404)
+
+            status, report = await call(self.app, 'GET', '/memory')
+            self.assertEqual(status, 200)
+            self.assertIn(sid, report['per_session_bytes'])
+        asyncio.run(scenario())
+
+    def test_concurrent_sessions(self):
+        async def scenario():
+            sids = [(await call(self.app, 'POST', '/sessions'))[1]['session_id'] for _ in range(10)]
+            replies = await asyncio.gather(*[
+                call(self.app, 'POST', f'/sessions/{sid}/messages', {'text': sid}) for sid in sids
+            ])
+            for sid, (status, reply) in zip(sids, replies):
+                self.assertEqual(reply['messages'][0]['content'], f'echo: {sid}')
+        asyncio.run(scenario())
+
+    def test_server_sent_events(self):
+        async def scenario():
+            sid = (await call(self.app, 'POST', '/sessions'))[1]['session_id']
+            chunks = []
+            disconnect = asyncio.Event()
+
+            async def receive():
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                chunks.append(message)
+                if b'event: message' in message.get('body', b''):
+                    disconnect.set()
+
+            scope = {'type': 'http', 'method': 'GET', 'path': f'/sessions/{sid}/events', 'headers': []}
+            stream = asyncio.ensure_future(self.app(scope, receive, send))
+            await asyncio.sleep(0.05)
+            await call(self.app, 'POST', f'/sessions/{sid}/messages', {'text': 'ping'})
+            await asyncio.wait_for(stream, timeout=5)
+
+            body = b''.join(m.get('body', b'') for m in chunks[1:]).decode()
+            self.assertIn('event: message', body)
+            self.assertIn('echo: ping', body)
+        asyncio.run(scenario())
+
+    def test_stream_error_does_not_restart_response(self):
+        async def scenario():
+            sid = (await call(self.app, 'POST', '/sessions'))[1]['session_id']
+            sent = []
+
+            async def receive():
+                await asyncio.sleep(10)
+
+            async def send(message):
+                sent.append(message)
+                if message['type'] == 'http.response.body':
+                    raise ConnectionResetError("client gone")
+
+            self.app.keepalive_seconds = 0.01
+            scope = {'type': 'http', 'method': 'GET', 'path': f'/sessions/{sid}/events', 'headers': []}
+            await asyncio.wait_for(self.app(scope, receive, send), timeout=5)
+            self.assertEqual([m['type'] for m in sent], ['http.response.start', 'http.response.body'])
+        asyncio.run(scenario())
+
+    def test_running_turn_pins_session(self):
+        started, release = threading.Event(), threading.Event()
+
+        class SlowOrchestrator(EchoOrchestrator):
+            def run_cycle(self, board):
+                started.set()
+                release.wait(5)
+                return super().run_cycle(board)
+
+        manager = SessionManager('memory', ttl_seconds=0, max_sessions=1, spill_dir='')
+        app = BaristaBoxAPI(orchestrator=SlowOrchestrator(), backend_kind='memory', max_workers=4,
+                            session_manager=manager)
+
+        async def scenario():
+            sid = (await call(app, 'POST', '/sessions'))[1]['session_id']
+            turn = asyncio.ensure_future(call(app, 'POST', f'/sessions/{sid}/messages', {'text': 'slow'}))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            # Sesi lain melewati batas LRU dan sweep TTL berjalan saat turn masih jalan
+            await call(app, 'POST', '/sessions')
+            self.assertEqual(manager.sweep(), [])
+            release.set()
+            status, reply = await turn
+            self.assertEqual(reply['messages'][0]['content'], 'echo: slow')
+            self.assertTrue(manager.exists(sid))
+
+            status, report = await call(app, 'GET', '/admin/unmapped-tags')
+            self.assertEqual(status, 200)
+        try:
+            asyncio.run(scenario())
+        finally:
+            app.executor.shutdown(wait=True)
+
+    def test_sqlite_backend_rejects_unknown_sessions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sessions.db")
+            replicas = [BaristaBoxAPI(
+                orchestrator=EchoOrchestrator(), backend_kind='sqlite', max_workers=2,
+                session_manager=SessionManager('sqlite', spill_dir='',
+                                               backend_factory=lambda sid: SQLiteStateBackend(sid, path)),
+            ) for _ in range(2)]
+
+            async def scenario():
+                for action in ('', '/events'):
+                    status, _ = await call(replicas[0], 'GET', f'/sessions/never-created{action}')
+                    self.assertEqual(status, 404)
+                status, _ = await call(replicas[0], 'POST', '/sessions/never-created/messages', {'text': 'hi'})
+                self.assertEqual(status, 404)
+
+                # Sesi yang dibuat satu replika dikenali replika lain lewat database bersama
+                sid = (await call(replicas[0], 'POST', '/sessions'))[1]['session_id']
+                status, reply = await call(replicas[1], 'POST', f'/sessions/{sid}/messages', {'text': 'hello'})
+                self.assertEqual(status, 200)
+                self.assertEqual(reply['messages'][0]['content'], 'echo: hello')
+            try:
+                asyncio.run(scenario())
+            finally:
+                for replica in replicas:
+                    replica.executor.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.blackboard import Blackboard
+from src.core.state_backends import InMemoryStateBackend, SQLiteStateBackend, MemorySessionStore
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class TestChatHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.saved_limit = os.environ.get("CHAT_HISTORY_LIMIT")
+        os.environ["CHAT_HISTORY_LIMIT"] = "4"
+
+    def tearDown(self):
+        if self.saved_limit is None:
+            os.environ.pop("CHAT_HISTORY_LIMIT", None)
+        else:
+            os.environ["CHAT_HISTORY_LIMIT"] = self.saved_limit
+
+    def _converse(self, board, turns):
+        for i in range(turns):
+            board.add_user_message(f"question {i}")
+            board.add_bot_message(f"answer {i}")
+
+    def test_ring_buffer_compacts_old_turns(self):
+        board = Blackboard(InMemoryStateBackend('h', MemorySessionStore()))
+        self.assertIsNone(board.get_history_summary())
+        self._converse(board, 5)
+
+        history = board.get_chat_history()
+        self.assertEqual([m['content'] for m in history], ['question 3', 'answer 3', 'question 4', 'answer 4'])
+        self.assertEqual([m['seq'] for m in history], [7, 8, 9, 10])
+        summary = board.get_history_summary()
+        self.assertIn("6 earlier messages compacted", summary)
+        self.assertIn('"question 0"', summary)
+        self.assertEqual(board.get_last_user_input(), 'question 4')
+
+    def test_messages_since(self):
+        board = Blackboard(InMemoryStateBackend('h', MemorySessionStore()))
+        self._converse(board, 1)
+        seen = board.last_message_seq()
+        board.add_user_message("next")
+        board.add_bot_message("reply")
+        self.assertEqual([m['content'] for m in board.get_messages_since(seen)], ['next', 'reply'])
+        self.assertEqual(board.get_messages_since(board.last_message_seq()), [])
+
+    def test_legacy_list_history_is_upgraded(self):
+        backend = InMemoryStateBackend('legacy', MemorySessionStore())
+        backend.set(Blackboard.KEY_MESSAGES, [{"role": "user", "content": f"old {i}"} for i in range(6)])
+        board = Blackboard(backend)
+        board.add_bot_message("new")
+        self.assertEqual([m['content'] for m in board.get_chat_history()], ['old 3', 'old 4', 'old 5', 'new'])
+        self.assertIn("3 earlier messages compacted", board.get_history_summary())
+
+    def test_history_reads_do_not_recompact(self):
+        backend = InMemoryStateBackend('legacy', MemorySessionStore())
+        backend.set(Blackboard.KEY_MESSAGES, [{"role": "user", "content": f"old {i}"} for i in range(6)])
+        board = Blackboard(backend)
+        for _ in range(3):
+            self.assertEqual(len(board.get_chat_history()), 4)
+            board.get_messages_since(0)
+        summary = board.get_history_summary()
+        self.assertIn("2 earlier messages compacted", summary)
+        self.assertEqual(summary.count('"old 0"'), 1)
+
+    def test_ring_buffer_survives_sqlite(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state.db")
+            self._converse(Blackboard(SQLiteStateBackend('s', path)), 3)
+            board = Blackboard(SQLiteStateBackend('s', path))
+            self.assertEqual(len(board.get_chat_history()), 4)
+            self.assertEqual(board.last_message_seq(), 6)
+            self.assertIn("2 earlier messages", board.get_history_summary())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import sys
+import os
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.deadline import Deadline
+from src.core.llm_service import LLMService
+from src.core.llm_backends import LocalBackend
+from src.core.orchestrator import Orchestrator
+from src.core.blackboard import Blackboard
+from src.core.state_backends import InMemoryStateBackend, MemorySessionStore
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class RecordingAgent:
+    """Agen palsu yang mencatat deadline yang terlihat saat process() dipanggil."""
+
+    def __init__(self, log, name):
+        self.log = log
+        self.name = name
+
+    def process(self):
+        self.log.append((self.name, Deadline.current()))
+
+
+class TestDeadline(unittest.TestCase):
+
+    def test_budget_accounting(self):
+        now = [0.0]
+        deadline = Deadline(2.0, clock=lambda: now[0])
+        self.assertTrue(deadline.allows(1.5))
+        now[0] = 1.0
+        self.assertAlmostEqual(deadline.remaining(), 1.0)
+        self.assertFalse(deadline.allows(1.5))
+        now[0] = 3.0
+        self.assertTrue(deadline.expired())
+
+    def test_context_activation(self):
+        self.assertIsNone(Deadline.current())
+        with Deadline(1.0) as deadline:
+            self.assertIs(Deadline.current(), deadline)
+        self.assertIsNone(Deadline.current())
+
+    def test_llm_sheds_when_budget_short(self):
+        saved = LLMService._instance
+        LLMService._instance = None
+        try:
+            llm = LLMService()
+            backend = LocalBackend(rules=[(r".*", "live")])
+            llm.use_backend(backend)
+            llm.min_call_budget = 1.0
+
+            with Deadline(0.2) as deadline:
+                result = llm.generate_response("hi", fallback="cheap", step="brewer.sop")
+                cf = llm.interpret_certainty("yes definitely", "Q")
+            self.assertEqual(result, "cheap")
+            self.assertEqual(cf, ("YES", 1.0))
+            self.assertEqual(backend.call_count, 0)
+            self.assertEqual(deadline.shed_steps, ["brewer.sop", "llm.interpret_certainty"])
+
+            with Deadline(5.0):
+                self.assertEqual(llm.generate_response("hi", fallback="cheap"), "live")
+        finally:
+            LLMService._instance = saved
+
+    def test_intent_sheds_problem_classifier_when_budget_short(self):
+        from src.agents.intent_agent import IntentAgent
+        agent = IntentAgent.__new__(IntentAgent)
+        agent.name, agent.logger = 'Intent', logging.getLogger('test')
+        agent.models_loaded, agent.known_bean_names = True, []
+        agent.intent_model = agent.intent_tokenizer = agent.intent_le = 'intent'
+        agent.doc_model = agent.doc_tokenizer = agent.doc_le = 'problem'
+        calls = []
+        agent._predict = lambda text, model, tokenizer, le: calls.append(model) or ('doctor' if model == 'intent' else 'sour')
+
+        board = Blackboard(InMemoryStateBackend('t', MemorySessionStore()))
+        board.add_user_message("my espresso tastes sour")
+        with board.bind(), Deadline(0.1) as deadline:
+            agent.process()
+        self.assertEqual(calls, ['intent'])
+        self.assertEqual(deadline.shed_steps, ['intent.classify_problem'])
+        self.assertEqual(board.get_intent(), 'doctor')
+        self.assertNotIn('initial_problem_classification', board.get_evidence())
+
+        with board.bind(), Deadline(5.0) as deadline:
+            agent.process()
+        self.assertEqual(calls, ['intent', 'intent', 'problem'])
+        self.assertEqual(board.get_evidence()['initial_problem_classification'], 'sour')
+
+    def test_orchestrator_propagates_deadline(self):
+        log = []
+        agents = [RecordingAgent(log, n) for n in ('intent', 'doctor', 'sommelier', 'brewer')]
+        orchestrator = Orchestrator(*agents, turn_budget=3.0)
+        deadline = orchestrator.run_cycle(Blackboard(InMemoryStateBackend('t', MemorySessionStore())))
+
+        self.assertEqual([n for n, _ in log], ['intent', 'sommelier', 'brewer', 'doctor'])
+        self.assertTrue(all(d is deadline for _, d in log))
+        self.assertEqual(deadline.budget, 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.knowledge.bean_frame import BeanFrame
+from src.knowledge.facet_index import FacetIndex, FacetQuery
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+def bean(i, origin, roast, processing, tags, bean_type='Arabica'):
+    return BeanFrame({'id': f'b{i}', 'name': f'Bean {i}', 'origin': origin, 'roast_level': roast,
+                      'processing': processing, 'type': bean_type, 'expert_tags': tags})
+
+
+class TestFacetIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.beans = [
+            bean(0, 'Ethiopia', 1, 'Washed', ['Fruity', 'Floral']),
+            bean(1, 'Ethiopia', 2, 'Natural', ['Fruity', 'Winey']),
+            bean(2, 'Indonesia', 4, 'Wet-Hulled', ['Earthy', 'Chocolate']),
+            bean(3, 'Brazil', 5, 'Natural', ['Nutty', 'Chocolate']),
+            bean(4, 'India', 5, 'Washed', ['Bold'], bean_type='Robusta'),
+            bean(5, 'Kenya', 3, 'Washed', ['Bright']),
+        ]
+        self.index = FacetIndex(self.beans)
+
+    def names(self, text):
+        query = self.index.parse(text)
+        return [b.id for b in self.index.select(self.index.candidates(query), self.beans)]
+
+    def test_parser_hard_constraints(self):
+        self.assertEqual(self.names("dark roast only"), ['b2', 'b3', 'b4'])
+        self.assertEqual(self.names("no naturals please"), ['b0', 'b2', 'b4', 'b5'])
+        self.assertEqual(self.names("something fruity from Ethiopia"), ['b0', 'b1'])
+        self.assertEqual(self.names("medium-dark roast only, no wet-hulled"), [])
+        self.assertEqual(self.names("not from ethiopia, robusta only"), ['b4'])
+        # Sebutan tanpa penanda tetap preferensi lunak
+        self.assertFalse(self.index.parse("fruity but not bitter, medium body"))
+        self.assertEqual(self.index.parse("only chocolate").include, {'tags': {'chocolate'}})
+
+    def test_parser_negated_and_casual_phrasings(self):
+        # Negasi beberapa kata sebelum nilai, bukan hanya kata tepat sebelumnya
+        query = self.index.parse("I'm not really a fan of dark roasts")
+        self.assertEqual((query.include, query.exclude), ({}, {'roast_level': {4, 5}}))
+        self.assertEqual(self.index.parse("avoid anything that is from Kenya").exclude, {'origin': {'kenya'}})
+        # Negasi sesudah nilai (atau setelah kata sambung) tidak membalik batasan yang diminta
+        query = self.index.parse("Something from Kenya with no bitterness")
+        self.assertEqual((query.include, query.exclude), ({'origin': {'kenya'}}, {}))
+        query = self.index.parse("Only dark roast without any acidity")
+        self.assertEqual((query.include, query.exclude), ({'roast_level': {4, 5}}, {}))
+        query = self.index.parse("give me a light roast that is not too sour")
+        self.assertEqual(query.exclude, {})
+        query = self.index.parse("no naturals and dark roast only")
+        self.assertEqual((query.include, query.exclude), ({'roast_level': {4, 5}}, {'processing': {'natural'}}))
+        # 'just' dan sebutan sangrai tanpa penanda tetap preferensi lunak
+        self.assertFalse(self.index.parse("I just want something fruity and sweet"))
+        self.assertFalse(self.index.parse("a dark roast sounds nice"))
+        # Kata sifat asal dipetakan ke origin
+        self.assertEqual(self.names("Only Ethiopian coffees please"), ['b0', 'b1'])
+        self.assertEqual(self.names("fruity, but no Kenyan beans"), ['b0', 'b1', 'b2', 'b3', 'b4'])
+        self.assertEqual(self.index.parse("strictly indian").include, {'origin': {'india'}})
+
+    def test_bitmaps_match_brute_force_for_dense_and_sparse_values(self):
+        # Katalog lebih besar: 'Kenya' jadi nilai langka (daftar posisi), 'Washed' padat (bitmap)
+        beans = [self.beans[i % 5] for i in range(200)] + [self.beans[5]]
+        index = FacetIndex(beans)
+        self.assertIsInstance(index._entries['processing']['washed'], int)
+        self.assertNotIsInstance(index._entries['origin']['kenya'], int)
+
+        query = FacetQuery().require('processing', {'washed'}).require('origin', {'kenya', 'india'})
+        query.reject('roast_level', {5})
+        expected = [i for i, b in enumerate(beans)
+                    if b.processing == 'Washed' and b.origin in ('Kenya', 'India') and b.roast_level != 5]
+        mask = index.candidates(query)
+        self.assertEqual(index.indices(mask), expected)
+        self.assertEqual(index.count(mask), 1)
+        self.assertEqual(index.indices(index.candidates(FacetQuery())), list(range(len(beans))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import json
+import math
+import random
+import sys
+import os
+import tempfile
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from src.core.cbr_engine import CBREngine
+from src.core.fuzzy_engine import FuzzyEngine, VARIABLES, RULES, load_brew_log
+from src.core.question_planner import combine_cf
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class TestFuzzyEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = FuzzyEngine()
+
+    def test_temperature_identical_to_cbr_engine(self):
+        rng = random.Random(0)
+        temps = [85, 90, 91, 92, 93, 94, 95, 96, 97, 89.999, 94.0001, 95.5, 96.0001]
+        temps += [rng.uniform(80.0, 105.0) for _ in range(5000)] + [t / 100 for t in range(8500, 10000)]
+        batch = self.engine.fuzzify_batch('temperature', temps)
+        for i, temp in enumerate(temps):
+            expected = CBREngine.fuzzy_check_temperature(temp)
+            self.assertEqual(self.engine.fuzzify('temperature', temp), expected)
+            for term, value in expected.items():
+                self.assertEqual(batch[term][i], value)
+                self.assertEqual(math.copysign(1.0, batch[term][i]), math.copysign(1.0, value))
+
+    def test_rules_produce_certainty_factors(self):
+        result = self.engine.infer({'temperature': 91, 'brew_time': 130, 'grind_size': 850})
+        self.assertEqual(result['water_temp_low'], 0.5)
+        self.assertEqual(result['brew_time_short'], (150 - 130) / 30)
+        # Dua aturan grind_coarse digabung ala MYCIN
+        self.assertEqual(result['grind_coarse'], combine_cf([(850 - 750) / 150 * 0.9, min((850 - 750) / 150, 2 / 3) * 0.6]))
+        self.assertNotIn('bad_ratio', result)
+
+    def test_batch_matches_scalar_and_skips_missing_values(self):
+        rng = random.Random(1)
+        rows = [{'temperature': rng.uniform(85, 100), 'brew_time': rng.uniform(90, 300), 'grind_size': rng.uniform(300, 1100),
+                 'ratio': rng.uniform(12, 20), 'dose': rng.uniform(8, 25)} for _ in range(300)]
+        rows[0]['ratio'] = math.nan
+        columns = {name: [row[name] for row in rows] for name in VARIABLES}
+        batch = self.engine.infer_batch(columns)
+        for i, row in enumerate(rows):
+            for conclusion, cf in self.engine.infer(row).items():
+                self.assertAlmostEqual(batch[conclusion][i], cf, places=12)
+        self.assertEqual(batch['bad_ratio'][0], combine_cf([0.0, self.engine.fuzzify('dose', rows[0]['dose'])['LOW'] * 0.6]))
+
+    def test_rules_and_logs_loaded_from_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rules_path = os.path.join(tmp, 'rules.json')
+            with open(rules_path, 'w') as f:
+                json.dump({'variables': VARIABLES, 'rules': RULES[:1]}, f)
+            engine = FuzzyEngine.from_json(rules_path)
+            self.assertEqual(engine.conclusions, ['water_temp_low'])
+
+            log_path = os.path.join(tmp, 'brews.csv')
+            with open(log_path, 'w') as f:
+                f.write("temperature,brew_time,note\n88,,cold kettle\n95,200,\n")
+            rows, columns = load_brew_log(log_path)
+            self.assertEqual(set(columns), {'temperature', 'brew_time'})
+            self.assertTrue(np.isnan(columns['brew_time'][0]))
+            self.assertEqual(list(engine.infer_batch(columns)['water_temp_low']), [1.0, 0.0])
+
+        with self.assertRaises(ValueError):
+            FuzzyEngine(rules=[{'if': [('temperature', 'WARM')], 'then': 'x', 'cf': 1.0}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.llm_service import LLMService
+from src.core.llm_backends import (
+    LocalBackend, LatencyModel, RecordReplayBackend, ReplayMissError, LocalBackendError,
+)
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class TestLocalBackend(unittest.TestCase):
+
+    def setUp(self):
+        self._saved_instance = LLMService._instance
+        LLMService._instance = None
+        self.llm = LLMService()
+        self.llm.use_backend(LocalBackend())
+
+    def tearDown(self):
+        LLMService._instance = self._saved_instance
+
+    def test_default_rules_drive_service_methods(self):
+        """Backend lokal menjawab prompt LLMService secara deterministik, tanpa jaringan."""
+        self.assertEqual(self.llm.interpret_certainty("Yes, exactly", "Q"), ("YES", 1.0))
+        self.assertEqual(self.llm.interpret_certainty("I don't think so", "Q"), ("NO", 0.6))
+        self.assertEqual(self.llm.extract_weighted_preferences("fruity but not bitter"),
+                         {'fruity': 1.0, 'bitter': -1.0})
+        self.assertEqual(self.llm.extract_numerical_value("it was 91 degrees", "temperature"), 91.0)
+
+    def test_scripted_rules_and_templates(self):
+        backend = LocalBackend(rules=[(r"Recommend (\w+)", "Try {0}!")], default_response="?")
+        self.assertEqual(backend.generate("Recommend Kenya now"), "Try Kenya!")
+        self.assertEqual(backend.generate("unrelated"), "?")
+
+    def test_latency_distribution_is_seeded(self):
+        a = LatencyModel.from_spec("lognormal:0.5,0.4")
+        b = LatencyModel.from_spec("lognormal:0.5,0.4")
+        self.assertEqual([a.sample() for _ in range(5)], [b.sample() for _ in range(5)])
+
+    def test_latency_and_error_injection(self):
+        slept = []
+        slow = LocalBackend(rules=[], latency="fixed:2.0", sleep=slept.append)
+        with self.assertRaises(TimeoutError):
+            slow.generate("x", timeout=0.5)
+        self.assertEqual(slept, [0.5])
+
+        flaky = LocalBackend(rules=[], error_rate=1.0, sleep=lambda s: None)
+        with self.assertRaises(LocalBackendError):
+            flaky.generate("x")
+
+
+class TestRecordReplayBackend(unittest.TestCase):
+
+    def test_record_then_replay(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rec.jsonl")
+            inner = LocalBackend(rules=[(r"ping", "pong")])
+            recorder = RecordReplayBackend(path, mode='record', inner=inner)
+            self.assertEqual(recorder.generate("ping 1"), "pong")
+
+            replay = RecordReplayBackend(path, mode='replay')
+            self.assertEqual(replay.generate("ping 1"), "pong")
+            with self.assertRaises(ReplayMissError):
+                replay.generate("ping 2")
+
+
+if __name__ == '__main__':
+    unittest.main()
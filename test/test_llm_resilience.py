@@ -0,0 +1,187 @@
+import unittest
+import json
+import sys
+import os
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.llm_service import LLMService
+from src.core.resilience import TokenBucket, CircuitBreaker, RetryPolicy
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class StubLLMServer:
+    """
+    Server HTTP lokal yang meniru endpoint LLM.
+    `script` adalah antrian aksi: ('ok', text), ('error', status), ('sleep', detik, text).
+    Jika antrian habis, server membalas ('ok', 'default').
+    """
+
+    def __init__(self):
+        self.script = []
+        self.request_count = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                stub.request_count += 1
+                action = stub.script.pop(0) if stub.script else ('ok', 'default')
+                if action[0] == 'sleep':
+                    time.sleep(action[1])
+                    action = ('ok', action[2])
+                if action[0] == 'error':
+                    self.send_response(action[1])
+                    self.end_headers()
+                    return
+                body = json.dumps({'text': action[1]}).encode()
+                try:
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Klien sudah menyerah (timeout)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.block_on_close = False
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/generate"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubHttpModel:
+    """Adapter dengan antarmuka `generate_content` seperti GenerativeModel, tapi lewat HTTP ke stub."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def generate_content(self, prompt, request_options=None):
+        timeout = (request_options or {}).get('timeout')
+        req = urllib.request.Request(self.url, data=json.dumps({'prompt': prompt}).encode(), method='POST')
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return _Response(json.loads(resp.read())['text'])
+
+
+class TestLLMResilience(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubLLMServer()
+        # Instance terisolasi (bukan singleton global) agar breaker tidak bocor antar test
+        self._saved_instance = LLMService._instance
+        LLMService._instance = None
+        self.llm = LLMService()
+        self.llm.model = StubHttpModel(self.server.url)
+        self.llm.call_timeout = 1.0
+        self.llm.retry_policy = RetryPolicy(max_retries=2, base_delay=0.01, max_delay=0.02)
+        self.llm.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60.0)
+
+    def tearDown(self):
+        LLMService._instance = self._saved_instance
+        self.server.close()
+
+    def test_retry_on_transient_errors(self):
+        """503 dua kali lalu sukses -> jawaban sukses, 3 request terkirim."""
+        self.server.script = [('error', 503), ('error', 503), ('ok', 'hello')]
+        self.assertEqual(self.llm.generate_response("hi"), "hello")
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_no_retry_on_permanent_error(self):
+        """400 bukan error sementara -> tidak di-retry, fallback dikembalikan."""
+        self.server.script = [('error', 400)]
+        self.assertEqual(self.llm.generate_response("hi", fallback="FB"), "FB")
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_deadline_bounds_slow_calls(self):
+        """Latensi di atas deadline -> fallback dikembalikan dalam batas waktu."""
+        self.server.script = [('sleep', 2.0, 'late')] * 3
+        start = time.monotonic()
+        result = self.llm.generate_response("hi", fallback="FB", timeout=0.3)
+        self.assertEqual(result, "FB")
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    def test_breaker_counts_logical_calls(self):
+        """Retry dalam satu panggilan hanya dihitung sebagai satu kegagalan."""
+        self.server.script = [('error', 503)] * 3
+        self.assertEqual(self.llm.generate_response("hi", fallback="FB"), "FB")
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(self.llm.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.llm.is_available())
+
+    def test_permanent_error_leaves_half_open_breaker(self):
+        """4xx saat probe HALF_OPEN bukan bukti pulih: breaker tetap HALF_OPEN, probe dilepas."""
+        now = [0.0]
+        self.llm.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=lambda: now[0])
+        self.llm.breaker.record_failure()
+        now[0] = 11.0
+        self.server.script = [('error', 400)]
+        self.assertEqual(self.llm.generate_response("hi", fallback="FB"), "FB")
+        self.assertEqual(self.llm.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.llm.is_available())
+        self.assertEqual(self.llm.generate_response("hi", fallback="FB"), "default")
+        self.assertEqual(self.llm.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_breaker_opens_and_fails_fast(self):
+        """Setelah ambang kegagalan, panggilan berikutnya tidak menyentuh server."""
+        self.server.script = [('error', 503)] * 9
+        for _ in range(3):
+            self.assertEqual(self.llm.generate_response("hi", fallback="FB"), "FB")
+        self.assertFalse(self.llm.is_available())
+
+        count_before = self.server.request_count
+        self.assertEqual(self.llm.generate_response("hi", fallback="FB"), "FB")
+        self.assertEqual(self.server.request_count, count_before)
+
+        # Agen berpindah ke fallback deterministik
+        self.assertEqual(self.llm.interpret_certainty("Yes, definitely", "Q"), ("YES", 1.0))
+        self.assertEqual(self.llm.extract_weighted_preferences("fruity but not bitter"),
+                         {'fruity': 1.0, 'bitter': -1.0})
+        self.assertEqual(self.llm.extract_numerical_value("about 88 degrees", "temperature"), 88.0)
+
+
+class TestResiliencePrimitives(unittest.TestCase):
+
+    def test_token_bucket_refill(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=2.0, capacity=2.0, clock=lambda: now[0], sleep=lambda s: None)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertAlmostEqual(bucket.try_acquire(), 0.5)
+        now[0] = 0.5
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertFalse(bucket.acquire(timeout=0.1))
+
+    def test_breaker_half_open_recovery(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertFalse(breaker.allow_request())
+        now[0] = 11.0
+        self.assertTrue(breaker.allow_request())   # probe
+        self.assertFalse(breaker.allow_request())  # hanya satu probe
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
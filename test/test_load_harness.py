@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.report import percentile, compare_metrics
+from benchmarks.load_harness import load_replay_jsonl, run_load, summarize, flat_metrics
+from src.core.blackboard import Blackboard
+from src.core.orchestrator import Orchestrator
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class EchoAgent:
+    """Agen palsu: hanya 'Intent' yang membalas pesan user."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def process(self):
+        if self.name == 'Intent':
+            board = Blackboard.bound()
+            board.add_bot_message(f"echo: {board.get_last_user_input()}")
+
+
+class TestReport(unittest.TestCase):
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_compare_flags_regressions_by_direction(self):
+        baseline = {'p95': 100.0, 'throughput': 50.0}
+        rows = compare_metrics({'p95': 115.0, 'throughput': 40.0}, baseline, 0.10,
+                               higher_is_better={'throughput'})
+        self.assertEqual({name: regressed for name, _, _, _, regressed in rows},
+                         {'p95': True, 'throughput': True})
+        rows = compare_metrics({'p95': 90.0, 'throughput': 60.0}, baseline, 0.10,
+                               higher_is_better={'throughput'})
+        self.assertFalse(any(row[4] for row in rows))
+
+
+class TestLoadHarness(unittest.TestCase):
+    def test_concurrent_sessions_report(self):
+        agents = [EchoAgent(n) for n in ('Intent', 'Doctor', 'Sommelier', 'Brewer')]
+        orchestrator = Orchestrator(*agents, turn_budget=5.0)
+        conversations = [{'name': 'a', 'turns': ['halo', 'lagi']}, {'name': 'b', 'turns': ['satu']}]
+
+        records, wall = run_load(orchestrator, conversations, sessions=3, iterations=2)
+        report = summarize(records, wall, {'sessions': 3})
+
+        self.assertEqual(report['meta']['turns'], 3 * 2 * 3)
+        self.assertEqual(report['unanswered_turns'], 0)
+        self.assertEqual(report['agents']['Intent']['count'], 18)
+        self.assertEqual(set(report['conversations']), {'a', 'b'})
+        self.assertIn('turn_latency_ms.p95', flat_metrics(report))
+
+    def test_replay_jsonl_accepts_api_snapshots(self):
+        lines = [
+            {'name': 'scripted', 'turns': ['x', 'y']},
+            {'session_id': 'abc', 'messages': [
+                {'role': 'user', 'content': 'halo'}, {'role': 'assistant', 'content': 'hai'},
+                {'role': 'user', 'content': 'resep v60'}]},
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as f:
+            f.write('\n'.join(json.dumps(line) for line in lines))
+        try:
+            conversations = load_replay_jsonl(f.name)
+        finally:
+            os.remove(f.name)
+        self.assertEqual(conversations, [
+            {'name': 'scripted', 'turns': ['x', 'y']},
+            {'name': 'abc', 'turns': ['halo', 'resep v60']},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
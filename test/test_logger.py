@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import io
+import json
+import logging
+import threading
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import logger as logger_module
+from src.utils.logger import JsonFormatter, SamplingFilter, setup_logger
+
+
+class ThreadRecorder:
+    """Argumen log yang mencatat thread tempat ia diformat."""
+
+    def __init__(self):
+        self.threads = []
+
+    def __str__(self):
+        self.threads.append(threading.current_thread().name)
+        return "recorder"
+
+
+class TestQueueLogging(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.NOTSET)
+        self.saved_env = {k: os.environ.get(k) for k in ('LOG_HANDLER', 'LOG_LEVELS', 'LOG_SAMPLE')}
+
+    def tearDown(self):
+        logging.disable(logging.CRITICAL)
+        for key, value in self.saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def test_formatting_happens_on_listener_thread(self):
+        stream = io.StringIO()
+        queue_logging = logger_module._QueueLogging(JsonFormatter(), maxsize=100, stream=stream)
+        log = logging.getLogger("TestQueueLogging.deferred")
+        log.propagate = False
+        log.setLevel(logging.DEBUG)
+        log.addHandler(queue_logging.handler)
+        try:
+            recorder = ThreadRecorder()
+            log.info("User Input received: %s (%d)", recorder, 7)
+            queue_logging.stop()
+        finally:
+            log.removeHandler(queue_logging.handler)
+
+        self.assertEqual(len(recorder.threads), 1)
+        self.assertNotEqual(recorder.threads[0], threading.current_thread().name)
+        entry = json.loads(stream.getvalue().strip())
+        self.assertEqual(entry['msg'], "User Input received: recorder (7)")
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], "TestQueueLogging.deferred")
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = logger_module.DeferredQueueHandler(logger_module.queue.SimpleQueue(), maxsize=1)
+        record = logging.LogRecord("x", logging.INFO, __file__, 1, "msg", None, None)
+        handler.emit(record)
+        handler.emit(record)
+        self.assertEqual(handler.dropped, 1)
+
+    def test_per_logger_levels_and_sampling_from_env(self):
+        os.environ['LOG_LEVELS'] = 'TestLevels.quiet=WARNING'
+        os.environ['LOG_SAMPLE'] = 'TestLevels.sampled=0.0'
+        quiet = setup_logger('TestLevels.quiet')
+        sampled = setup_logger('TestLevels.sampled')
+        self.assertEqual(quiet.level, logging.WARNING)
+        self.assertEqual(setup_logger('TestLevels.default').level, logging.DEBUG)
+
+        sampling = [f for f in sampled.filters if isinstance(f, SamplingFilter)][0]
+        info = logging.LogRecord("x", logging.INFO, __file__, 1, "msg", None, None)
+        error = logging.LogRecord("x", logging.ERROR, __file__, 1, "msg", None, None)
+        self.assertFalse(sampling.filter(info))
+        self.assertTrue(sampling.filter(error))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import asyncio
+import sys
+import os
+import threading
+import urllib.request
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import metrics
+from src.utils.metrics import MetricsRegistry
+from src.core.state_machine import StateMachine, TurnContext
+from src.api.asgi_app import BaristaBoxAPI
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_merges_thread_shards(self):
+        requests = self.registry.counter("test_requests", "Requests.", ("outcome",))
+
+        def worker():
+            for _ in range(1000):
+                requests.inc(outcome='ok')
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        requests.inc(5, outcome='error')
+
+        self.assertEqual(requests.value(outcome='ok'), 8000)
+        text = self.registry.render()
+        self.assertIn('# TYPE test_requests counter', text)
+        self.assertIn('test_requests_total{outcome="ok"} 8000.0', text)
+        self.assertIn('test_requests_total{outcome="error"} 5.0', text)
+        with self.assertRaises(ValueError):
+            requests.inc(wrong='x')
+        with self.assertRaises(ValueError):
+            self.registry.gauge("test_requests", "Bentrok tipe.")
+
+    def test_dead_thread_shards_are_folded(self):
+        # Streamlit menjalankan setiap rerun di thread baru: shard tidak boleh menumpuk
+        requests = self.registry.counter("test_reruns", "Reruns.")
+        latency = self.registry.histogram("test_rerun_seconds", "Latency.", buckets=(0.1, 1.0))
+
+        def rerun():
+            requests.inc()
+            latency.observe(0.5)
+
+        for _ in range(200):
+            t = threading.Thread(target=rerun)
+            t.start()
+            t.join()
+
+        self.assertLessEqual(len(requests._shards._all), 2)
+        self.assertLessEqual(len(latency._shards._all), 2)
+        self.assertEqual(requests.value(), 200)
+        self.assertEqual(len(requests._shards._all), 0)
+        text = self.registry.render()
+        self.assertIn('test_rerun_seconds_bucket{le="1.0"} 200', text)
+        self.assertIn('test_rerun_seconds_count 200', text)
+        self.assertIn('test_rerun_seconds_sum 100.0', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = self.registry.histogram("test_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+        text = self.registry.render()
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="1.0"} 3', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn('test_latency_seconds_sum 3.65', text)
+        self.assertIn('test_latency_seconds_count 4', text)
+
+    def test_gauge_function_evaluated_at_scrape(self):
+        items = []
+        size = self.registry.gauge("test_items", "Items.", ("kind",))
+        size.set_function(lambda: len(items), kind='beans')
+        items.extend([1, 2, 3])
+        self.assertIn('test_items{kind="beans"} 3.0', self.registry.render())
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_state_transitions_counted(self):
+        fsm = StateMachine('MetricsTest', {
+            'A': (lambda turn: 'B', ('B',)),
+            'B': (lambda turn: None, ()),
+        }, wait_states=('B',))
+        transitions = metrics.REGISTRY.get('baristabox_state_transitions')
+        before = transitions.value(machine='MetricsTest', from_state='A', to_state='B')
+        fsm.run('A', TurnContext(None, 'x'))
+        self.assertEqual(transitions.value(machine='MetricsTest', from_state='A', to_state='B'), before + 1)
+
+    def test_exposition_endpoints(self):
+        server = metrics.start_http_server(0)
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            self.assertEqual(response.headers['Content-Type'], metrics.CONTENT_TYPE)
+            self.assertIn('baristabox_state_transitions', response.read().decode())
+        # Idempotent: pemanggilan kedua memakai server yang sama
+        self.assertIs(metrics.start_http_server(0), server)
+
+        app = BaristaBoxAPI(orchestrator=None, backend_kind='memory', max_workers=1)
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(app({'type': 'http', 'method': 'GET', 'path': '/metrics', 'headers': []}, receive, send))
+        app.executor.shutdown(wait=True)
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn(b'baristabox_sessions{state="active"}', sent[1]['body'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.profiling import StartupProfiler, ImportTimer
+from benchmarks.startup_profile import flat_metrics
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class TestStartupProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        sys.path.insert(0, self.tmp.name)
+
+    def tearDown(self):
+        sys.path.remove(self.tmp.name)
+        for name in ('bbx_profiled_outer', 'bbx_profiled_inner'):
+            sys.modules.pop(name, None)
+        self.tmp.cleanup()
+
+    def _write_module(self, name, body):
+        with open(os.path.join(self.tmp.name, f'{name}.py'), 'w') as f:
+            f.write(body)
+
+    def test_import_timer_splits_self_and_cumulative(self):
+        self._write_module('bbx_profiled_inner', 'import time\ntime.sleep(0.03)\n')
+        self._write_module('bbx_profiled_outer', 'import bbx_profiled_inner\nimport time\ntime.sleep(0.01)\n')
+        timer = ImportTimer().install()
+        try:
+            import bbx_profiled_outer  # noqa: F401
+            import bbx_profiled_outer  # noqa: F401 - sudah dimuat, tidak dicatat ulang
+        finally:
+            timer.uninstall()
+
+        outer_self, outer_cum = timer.records['bbx_profiled_outer']
+        inner_self, inner_cum = timer.records['bbx_profiled_inner']
+        self.assertGreaterEqual(inner_cum, 0.03)
+        self.assertGreaterEqual(outer_cum, inner_cum + 0.01)
+        self.assertAlmostEqual(outer_self, outer_cum - inner_cum, places=6)
+        report = timer.report()
+        self.assertEqual(report['modules'][0]['module'], 'bbx_profiled_outer')
+        self.assertIn('bbx_profiled_inner', report['packages'])
+
+    def test_phases_report_written_and_flattened(self):
+        path = os.path.join(self.tmp.name, 'profile.json')
+        profiler = StartupProfiler(path).start()
+        with profiler.phase('catalog'):
+            sum(range(10000))
+        report = profiler.finish()
+
+        with open(path) as f:
+            self.assertEqual(json.load(f)['phases'].keys(), {'catalog'})
+        phase = report['phases']['catalog']
+        self.assertGreaterEqual(phase['wall_s'], 0.0)
+        self.assertGreaterEqual(phase['cpu_s'], 0.0)
+        metrics = flat_metrics(report)
+        self.assertIn('phase.catalog.wall_ms', metrics)
+        self.assertIn('total.wall_ms', metrics)
+
+
+if __name__ == '__main__':
+    unittest.main()
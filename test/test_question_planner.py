@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.question_planner import QuestionPlanner, combine_cf
+
+import logging
+logging.disable(logging.CRITICAL)
+
+CAUSES = {
+    'grind_coarse': {'question': 'Q1'},
+    'brew_time_short': {'question': 'Q2'},
+    'water_temp_low': {'question': 'Q3'},
+}
+
+
+class TestQuestionPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "outcomes.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _keys(self, planner):
+        return [k for k, _ in planner.plan('sour', CAUSES)]
+
+    def test_stable_order_without_data(self):
+        for mode in QuestionPlanner.MODES:
+            planner = QuestionPlanner(stats_path=self.path, mode=mode)
+            self.assertEqual(self._keys(planner), list(CAUSES))
+
+    def test_logged_outcomes_reorder_questions(self):
+        planner = QuestionPlanner(stats_path=self.path, mode='prior')
+        for _ in range(5):
+            planner.record_outcome('sour', ['grind_coarse', 'brew_time_short', 'water_temp_low'], ['water_temp_low'])
+        planner.record_outcome('sour', ['grind_coarse', 'brew_time_short'], ['brew_time_short'])
+        planner.flush()
+        self.assertAlmostEqual(planner.prior('sour', 'water_temp_low'), 6 / 7)
+
+        # Statistik dipersist dan dibaca ulang oleh instance baru
+        for mode in ('prior', 'info_gain'):
+            reloaded = QuestionPlanner(stats_path=self.path, mode=mode)
+            self.assertEqual(self._keys(reloaded), ['water_temp_low', 'brew_time_short', 'grind_coarse'])
+
+    def test_mycin_combination_and_early_stop(self):
+        self.assertAlmostEqual(combine_cf([0.6, 0.5]), 0.8)
+        self.assertAlmostEqual(combine_cf([0.6, -0.6]), 0.0)
+        planner = QuestionPlanner(stats_path=self.path, cf_threshold=0.9)
+        self.assertFalse(planner.should_stop({'rejected_cause_grind_coarse': 1.0}))
+        self.assertFalse(planner.should_stop({'confirmed_cause_grind_coarse': 0.7}))
+        self.assertTrue(planner.should_stop({'confirmed_cause_grind_coarse': 0.7, 'confirmed_cause_brew_time_short': 0.7}))
+        # Satu jawaban pasti (STRONG_YES, CF 1.0) sengaja cukup untuk berhenti
+        self.assertTrue(planner.should_stop({'confirmed_cause_grind_coarse': 1.0}))
+        # Hanya bukti untuk penyebab diagnosis saat ini yang dihitung
+        evidence = {'confirmed_cause_grind_fine': 1.0, 'confirmed_cause_grind_coarse': 0.7}
+        self.assertFalse(planner.should_stop(evidence, CAUSES))
+        self.assertTrue(planner.should_stop(dict(evidence, confirmed_cause_water_temp_low=0.7), CAUSES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.scheduler import AgentScheduler
+from src.core.blackboard import Blackboard
+from src.core.state_backends import InMemoryStateBackend, MemorySessionStore
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class ScriptedAgent:
+    """Agen palsu: mencatat panggilan dan (opsional) menulis intent ke Blackboard."""
+
+    def __init__(self, name, log, watches=None, depends_on=(), intent=None, writes_intent=None):
+        self.name = name
+        self.log = log
+        self.WATCHES = watches
+        self.DEPENDS_ON = depends_on
+        self.intent = intent
+        self.writes_intent = writes_intent
+        self.board = None
+
+    def should_activate(self, board):
+        self.board = board
+        return self.intent is None or board.get_intent() == self.intent
+
+    def process(self):
+        self.log.append(self.name)
+        if self.writes_intent:
+            self.board.set_intent(self.writes_intent)
+
+
+class TestAgentScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.board = Blackboard(InMemoryStateBackend('s', MemorySessionStore()))
+        self.log = []
+
+    def test_dependency_order_and_chained_events(self):
+        # Didaftarkan terbalik; dependensi menentukan urutan
+        brewer = ScriptedAgent('Brewer', self.log, watches=(Blackboard.KEY_INTENT,),
+                               depends_on=('Sommelier',), intent='master_brewer')
+        sommelier = ScriptedAgent('Sommelier', self.log, watches=(Blackboard.KEY_INTENT,),
+                                  depends_on=('Intent',), intent='sommelier', writes_intent='master_brewer')
+        intent = ScriptedAgent('Intent', self.log, watches=(Blackboard.KEY_LAST_INPUT,), writes_intent='sommelier')
+        scheduler = AgentScheduler([brewer, sommelier, intent])
+
+        activated = scheduler.run(self.board, changed_keys=(Blackboard.KEY_LAST_INPUT,))
+        self.assertEqual(activated, ['Intent', 'Sommelier', 'Brewer'])
+        self.assertEqual(self.board._listeners, [])
+
+    def test_unsubscribed_agents_stay_asleep(self):
+        doctor = ScriptedAgent('Doctor', self.log, watches=(Blackboard.KEY_DOCTOR_STATE,))
+        scheduler = AgentScheduler([doctor])
+        self.assertEqual(scheduler.run(self.board, changed_keys=(Blackboard.KEY_LAST_INPUT,)), [])
+        self.assertEqual(scheduler.run(self.board, changed_keys=(Blackboard.KEY_DOCTOR_STATE,)), ['Doctor'])
+
+    def test_cycle_rejected(self):
+        a = ScriptedAgent('A', self.log, depends_on=('B',))
+        b = ScriptedAgent('B', self.log, depends_on=('A',))
+        with self.assertRaises(ValueError):
+            AgentScheduler([a, b])
+
+    def test_intent_locked_while_specialist_busy(self):
+        from src.agents.intent_agent import IntentAgent
+        self.assertTrue(IntentAgent.should_activate(None, self.board))
+        self.board.set_brewer_state('WAIT_METHOD_SELECTION')
+        self.assertFalse(IntentAgent.should_activate(None, self.board))
+        self.board.set_brewer_state('INIT')
+        self.board.set_doctor_state('ASKING')
+        self.assertFalse(IntentAgent.should_activate(None, self.board))
+        self.board.set_doctor_state('DONE')
+        self.assertTrue(IntentAgent.should_activate(None, self.board))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.session_manager import SessionManager
+from src.core.state_backends import InMemoryStateBackend, MemorySessionStore, SQLiteStateBackend
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class TestSessionManager(unittest.TestCase):
+
+    def setUp(self):
+        self.now = [0.0]
+        self.store = MemorySessionStore()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _manager(self, **kwargs):
+        kwargs.setdefault('ttl_seconds', 60)
+        kwargs.setdefault('max_sessions', 100)
+        kwargs.setdefault('spill_dir', '')
+        return SessionManager(clock=lambda: self.now[0],
+                              backend_factory=lambda sid: InMemoryStateBackend(sid, self.store), **kwargs)
+
+    def test_idle_sessions_expire(self):
+        manager = self._manager()
+        manager.board('old').add_user_message("hi")
+        self.now[0] = 50.0
+        manager.board('fresh').add_user_message("hello")
+        self.now[0] = 70.0
+
+        self.assertEqual(manager.sweep(), ['old'])
+        self.assertFalse(manager.exists('old'))
+        self.assertNotIn('old', self.store)
+        self.assertTrue(manager.exists('fresh'))
+
+    def test_lru_cap_spills_and_restores(self):
+        manager = self._manager(max_sessions=2, spill_dir=self.tmp.name)
+        manager.board('a').add_user_message("from a")
+        manager.board('b').add_user_message("from b")
+        manager.board('a')                       # 'a' dipakai lagi -> 'b' jadi LRU
+        manager.board('c').add_user_message("from c")
+
+        self.assertNotIn('b', self.store)
+        self.assertTrue(manager.exists('b'))
+        self.assertEqual(manager.memory_report()['spilled_sessions'], 1)
+
+        # Kembali ke sesi 'b' -> dipulihkan dari disk, 'a' kini yang dievict
+        board = manager.board('b')
+        self.assertEqual(board.get_last_user_input(), "from b")
+        self.assertEqual(set(manager.last_access), {'c', 'b'})
+        self.assertIn('b', self.store)
+
+    def test_sessions_in_use_are_not_evicted(self):
+        manager = self._manager(max_sessions=1)
+        with manager.in_use('busy') as board:
+            board.add_user_message("turn berjalan")
+            self.now[0] = 100.0
+            self.assertEqual(manager.sweep(), [])
+            manager.board('other')                   # batas terlampaui, tapi 'busy' di-pin
+            self.assertIn('busy', self.store)
+            board.add_bot_message("selesai")
+        self.assertEqual(manager.board('busy').get_chat_history()[-1]['content'], "selesai")
+        self.assertNotIn('other', self.store)        # setelah unpin, LRU normal lagi
+        self.assertEqual(manager.pinned, {})
+
+    def test_shared_backend_eviction_keeps_database_state(self):
+        path = os.path.join(self.tmp.name, "sessions.db")
+        replicas = [SessionManager('sqlite', ttl_seconds=60, max_sessions=1, spill_dir='', clock=lambda: self.now[0],
+                                   backend_factory=lambda sid: SQLiteStateBackend(sid, path)) for _ in range(2)]
+        replicas[0].board('a').add_user_message("from a")
+        replicas[0].board('b')                    # LRU: 'a' keluar dari pembukuan lokal saja
+        self.now[0] = 100.0
+        self.assertEqual(replicas[0].sweep(), ['b'])
+        self.assertEqual(replicas[0].last_access, {})
+
+        # State tetap di database: replika mana pun masih bisa melanjutkan sesi
+        self.assertTrue(replicas[0].exists('a'))
+        self.assertEqual(replicas[1].board('a').get_last_user_input(), "from a")
+
+    def test_memory_report_does_not_hold_session_lock(self):
+        manager = None
+        lock_free = []
+
+        class ProbingBackend(InMemoryStateBackend):
+            def keys(self):
+                def try_lock():
+                    acquired = manager.lock.acquire(timeout=0.01)
+                    lock_free.append(acquired)
+                    if acquired:
+                        manager.lock.release()
+                probe = threading.Thread(target=try_lock)
+                probe.start()
+                probe.join()
+                return super().keys()
+
+        manager = SessionManager(ttl_seconds=60, max_sessions=10, spill_dir='',
+                                 backend_factory=lambda sid: ProbingBackend(sid, self.store))
+        manager.board('s').add_user_message("hi")
+        self.assertGreater(manager.memory_report()['per_session_bytes']['s'], 0)
+        self.assertEqual(lock_free, [True])
+
+    def test_memory_report(self):
+        manager = self._manager()
+        manager.board('small').add_user_message("hi")
+        big = manager.board('big')
+        for i in range(20):
+            big.add_user_message("x" * 200)
+        report = manager.memory_report()
+        self.assertEqual(report['active_sessions'], 2)
+        self.assertGreater(report['per_session_bytes']['big'], report['per_session_bytes']['small'])
+        self.assertEqual(report['total_bytes'], sum(report['per_session_bytes'].values()))
+
+        manager.drop('big')
+        self.assertEqual(manager.memory_report()['active_sessions'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+import pickle
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.blackboard import Blackboard
+from src.core.state_backends import InMemoryStateBackend, MemorySessionStore
+from src.knowledge.store import KnowledgeStore
+from src.knowledge.bean_frame import BeanFrame
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class TestSessionSnapshot(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.knowledge = KnowledgeStore.default()
+
+    def _board(self, sid='s'):
+        return Blackboard(InMemoryStateBackend(sid, MemorySessionStore()))
+
+    def _diagnosing_board(self):
+        board = self._board()
+        board.add_user_message("my coffee is sour")
+        board.set_context_bean(self.knowledge.beans[0])
+        board.set_context_recipe(self.knowledge.recipes[0])
+        board.update_evidence('current_problem_key', 'sour')
+        board.set_diagnosis_queue(list(self.knowledge.kb_rules['sour']['causes'].items()), problem_key='sour')
+        board.pop_diagnosis_queue()
+        return board
+
+    def test_state_stores_references_only(self):
+        board = self._diagnosing_board()
+        self.assertEqual(board.state.get(Blackboard.KEY_CONTEXT_BEAN), self.knowledge.beans[0].id)
+        self.assertEqual(board.state.get(Blackboard.KEY_CONTEXT_RECIPE), self.knowledge.recipes[0].recipe_id)
+        self.assertEqual(board.state.get(Blackboard.KEY_CURRENT_DIAGNOSIS_ITEM), ('sour', 'grind_coarse'))
+
+        # Pembacaan tetap mengembalikan frame & data penyebab lengkap
+        self.assertIs(board.get_context_bean(), self.knowledge.beans[0])
+        cause_key, cause_data = board.get_current_diagnosis_item()
+        self.assertEqual(cause_key, 'grind_coarse')
+        self.assertIn('question', cause_data)
+        self.assertEqual([k for k, _ in board.get_diagnosis_queue()], ['brew_time_short', 'water_temp_low'])
+
+    def test_snapshot_roundtrip_to_another_replica(self):
+        source = self._diagnosing_board()
+        data = source.snapshot()
+        self.assertIsInstance(data, bytes)
+
+        replica = self._board('replica')
+        replica.restore(data)
+        self.assertEqual(replica.get_chat_history(), source.get_chat_history())
+        self.assertIs(replica.get_context_recipe(), self.knowledge.recipes[0])
+        self.assertEqual(replica.get_current_diagnosis_item()[0], 'grind_coarse')
+        self.assertEqual(len(replica.get_diagnosis_queue()), 2)
+        self.assertEqual(replica.last_message_seq(), 1)
+
+    def test_snapshot_compacts_legacy_objects_and_rejects_unknown_version(self):
+        board = self._board()
+        board.state.set(Blackboard.KEY_CONTEXT_BEAN, self.knowledge.beans[1])
+        state = pickle.loads(board.snapshot())['state']
+        self.assertEqual(state[Blackboard.KEY_CONTEXT_BEAN], self.knowledge.beans[1].id)
+
+        with self.assertRaises(ValueError):
+            board.restore(pickle.dumps({'version': 999, 'state': {}}))
+
+    def test_unknown_frames_kept_verbatim(self):
+        board = self._board()
+        custom = BeanFrame({'id': 'custom_001', 'name': 'Home Roast'})
+        board.set_context_bean(custom)
+        self.assertIs(board.get_context_bean(), custom)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import random
+import signal
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.cbr_engine import CBREngine
+from src.core.sharded_cbr import ShardedCatalog, SHARD_FAILURES
+from src.knowledge.bean_frame import BeanFrame
+from src.knowledge.tag_postings import TagPostings
+from src.knowledge.tag_vocabulary import TagVocabulary
+
+import logging
+logging.disable(logging.CRITICAL)
+
+TAGS = ['Fruity', 'Floral', 'Chocolatey', 'Nutty', 'Bright', 'Earthy', 'Spicy', 'Sweet']
+WEIGHTS = {'origin': 0.3, 'roast_level': 0.4, 'processing': 0.3}
+
+
+class TestShardedCatalog(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(2)
+        cls.beans = [BeanFrame({
+            'id': f'b{i}', 'name': f'Bean {i}',
+            'origin': rng.choice(['Ethiopia', 'Kenya', 'ethiopia', None]),
+            'roast_level': rng.choice([1, 2, 3, 4, 5, 2.5, None]),
+            'processing': rng.choice(['Washed', 'Natural', None]),
+            'expert_tags': rng.sample(TAGS, rng.randint(0, 3)),
+        }) for i in range(501)]
+        cls.vocabulary = TagVocabulary(cls.beans)
+        cls.catalog = ShardedCatalog(cls.beans, shards=3, vocabulary=cls.vocabulary, timeout=10)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.catalog.close()
+
+    def assert_matches_in_process(self, rng):
+        postings = TagPostings(self.vocabulary)
+        cbr = CBREngine()
+        for _ in range(20):
+            prefs = {t: rng.choice([1.0, 0.5, 0.3, -0.4]) for t in rng.sample(['fruit', 'floral', 'choc', 'nut', 'e', 'zzz'], 3)}
+            k = rng.choice([1, 3, 10])
+            expected = [(score, self.beans[i]) for score, i in postings.scan(self.vocabulary.compile(prefs), k)]
+            self.assertEqual(self.catalog.top_tag_matches(prefs, k), expected)
+
+            target = {'origin': rng.choice(['Ethiopia', 'KENYA', 'Unknown']), 'roast_level': rng.choice([1, 3, 5, None]),
+                      'processing': rng.choice(['Washed', 'natural'])}
+            self.assertEqual(self.catalog.find_nearest_neighbors(target, WEIGHTS, k),
+                             cbr.find_nearest_neighbors(target, self.beans, WEIGHTS, k))
+            self.assertEqual(CBREngine(shards=self.catalog).find_similar_bean(target, self.beans),
+                             cbr.find_similar_bean(target, self.beans))
+
+    def test_sharded_results_equal_in_process(self):
+        self.assert_matches_in_process(random.Random(4))
+        # Fitur yang tidak di-encode -> jalur in-process
+        self.assertIsNone(self.catalog.find_nearest_neighbors({'name': 'Bean 1'}, {'name': 1.0}))
+
+    def test_dead_worker_falls_back_and_respawns(self):
+        shard = self.catalog._shards[1]
+        failures = SHARD_FAILURES.value()
+        os.kill(shard['process'].pid, signal.SIGKILL)
+        shard['process'].join(5)
+
+        self.assert_matches_in_process(random.Random(9))
+        self.assertGreater(SHARD_FAILURES.value(), failures)
+        self.assertTrue(shard['process'].is_alive())
+
+    def test_concurrent_queries_are_pipelined(self):
+        cbr = CBREngine()
+        targets = [{'origin': origin, 'roast_level': roast, 'processing': 'Washed'}
+                   for origin in ('Ethiopia', 'Kenya') for roast in (1, 3, 5)]
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda t: self.catalog.find_nearest_neighbors(t, WEIGHTS, 5), targets * 4))
+        for target, result in zip(targets * 4, results):
+            self.assertEqual(result, cbr.find_nearest_neighbors(target, self.beans, WEIGHTS, 5))
+
+        # Query A tertahan menunggu shard terakhir; query B tetap bisa dikirim ke shard lain
+        catalog = self.catalog
+        last = catalog._shards[-1]
+        gate, sends = threading.Event(), []
+        slow_thread = []
+        receive, send = catalog._receive, catalog._send
+
+        def gated_receive(shard, message):
+            if shard is last and threading.current_thread() in slow_thread:
+                gate.wait(10)
+            return receive(shard, message)
+
+        def recording_send(shard, message):
+            sends.append((threading.current_thread(), shard['offset']))
+            return send(shard, message)
+
+        catalog._receive, catalog._send = gated_receive, recording_send
+        try:
+            query_a = threading.Thread(target=catalog.find_nearest_neighbors, args=(targets[0], WEIGHTS))
+            slow_thread.append(query_a)
+            query_a.start()
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                query_b = pool.submit(catalog.find_nearest_neighbors, targets[1], WEIGHTS)
+                for _ in range(500):
+                    if any(thread is not query_a for thread, _ in sends):
+                        break
+                    threading.Event().wait(0.01)
+                self.assertTrue(query_a.is_alive())
+                self.assertIn(catalog._shards[0]['offset'], [offset for thread, offset in sends if thread is not query_a])
+                gate.set()
+                query_a.join(10)
+                self.assertEqual(query_b.result(10), cbr.find_nearest_neighbors(targets[1], self.beans, WEIGHTS, 3))
+        finally:
+            gate.set()
+            del catalog._receive, catalog._send
+
+
+if __name__ == '__main__':
+    unittest.main()
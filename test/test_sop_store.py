@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.llm_backends import LocalBackend, RecordReplayBackend
+from src.knowledge.sop_store import SOPStore, recipe_content_hash
+from src.knowledge.recipe_frame import RecipeFrame
+from src.knowledge.bean_frame import BeanFrame
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class CountingLLM:
+    """LLM palsu yang menghitung jumlah panggilan."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_response(self, prompt, context="", fallback=None, timeout=None):
+        self.calls += 1
+        return f"SOP #{self.calls}"
+
+
+class TestSOPStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sops.json")
+        self.bean = BeanFrame({'id': 'cb_001', 'name': 'Ethiopia Yirgacheffe'})
+        self.recipe = RecipeFrame({
+            'recipe_id': 'br_001', 'bean_id': 'cb_001', 'brew_method': 'V60',
+            'grind_size': 'Medium-Fine', 'coffee_grams': 20, 'water_grams': 320,
+            'water_temp_c': 96, 'technique_notes': 'Spiral pour.',
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_build_then_serve_from_disk(self):
+        llm = CountingLLM()
+        store = SOPStore(self.path)
+        self.assertEqual(store.build([self.recipe], [self.bean], llm), (1, 0))
+
+        # Build ulang tanpa perubahan -> tidak ada panggilan LLM baru
+        reloaded = SOPStore(self.path)
+        self.assertEqual(reloaded.build([self.recipe], [self.bean], llm), (0, 1))
+        self.assertEqual(llm.calls, 1)
+        self.assertEqual(reloaded.get(self.recipe, self.bean.name), "SOP #1")
+
+    def test_build_refuses_synthetic_backend(self):
+        for backend in (LocalBackend(), RecordReplayBackend(os.path.join(self.tmp.name, "rec.jsonl"), 'record', LocalBackend())):
+            llm = CountingLLM()
+            llm.backend = backend
+            self.assertEqual(SOPStore(self.path).build([self.recipe], [self.bean], llm), (0, 0))
+            self.assertEqual(llm.calls, 0)
+            self.assertFalse(os.path.exists(self.path))
+
+    def test_recipe_change_invalidates_entry(self):
+        store = SOPStore(self.path)
+        store.put(self.recipe, self.bean.name, "old")
+        old_hash = recipe_content_hash(self.recipe, self.bean.name)
+
+        self.recipe.water_temp_c = 94
+        self.assertNotEqual(recipe_content_hash(self.recipe, self.bean.name), old_hash)
+        self.assertIsNone(store.get(self.recipe, self.bean.name))
+
+
+if __name__ == '__main__':
+    unittest.main()
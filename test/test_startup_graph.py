@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.bootstrap import StartupGraph
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class TestStartupGraph(unittest.TestCase):
+
+    def test_independent_tasks_overlap_and_dependencies_wait(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def loader(value):
+            def run(results):
+                # Hanya lolos jika kedua loader berjalan bersamaan
+                barrier.wait()
+                return value
+            return run
+
+        graph = StartupGraph()
+        graph.add('beans', loader(['b']))
+        graph.add('model', loader('m'))
+        graph.add('agents', lambda r: (r['beans'], r['model']), deps=('beans', 'model'))
+        results = graph.run(max_workers=4)
+
+        self.assertEqual(results['agents'], (['b'], 'm'))
+        start_agents = graph.timings['agents'][0]
+        self.assertGreaterEqual(start_agents, max(graph.timings['beans'][1], graph.timings['model'][1]))
+
+    def test_optional_failure_yields_none_required_failure_raises(self):
+        def broken(results):
+            raise IOError("missing")
+
+        graph = StartupGraph()
+        graph.add('model', broken)
+        graph.add('agents', lambda r: r['model'] is None, deps=('model',))
+        self.assertTrue(graph.run()['agents'])
+
+        graph = StartupGraph().add('knowledge', broken, optional=False)
+        with self.assertRaises(IOError):
+            graph.run()
+
+        with self.assertRaises(ValueError):
+            StartupGraph().add('agents', broken, deps=('unknown',))
+
+    def test_run_inline_uses_calling_thread(self):
+        graph = StartupGraph().add('kb', lambda r: time.sleep(0.01) or {'k': 1})
+        graph.run()
+        thread = graph.run_inline('agents', lambda r: (threading.current_thread(), r['kb']))
+        self.assertEqual(thread, (threading.current_thread(), {'k': 1}))
+        self.assertIn('agents', graph.timings)
+
+
+if __name__ == '__main__':
+    unittest.main()
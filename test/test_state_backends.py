@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.blackboard import Blackboard
+from src.core.state_backends import (
+    InMemoryStateBackend, SQLiteStateBackend, MemorySessionStore, create_backend,
+)
+from src.agents.base_agent import BaseAgent
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class EchoAgent(BaseAgent):
+    """Agen minimal yang menulis ke Blackboard yang sedang aktif."""
+
+    def __init__(self):
+        super().__init__("Echo")
+
+    def process(self):
+        self.blackboard.add_bot_message(f"echo: {self.blackboard.get_last_user_input()}")
+
+
+class TestStateBackends(unittest.TestCase):
+
+    def _exercise(self, board):
+        board.add_user_message("My coffee is sour")
+        board.set_intent('doctor')
+        board.update_evidence('taste_sour', 1.0)
+        board.set_diagnosis_queue([('grind_coarse', {'question': 'Q1'}), ('water_temp_low', {'question': 'Q2'})])
+        board.pop_diagnosis_queue()
+
+    def _assert_state(self, board):
+        self.assertEqual(board.get_last_user_input(), "My coffee is sour")
+        self.assertEqual(board.get_intent(), 'doctor')
+        self.assertEqual(board.get_evidence(), {'taste_sour': 1.0})
+        self.assertEqual(len(board.get_chat_history()), 1)
+        self.assertEqual(board.get_current_diagnosis_item()[0], 'grind_coarse')
+        self.assertEqual(len(board.get_diagnosis_queue()), 1)
+
+    def test_memory_backend_isolates_sessions(self):
+        store = MemorySessionStore()
+        a = Blackboard(InMemoryStateBackend('a', store))
+        b = Blackboard(InMemoryStateBackend('b', store))
+        self._exercise(a)
+        self._assert_state(a)
+        self.assertIsNone(b.get_intent())
+        self.assertEqual(b.get_chat_history(), [])
+
+    def test_sqlite_backend_shared_between_replicas(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state.db")
+            self._exercise(Blackboard(SQLiteStateBackend('s1', path)))
+            # "Replika" lain membuka file yang sama dan melihat state yang sama
+            self._assert_state(Blackboard(SQLiteStateBackend('s1', path)))
+            self.assertEqual(Blackboard(SQLiteStateBackend('s2', path)).get_chat_history(), [])
+
+    def test_create_backend_from_config(self):
+        self.assertIsInstance(create_backend('memory', 'x'), InMemoryStateBackend)
+
+    def test_agent_uses_bound_blackboard(self):
+        """Satu instance agen melayani dua sesi berbeda lewat binding per turn."""
+        store = MemorySessionStore()
+        agent = EchoAgent()
+        for sid in ('a', 'b'):
+            board = Blackboard(InMemoryStateBackend(sid, store))
+            board.add_user_message(f"hi {sid}")
+            with board.bind():
+                agent.process()
+        for sid in ('a', 'b'):
+            history = Blackboard(InMemoryStateBackend(sid, store)).get_chat_history()
+            self.assertEqual(history[-1]['content'], f"echo: hi {sid}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic_catalog import CatalogGenerator, CatalogProfile, write_catalog
+from benchmarks.micro_benchmarks import run_size, flat_metrics
+from src.knowledge.store import KnowledgeStore
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class TestSyntheticCatalog(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.profile = CatalogProfile()
+
+    def test_deterministic_and_scaled(self):
+        first = CatalogGenerator(self.profile, seed=7).catalog(500)
+        second = CatalogGenerator(self.profile, seed=7).catalog(500)
+        self.assertEqual(first, second)
+
+        beans, recipes, kb = first
+        self.assertEqual(len(beans), 500)
+        self.assertGreaterEqual(len(recipes), 500)
+        self.assertEqual(sum(len(p['causes']) for p in kb.values()), 500)
+        self.assertTrue({r['bean_id'] for r in recipes} <= {b['id'] for b in beans})
+        # Kosakata asli mendominasi, ekor panjang tetap ada
+        tags = [t for b in beans for t in b['expert_tags']]
+        tail = [t for t in tags if t.startswith('Note ')]
+        self.assertTrue(0 < len(tail) < len(tags) * 0.2)
+
+    def test_catalog_loads_through_knowledge_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = KnowledgeStore.load(*write_catalog(tmp, 200, profile=self.profile))
+        self.assertEqual(len(store.beans), 200)
+        self.assertIsNotNone(store.cause('sour', 'cause_0'))
+
+    def test_micro_benchmark_run(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            result = run_size(100, 0, 1, 1.0, {'find_similar_bean', 'fuzzy_check_temperature'}, self.profile, tmp)
+        self.assertEqual(set(result['benchmarks']), {'find_similar_bean', 'fuzzy_check_temperature'})
+        metrics = flat_metrics({'sizes': {'100': result}})
+        self.assertIn('find_similar_bean[n=100].min_ms', metrics)
+
+
+if __name__ == '__main__':
+    unittest.main()
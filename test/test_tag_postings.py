@@ -0,0 +1,56 @@
+import unittest
+import random
+import sys
+import os
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.knowledge.bean_frame import BeanFrame
+from src.knowledge.tag_postings import TagPostings
+from src.knowledge.tag_vocabulary import TagVocabulary
+
+import logging
+logging.disable(logging.CRITICAL)
+
+TAGS = ['Fruity', 'Floral', 'Chocolatey', 'Nutty', 'Bright', 'Earthy', 'Spicy', 'Sweet', 'Bold', 'Tea-like', 'Berry']
+TERMS = ['fruit', 'floral', 'choc', 'nut', 'bright', 'earth', 'spic', 'sweet', 'bold', 'e', 'tea', 'berry', 'zzz']
+WEIGHTS = [1.0, 0.7, 0.6, 0.5, 0.3, 0.2, 0.1, -0.4, -1.0]
+
+
+def catalog(rng, size):
+    return [BeanFrame({'id': f'b{i}', 'name': f'Bean {i}', 'expert_tags': rng.sample(TAGS, rng.randint(0, 4))})
+            for i in range(size)]
+
+
+class TestTagPostings(unittest.TestCase):
+
+    def test_top_k_equals_full_scan(self):
+        rng = random.Random(11)
+        for size in (40, 2000):
+            vocabulary = TagVocabulary(catalog(rng, size), synonyms={})
+            postings = TagPostings(vocabulary)
+            for _ in range(300):
+                prefs = {term: rng.choice(WEIGHTS) for term in rng.sample(TERMS, rng.randint(1, 5))}
+                query = vocabulary.compile(prefs)
+                k = rng.choice([1, 3, 10])
+                mask = rng.getrandbits(size) if rng.random() < 0.3 else None
+                allowed = None if mask is None else mask.to_bytes((size + 7) // 8, 'little')
+                # Referensi: scoring + sort stabil seluruh kandidat (jalur Sommelier sebelumnya)
+                self.assertEqual(postings.top_k(query, k, mask), postings.scan(query, k, allowed), prefs)
+
+    def test_stops_early_on_large_catalog(self):
+        rng = random.Random(5)
+        vocabulary = TagVocabulary(catalog(rng, 20000), synonyms={})
+        postings = TagPostings(vocabulary)
+        query = vocabulary.compile({'berry': 1.0, 'floral': 0.6, 'earth': -1.0})
+        top = postings.top_k(query, 3)
+        self.assertEqual(top, postings.scan(query, 3))
+        self.assertAlmostEqual(top[0][0], 100.0 * 1.6 / 0.6)
+
+        postings.top_k(query, 3)
+        self.assertLess(postings.last_evaluated, 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import random
+import sys
+import os
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.cbr_engine import CBREngine
+from src.knowledge.bean_frame import BeanFrame
+from src.knowledge.store import KnowledgeStore
+from src.knowledge.tag_vocabulary import TagVocabulary, stem
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class TestTagVocabulary(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.beans = KnowledgeStore.default().beans
+
+    def test_exact_legacy_scores_without_synonyms_or_stemming(self):
+        vocabulary = TagVocabulary(self.beans, synonyms={}, stemming=False)
+        terms = sorted({word for text in vocabulary.texts for word in text.split()}) + ['ui', 'o', 'bitter', 'zzz']
+        cbr = CBREngine()
+        rng = random.Random(3)
+        for _ in range(200):
+            prefs = {rng.choice(terms): round(rng.uniform(-1.0, 1.0), 2) for _ in range(rng.randint(1, 5))}
+            query = vocabulary.compile(prefs)
+            for bean, tag_ids in zip(self.beans, vocabulary.bean_tags):
+                self.assertEqual(query.score(tag_ids), cbr.calculate_weighted_tag_similarity(prefs, bean.expert_tags))
+
+    def test_synonyms_and_stems_map_to_canonical_tags(self):
+        beans = [BeanFrame({'id': 'b0', 'name': 'A', 'expert_tags': ['Chocolatey', 'Nutty']}),
+                 BeanFrame({'id': 'b1', 'name': 'B', 'expert_tags': ['Fruity', 'Bright']})]
+        vocabulary = TagVocabulary(beans, synonyms={'Cocoa': ['chocolatey'], 'citrus': ['fruity', 'bright']})
+        self.assertEqual(stem('fruits'), stem('fruity'))
+        self.assertEqual(vocabulary.tag_names(vocabulary.resolve('cocoa')), ['chocolatey'])
+        self.assertEqual(vocabulary.tag_names(sorted(vocabulary.resolve('nuts'))), ['nutty'])
+        self.assertEqual(vocabulary.tag_names(sorted(vocabulary.resolve('citrus'))), ['fruity', 'bright'])
+
+        query = vocabulary.compile({'cocoa': 1.0, 'fruits': 1.0, 'bitter': 2.0})
+        self.assertEqual(query.score(vocabulary.bean_tags[0]), 25.0)
+        self.assertEqual(query.unmapped, ['bitter'])
+        vocabulary.compile({'bitter': 1.0})
+        self.assertEqual(vocabulary.unmapped_report()[0]['term'], 'bitter')
+        self.assertEqual(vocabulary.unmapped_report()[0]['count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+import json
+import random
+import tempfile
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import tracing
+from src.utils.tracing import Tracer, to_otlp_json, NOOP_SPAN
+from src.core.llm_service import LLMService
+from src.core.llm_backends import LocalBackend
+from src.core.orchestrator import Orchestrator
+from src.core.blackboard import Blackboard
+from src.core.state_backends import InMemoryStateBackend, MemorySessionStore
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class LLMCallingAgent:
+    """Agen palsu: Intent memanggil LLM sekali, agen lain tidak melakukan apa-apa."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def process(self):
+        if self.name == 'Intent':
+            LLMService().generate_response("halo", step="llm.test")
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.saved_llm = LLMService._instance
+        LLMService._instance = None
+        LLMService().use_backend(LocalBackend())
+        self.saved_tracer = tracing._tracer
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        LLMService._instance = self.saved_llm
+        tracing.set_tracer(self.saved_tracer)
+        self.tmp.cleanup()
+
+    def run_turn(self, text="halo"):
+        agents = [LLMCallingAgent(n) for n in ('Intent', 'Doctor', 'Sommelier', 'Brewer')]
+        board = Blackboard(InMemoryStateBackend('trace-test', MemorySessionStore()))
+        board.add_user_message(text)
+        Orchestrator(*agents, turn_budget=5.0).run_cycle(board)
+
+    def test_turn_agent_and_llm_spans_are_nested(self):
+        tracer = Tracer(sample_rate=1.0, export_dir=self.tmp.name, export_format='chrome')
+        tracing.set_tracer(tracer)
+        self.run_turn()
+
+        trace = tracer.recent[-1]
+        spans = {span.name: span for span in trace.spans}
+        self.assertEqual(set(spans), {'turn', 'llm.call', 'agent.Intent', 'agent.Sommelier',
+                                      'agent.Brewer', 'agent.Doctor'})
+        self.assertIsNone(spans['turn'].parent_id)
+        self.assertEqual(spans['agent.Intent'].parent_id, spans['turn'].span_id)
+        self.assertEqual(spans['llm.call'].parent_id, spans['agent.Intent'].span_id)
+        self.assertEqual(spans['llm.call'].attributes['outcome'], 'ok')
+        self.assertEqual(spans['llm.call'].attributes['attempts'], 1)
+        self.assertEqual(spans['turn'].attributes['session'], 'trace-test')
+
+        files = os.listdir(self.tmp.name)
+        self.assertEqual(len(files), 1)
+        with open(os.path.join(self.tmp.name, files[0]), 'r', encoding='utf-8') as f:
+            events = json.load(f)['traceEvents']
+        self.assertEqual([e['name'] for e in events][:3], ['turn', 'agent.Intent', 'llm.call'])
+        self.assertTrue(all(e['ph'] == 'X' and e['dur'] >= 0 for e in events))
+
+    def test_otlp_export(self):
+        tracer = Tracer(sample_rate=1.0, export_dir='')
+        tracing.set_tracer(tracer)
+        self.run_turn()
+
+        spans = to_otlp_json(tracer.recent[-1])['resourceSpans'][0]['scopeSpans'][0]['spans']
+        by_name = {s['name']: s for s in spans}
+        self.assertNotIn('parentSpanId', by_name['turn'])
+        self.assertEqual(by_name['llm.call']['parentSpanId'], by_name['agent.Intent']['spanId'])
+        attributes = {a['key']: a['value'] for a in by_name['llm.call']['attributes']}
+        self.assertEqual(attributes['step'], {'stringValue': 'llm.test'})
+
+    def test_sampling(self):
+        off = Tracer(sample_rate=0.0, export_dir='')
+        self.assertIs(off.start_trace('turn'), NOOP_SPAN)
+        self.assertIs(off.span('agent.Intent'), NOOP_SPAN)
+
+        half = Tracer(sample_rate=0.5, export_dir='', rng=random.Random(1))
+        sampled = sum(1 for _ in range(1000) if half.start_trace('turn') is not NOOP_SPAN)
+        self.assertTrue(400 < sampled < 600)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import asyncio
+import json
+import sys
+import os
+import tempfile
+
+# Tambahkan root folder ke path agar bisa import src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core import warmup
+from src.core.scheduler import AgentScheduler
+from src.core.llm_service import LLMService
+from src.core.llm_backends import LocalBackend, RecordReplayBackend
+from src.api.asgi_app import BaristaBoxAPI
+from test.test_api import EchoOrchestrator, call
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class WarmAgent:
+    """Agen palsu: mencatat warm_up(), opsional gagal."""
+
+    def __init__(self, name, log, fail=False):
+        self.name = name
+        self.log = log
+        self.fail = fail
+
+    def warm_up(self):
+        if self.fail:
+            raise RuntimeError("boom")
+        self.log.append(self.name)
+
+    def process(self):
+        pass
+
+
+class FakeOrchestrator(EchoOrchestrator):
+    def __init__(self, agents):
+        self.scheduler = AgentScheduler(agents)
+
+
+class TestWarmup(unittest.TestCase):
+
+    def setUp(self):
+        warmup.reset()
+        self._saved_instance = LLMService._instance
+        LLMService._instance = None
+        self.llm = LLMService()
+        self.llm.use_backend(LocalBackend(default_response="live"))
+
+    def tearDown(self):
+        LLMService._instance = self._saved_instance
+        warmup.reset()
+
+    def test_agents_warmed_in_order_and_failures_not_fatal(self):
+        log = []
+        orchestrator = FakeOrchestrator([WarmAgent('Intent', log), WarmAgent('Doctor', log, fail=True),
+                                         WarmAgent('Brewer', log)])
+        self.assertFalse(warmup.is_ready())
+        timings = warmup.warm_up(orchestrator)
+        self.assertEqual(log, ['Intent', 'Brewer'])
+        self.assertEqual(set(timings), {'agent.Intent', 'agent.Brewer'})
+        self.assertTrue(warmup.is_ready())
+
+    def test_llm_cache_prefill_wraps_live_backend(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'key': RecordReplayBackend.key_for('cached'), 'prompt': 'cached',
+                                    'response': 'from cache'}) + "\n")
+            self.assertEqual(warmup.prefill_llm_cache(path, self.llm), 1)
+            self.assertIsInstance(self.llm.backend, RecordReplayBackend)
+            self.assertEqual(self.llm.generate_response('cached'), 'from cache')
+            self.assertEqual(self.llm.generate_response('other'), 'live')
+
+            # Backend replay yang sudah aktif cukup ditambah rekamannya
+            self.assertEqual(warmup.prefill_llm_cache(path, self.llm), 1)
+            self.assertIsInstance(self.llm.backend.inner, LocalBackend)
+
+    def test_readyz_follows_warmup(self):
+        app = BaristaBoxAPI(orchestrator=FakeOrchestrator([]), backend_kind='memory', max_workers=2)
+        try:
+            self.assertEqual(asyncio.run(call(app, 'GET', '/readyz')), (503, {'ready': False}))
+            warmup.warm_up(app.orchestrator)
+            self.assertEqual(asyncio.run(call(app, 'GET', '/readyz')), (200, {'ready': True}))
+        finally:
+            app.executor.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    unittest.main()